@@ -19,6 +19,14 @@ def getValuesFromListOfDicts(listOfDicts, keyToSearch):
     return [singleDict[keyToSearch] for singleDict in listOfDicts\
            if singleDict[keyToSearch]]
 
+def getChangedValues(oldValues, newValues):
+    """
+    Return a dict of the items of newValues whose
+    value differs from the one in oldValues
+    """
+    return {key: value for (key, value) in newValues.items()\
+            if key not in oldValues or oldValues[key] != value}
+
 def convertToListOfPyDicts(listOfNSDicts):
     """
     Return a list of Py dicts
@@ -0,0 +1,149 @@
+"""
+Data sources for lists that serve rows on demand
+
+Instead of handing a whole Python list to vanilla.List
+(which converts every item up front), a data source builds
+a row only when the table asks for it, and keeps recently
+used rows in a small cache. UI cost then scales with the
+number of visible rows, not the number of items.
+
+No AppKit in here, so it can be tested on its own;
+comProofDrawerWindows.virtualList hooks it up to a table.
+"""
+
+from collections import OrderedDict
+
+class ListDataSource:
+    """
+    Serve rows from the sequence returned by getItems().
+
+    getItems is a callable, so the data source follows
+    whatever list is current (eg. the current preset's
+    groups) without being rebuilt.
+
+    makeRow(index, item) returns a row dict. Defaults to
+    {"name": item}.
+
+    Edits made through setValueAt() are kept in the cached
+    row (not in the item) until the row is invalidated.
+    """
+    def __init__(self, getItems, makeRow=None, cacheSize=256):
+        self.getItems = getItems
+        self.makeRow = makeRow or (lambda index, item: {"name": item})
+        self.cacheSize = cacheSize
+
+        self._rowCache = OrderedDict()
+
+    def numberOfRows(self):
+        return len(self.getItems())
+
+    def rowAt(self, index):
+        """
+        Return row dict for index (cached)
+        """
+        if index in self._rowCache:
+            self._rowCache.move_to_end(index)
+            return self._rowCache[index]
+
+        row = self.makeRow(index, self.getItems()[index])
+        self._rowCache[index] = row
+        if len(self._rowCache) > self.cacheSize:
+            self._rowCache.popitem(last=False)
+
+        return row
+
+    def valueAt(self, index, key):
+        return self.rowAt(index).get(key)
+
+    def setValueAt(self, index, key, value):
+        """
+        Store an edited value in the row
+        """
+        self.rowAt(index)[key] = value
+
+    def invalidate(self, indices=None):
+        """
+        Drop cached rows at indices, or all cached rows
+        """
+        if indices is None:
+            self._rowCache.clear()
+            return
+
+        for index in indices:
+            self._rowCache.pop(index, None)
+
+    def __len__(self):
+        return self.numberOfRows()
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.numberOfRows()
+        return self.rowAt(index)
+
+class GroupsDataSource(ListDataSource):
+    """
+    Serve ProofGroup rows with only the keys shown in
+    the table.
+
+    The "order" column (index + 1) isn't stored anywhere:
+    it's computed from the row's position when asked for,
+    so moving or removing a group doesn't touch every row.
+    Pass preset change info to groupsChanged() to drop only
+    the cached rows a change affects.
+    """
+    def __init__(self, getGroups, keys=("name", "typeSize", "leading", "print"),
+                 cacheSize=256):
+        self.keys = tuple(keys)
+        super().__init__(getGroups, self._makeGroupRow, cacheSize)
+
+    def valueAt(self, index, key):
+        if key == "order":
+            return index + 1
+        return super().valueAt(index, key)
+
+    def setValueAt(self, index, key, value):
+        """
+        Store an edited value in the row. Checkbox cells
+        hand back numbers, so "print" is made a bool again.
+        """
+        if key == "order":
+            return
+        elif key == "print":
+            value = bool(value)
+        super().setValueAt(index, key, value)
+
+    def groupsChanged(self, info):
+        """
+        Drop cached rows affected by a ProofPreset
+        change (see ProofPreset.addObserver())
+        """
+        action = info["action"]
+        # Row count right after the change (the preset
+        # may be further ahead by now)
+        rowCount = info["groupCount"]
+
+        if action == "editGroup":
+            self.invalidate([info["index"]])
+        elif action == "moveGroup":
+            start = min(info["currentIndex"], info["newIndex"])
+            end = max(info["currentIndex"], info["newIndex"])
+            self.invalidate(range(start, end + 1))
+        elif action == "addGroup":
+            self.invalidate(range(info["index"], rowCount))
+        elif action == "removeGroup":
+            # One row fewer: the old last row goes away too
+            self.invalidate(range(info["index"], rowCount + 1))
+        elif action == "editGroups":
+            self.invalidate(info["indices"])
+        elif action == "moveGroups":
+            indices = info["currentIndices"] + info["newIndices"]
+            self.invalidate(range(min(indices), max(indices) + 1))
+        elif action == "addGroups":
+            self.invalidate(range(info["indices"][0], rowCount))
+        elif action == "removeGroups":
+            self.invalidate(range(info["indices"][0], rowCount + len(info["indices"])))
+        else:
+            self.invalidate()
+
+    def _makeGroupRow(self, index, group):
+        return {key: group[key] for key in self.keys}
@@ -0,0 +1,43 @@
+"""
+Test applying Inspector edits to several selected groups
+"""
+
+from comProofDrawerUtils import helperFunctions as hf
+from proofPreset import ProofPreset
+import unittest
+
+class TestInspectorEdits(unittest.TestCase):
+    def setUp(self):
+        self.preset = ProofPreset("testPreset")
+        self.preset.addGroups([
+            {"name": "UC", "typeSize": 12.0, "leading": 14.0, "contents": ["ABC"]},
+            {"name": "lc", "typeSize": 18.0, "leading": 22.0, "contents": ["abc"]},
+            {"name": "numerals", "typeSize": 24.0, "leading": 30.0, "contents": ["123"]}
+        ])
+
+    def test_changedValues(self):
+        shownValues = {"name": "UC", "typeSize": "12.0", "contents": ["ABC"]}
+        self.assertEqual(hf.getChangedValues(shownValues, dict(shownValues)), {})
+        self.assertEqual(hf.getChangedValues(shownValues, {"name": "UC", "typeSize": "10",
+                                                           "contents": ["ABC"], "print": True}),
+                         {"typeSize": "10", "print": True})
+
+    def test_multipleSelection(self):
+        # Inspector opened for UC and numerals, showing UC:
+        # only the leading was changed
+        inspectedIndices = [0, 2]
+        shownValues = {"name": "UC", "typeSize": "12.0", "leading": "14.0",
+                       "contents": ["ABC"]}
+        editedValues = dict(shownValues, leading="40")
+
+        self.preset.editGroups(inspectedIndices, hf.getChangedValues(shownValues, editedValues))
+
+        self.assertEqual([group.leading for group in self.preset.groups], [40.0, 22.0, 40.0])
+        # Untouched fields keep each group's own values
+        self.assertEqual(self.preset.groupNames, ["UC", "lc", "numerals"])
+        self.assertEqual([group.typeSize for group in self.preset.groups], [12.0, 18.0, 24.0])
+        self.assertEqual(self.preset.groups[2].contents, ["123"])
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False, verbosity=1)
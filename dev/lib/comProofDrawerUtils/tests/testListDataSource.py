@@ -0,0 +1,123 @@
+"""
+Test list data sources
+"""
+
+from comProofDrawerUtils.listDataSource import ListDataSource, GroupsDataSource
+from proofPreset import ProofPreset
+import unittest
+
+class TestListDataSource(unittest.TestCase):
+    def setUp(self):
+        self.names = ["UC", "lc", "numerals"]
+        self.makeRowCalls = 0
+
+        def makeRow(index, item):
+            self.makeRowCalls += 1
+            return {"name": item}
+
+        self.dataSource = ListDataSource(lambda: self.names, makeRow, cacheSize=2)
+
+    def test_rowsOnDemand(self):
+        self.assertEqual(len(self.dataSource), 3)
+        self.assertEqual(self.makeRowCalls, 0)
+
+        self.assertEqual(self.dataSource.valueAt(1, "name"), "lc")
+        self.assertEqual(self.dataSource[-1], {"name": "numerals"})
+        self.assertEqual(self.makeRowCalls, 2)
+
+    def test_rowCache(self):
+        self.dataSource.rowAt(0)
+        self.dataSource.rowAt(0)
+        self.assertEqual(self.makeRowCalls, 1)
+
+        # Cache holds 2 rows: row 0 gets evicted
+        self.dataSource.rowAt(1)
+        self.dataSource.rowAt(2)
+        self.dataSource.rowAt(0)
+        self.assertEqual(self.makeRowCalls, 4)
+
+    def test_followsItemsAndInvalidate(self):
+        self.dataSource.rowAt(0)
+        self.names = ["symbols"]
+        self.assertEqual(len(self.dataSource), 1)
+
+        self.dataSource.invalidate([0])
+        self.assertEqual(self.dataSource.valueAt(0, "name"), "symbols")
+
+class TestGroupsDataSource(unittest.TestCase):
+    def setUp(self):
+        self.preset = ProofPreset("testPreset")
+        self.preset.addGroup({"name": "UC", "typeSize": 10,
+                              "contents": ["ABCDEFGHIJKLMNOPQRSTUVWXYZ"]})
+        self.preset.addGroup({"name": "lc", "print": True})
+        self.dataSource = GroupsDataSource(lambda: self.preset.groups)
+
+    def test_groupRows(self):
+        expected = {"name": "lc", "typeSize": "", "leading": "",
+                    "print": True}
+        self.assertEqual(self.dataSource.rowAt(1), expected)
+        self.assertEqual(self.dataSource.valueAt(1, "order"), 2)
+
+    def test_editedValuesStayInRow(self):
+        self.dataSource.setValueAt(0, "print", 1)
+        self.dataSource.setValueAt(0, "typeSize", "12")
+
+        self.assertIs(self.dataSource.valueAt(0, "print"), True)
+        self.assertEqual(self.dataSource.valueAt(0, "typeSize"), "12")
+        self.assertEqual(self.preset.groups[0].typeSize, 10)
+
+    def test_groupsChanged(self):
+        self.preset.addObserver(self.dataSource.groupsChanged)
+        self.preset.addGroup({"name": "numerals"})
+        for index in range(3):
+            self.dataSource.rowAt(index)
+
+        self.preset.editGroup(2, {"typeSize": 14})
+        self.assertEqual(set(self.dataSource._rowCache), {0, 1})
+        self.assertEqual(self.dataSource.valueAt(2, "typeSize"), 14)
+
+        self.preset.moveGroup(0, 1)
+        self.assertEqual(set(self.dataSource._rowCache), {2})
+        self.assertEqual(self.dataSource.valueAt(0, "name"), "lc")
+        self.assertEqual(self.dataSource.valueAt(1, "order"), 2)
+
+        self.preset.removeGroup(0)
+        self.assertEqual(set(self.dataSource._rowCache), set())
+        self.assertEqual([self.dataSource.valueAt(index, "name") for index in range(2)],
+                         ["UC", "numerals"])
+
+        self.preset.addGroup({"name": "symbols"})
+        self.assertEqual(set(self.dataSource._rowCache), {0, 1})
+        self.assertEqual(self.dataSource.valueAt(2, "name"), "symbols")
+    def test_groupsChangedBatches(self):
+        self.preset.addObserver(self.dataSource.groupsChanged)
+        self.preset.addGroups([{"name": name} for name in ("numerals", "symbols", "marks")])
+
+        def cacheRows():
+            for index in range(len(self.preset.groups)):
+                self.dataSource.rowAt(index)
+
+        cacheRows()
+        self.preset.editGroups([1, 3], {"typeSize": 14})
+        self.assertEqual(set(self.dataSource._rowCache), {0, 2, 4})
+
+        cacheRows()
+        self.preset.moveGroups([1, 2], 2)
+        self.assertEqual(set(self.dataSource._rowCache), {0, 4})
+        self.assertEqual([self.dataSource.valueAt(index, "name") for index in range(5)],
+                         ["UC", "symbols", "lc", "numerals", "marks"])
+
+        cacheRows()
+        self.preset.removeGroups([1, 3])
+        self.assertEqual(set(self.dataSource._rowCache), {0})
+        self.assertEqual([self.dataSource.valueAt(index, "name") for index in range(3)],
+                         ["UC", "lc", "marks"])
+
+        cacheRows()
+        self.preset.addGroups([{"name": "UC"}])
+        self.assertEqual(set(self.dataSource._rowCache), {0, 1, 2})
+        self.assertEqual(self.dataSource.valueAt(3, "name"), "UC-1")
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False, verbosity=1)
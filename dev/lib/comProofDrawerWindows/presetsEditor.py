@@ -205,7 +205,9 @@ class PresetsEditor:
         Set group contents to new contents
         """
         newContents = sender.get().split("\n")
-        self.selectedPreset.groups[self.selectedGroupIndex].contents = newContents
+        # Go through the preset so the change is journaled
+        self.selectedPreset.editGroup(self.selectedGroupIndex,
+                                      {"contents": newContents})
 
     def _resetGroupContents(self):
         """
@@ -0,0 +1,75 @@
+"""
+Preview window for ProofDrawer
+
+Shows one page at a time, rendered by a
+proofRender.preview.PreviewRenderer. The renderer keeps
+recently seen pages in its tile cache and renders the
+neighbouring pages in the background, so paging back and
+forth is instant.
+"""
+
+from AppKit import NSImage, NSData
+from vanilla import Window, ImageView, Button, TextBox, PopUpButton
+
+from proofRender.preview import PreviewRenderer
+
+class PreviewWindow:
+    def __init__(self, preset, glyphSource):
+        self.renderer = PreviewRenderer(preset, glyphSource, "png")
+        self.zoomLevels = [0.5, 1.0, 1.5, 2.0]
+        self.zoom = 1.0
+        self.pageIndex = 0
+
+        self.w = Window((640, 880), "Preview: %s" % preset.name,
+                        minSize=(320, 240))
+
+        self.w.page = ImageView((0, 0, -0, -40),
+                                horizontalAlignment="center",
+                                verticalAlignment="top",
+                                scale="proportional")
+
+        self.w.previousPage = Button((10, -30, 30, 20),
+                                     "<",
+                                     callback=self.previousPageCB)
+
+        self.w.nextPage = Button((45, -30, 30, 20),
+                                 ">",
+                                 callback=self.nextPageCB)
+
+        self.w.pageNumber = TextBox((85, -28, 120, 20), "")
+
+        self.w.zoom = PopUpButton((-90, -30, 80, 20),
+                                  ["%d%%" % (zoom * 100) for zoom in self.zoomLevels],
+                                  callback=self.zoomCB)
+        self.w.zoom.set(self.zoomLevels.index(self.zoom))
+
+        self.w.bind("close", self.closeWindowCB)
+        self._showPage()
+
+    def previousPageCB(self, sender):
+        if self.pageIndex > 0:
+            self.pageIndex -= 1
+            self._showPage()
+
+    def nextPageCB(self, sender):
+        if self.pageIndex < self.renderer.pageCount - 1:
+            self.pageIndex += 1
+            self._showPage()
+
+    def zoomCB(self, sender):
+        self.zoom = self.zoomLevels[sender.get()]
+        self._showPage()
+
+    def closeWindowCB(self, sender):
+        self.renderer.close()
+
+    def _showPage(self):
+        pageCount = self.renderer.pageCount
+        if not pageCount:
+            self.w.pageNumber.set("Nothing to print")
+            return
+
+        tile = self.renderer.getPage(self.pageIndex, self.zoom)
+        image = NSImage.alloc().initWithData_(NSData.dataWithBytes_length_(tile, len(tile)))
+        self.w.page.setImage(imageObject=image)
+        self.w.pageNumber.set("Page %d of %d" % (self.pageIndex + 1, pageCount))
@@ -12,7 +12,8 @@ to cancel.
 
 The inspector posts an event when user presses OK button
 (change is committed and data is passed back to ProofDrawer)
-and when the window is closed (to enable ProofDrawer UI)
+and when the window is closed (to enable ProofDrawer UI).
+Only fields the user changed are passed back.
 """
 
 from vanilla import FloatingWindow, TextBox, EditText,\
@@ -26,7 +27,8 @@ class ProofGroupInspector:
     def __init__(self, proofGroup):
         """
         Initialize inspector with proofGroup data.
-        proofGroup is a dictionary passed in by ProofDrawer().
+        proofGroup is a dictionary (or a read-only
+        views.GroupView) passed in by ProofDrawer().
         """
         self.proofGroup = proofGroup
         self.editedProofGroup = {}
@@ -78,6 +80,7 @@ class ProofGroupInspector:
         self.w.contentsEdit = TextEditor((leftEditText, row, -10, 150),
                                          "\n".join(self.proofGroup["contents"]))
         self.w.contentsEdit.getNSTextView().setFont_(monoFont)
+        self.w.contentsEdit.getNSTextView().setAllowsUndo_(True)
 
         row += 160
         self.w.cancelButton = Button((leftEditText, row, 138, 20),
@@ -92,6 +95,9 @@ class ProofGroupInspector:
         self.w.setDefaultButton(self.w.okButton)
         self.w.bind("close", self._postCloseEvent)
 
+        # Compared on OK, so untouched fields aren't passed back
+        self.shownProofGroup = self._getFieldValues()
+
     def _postCloseEvent(self, sender):
         postEvent("com.InspectorClosed")
 
@@ -112,16 +118,21 @@ class ProofGroupInspector:
         except ValueError:
             sender.set(allButLast)
 
+    def _getFieldValues(self):
+        return {
+            "name": self.w.groupNameEdit.get().strip(),
+            "typeSize": self.w.typeSizeEdit.get(),
+            "leading": self.w.leadingEdit.get(),
+            "contents": hf.makeCleanListFromStr(self.w.contentsEdit.get())
+        }
+
     def okCB(self, sender):
         """
-        Get everything from fields, save in self.editedProofGroup dict,
+        Save fields the user changed in self.editedProofGroup dict,
         post event, pass the edited group to observer, and close window
         """
-        self.editedProofGroup["name"] = self.w.groupNameEdit.get().strip()
-        self.editedProofGroup["typeSize"] = self.w.typeSizeEdit.get()
-        self.editedProofGroup["leading"] = self.w.leadingEdit.get()
-        self.editedProofGroup["print"] = self.proofGroup["print"] # just pass this back for now
-        self.editedProofGroup["contents"] = hf.makeCleanListFromStr(self.w.contentsEdit.get())
+        self.editedProofGroup = hf.getChangedValues(self.shownProofGroup,
+                                                    self._getFieldValues())
 
         postEvent("com.ProofGroupEdited", editedProofGroup=self.editedProofGroup)
         self.w.close()
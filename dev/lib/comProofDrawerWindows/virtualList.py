@@ -0,0 +1,131 @@
+"""
+vanilla List backed by a ListDataSource
+
+vanilla.List keeps every item in an NSArrayController.
+VirtualList drops those bindings and makes the table ask a
+comProofDrawerUtils.listDataSource object for rows instead,
+so only visible rows are ever built.
+"""
+
+from AppKit import NSObject, NSMutableIndexSet, NSNotFound
+from vanilla import List
+
+class _TableDataSourceBridge(NSObject):
+    """
+    NSTableView data source that forwards to
+    a Python ListDataSource
+    """
+    def initWithList_(self, virtualList):
+        self = self.init()
+        self.virtualList = virtualList
+        return self
+
+    def numberOfRowsInTableView_(self, tableView):
+        return self.virtualList.dataSource.numberOfRows()
+
+    def tableView_objectValueForTableColumn_row_(self, tableView, column, row):
+        return self.virtualList.dataSource.valueAt(row, column.identifier())
+
+    def tableView_setObjectValue_forTableColumn_row_(self, tableView, value, column, row):
+        self.virtualList.dataSource.setValueAt(row, column.identifier(), value)
+        self.virtualList._edited(row)
+
+class VirtualList(List):
+    """
+    A vanilla List that serves rows from dataSource.
+
+    Supports the parts of the List API ProofDrawer uses:
+    len(), list[index], getSelection(), setSelection(),
+    getEditedIndex(), enable(). Call reload() after the underlying items change,
+    or redraw() if the data source already dropped stale rows.
+    """
+    def __init__(self, posSize, dataSource, columnDescriptions,
+                 editCallback=None, **kwargs):
+        self.dataSource = dataSource
+        self._virtualEditCallback = editCallback
+        self._editedIndex = None
+
+        super().__init__(posSize, [], columnDescriptions=columnDescriptions,
+                         **kwargs)
+
+        # Stop the array controller from feeding the table
+        tableView = self.getNSTableView()
+        for column in tableView.tableColumns():
+            column.unbind_("value")
+        tableView.unbind_("content")
+        tableView.unbind_("selectionIndexes")
+        tableView.unbind_("sortDescriptors")
+
+        self._bridge = _TableDataSourceBridge.alloc().initWithList_(self)
+        tableView.setDataSource_(self._bridge)
+        tableView.reloadData()
+
+    def reload(self, indices=None):
+        """
+        Drop cached rows (all of them, or only indices)
+        and redraw table
+        """
+        self.dataSource.invalidate(indices)
+        self.redraw()
+
+    def redraw(self):
+        """
+        Redraw table, rebuilding only rows that
+        aren't cached anymore
+        """
+        self.getNSTableView().reloadData()
+
+    def set(self, items=None):
+        """
+        Rows come from the data source, so items are
+        ignored: just reload everything
+        """
+        self.reload()
+
+    def get(self):
+        return [self.dataSource.rowAt(index)
+                for index in range(self.dataSource.numberOfRows())]
+
+    def __len__(self):
+        return self.dataSource.numberOfRows()
+
+    def __getitem__(self, index):
+        return self.dataSource[index]
+
+    def __iter__(self):
+        for index in range(self.dataSource.numberOfRows()):
+            yield self.dataSource.rowAt(index)
+
+    def getSelection(self):
+        selectedIndexes = self.getNSTableView().selectedRowIndexes()
+        selection = []
+        index = selectedIndexes.firstIndex()
+        while index != NSNotFound:
+            selection.append(index)
+            index = selectedIndexes.indexGreaterThanIndex_(index)
+        return selection
+
+    def setSelection(self, selection):
+        tableView = self.getNSTableView()
+        rowCount = self.dataSource.numberOfRows()
+
+        indexSet = NSMutableIndexSet.indexSet()
+        for index in selection:
+            if 0 <= index < rowCount:
+                indexSet.addIndex_(index)
+
+        tableView.selectRowIndexes_byExtendingSelection_(indexSet, False)
+        if indexSet.count():
+            tableView.scrollRowToVisible_(indexSet.firstIndex())
+
+    def getEditedIndex(self):
+        """
+        Return index of the last edited row (with multiple
+        selection, it isn't always the first selected one)
+        """
+        return self._editedIndex
+
+    def _edited(self, index):
+        self._editedIndex = index
+        if self._virtualEditCallback is not None:
+            self._virtualEditCallback(self)
@@ -3,36 +3,101 @@ Main window of Proof Drawer
 """
 
 import os
+from PyObjCTools.AppHelper import callAfter
 from mojo.events import addObserver, removeObserver
+from mojo.roboFont import CurrentFont
 from vanilla import Window, TextBox, PopUpButton, ImageButton, Button,\
-                    List, CheckBoxListCell, HorizontalLine
+                    CheckBoxListCell, HorizontalLine, SearchBox
 
 from comProofDrawerUtils.readWritePreset import readJSONpreset, writeJSONpreset
 from comProofDrawerUtils import helperFunctions as hf
+from comProofDrawerUtils.listDataSource import ListDataSource, GroupsDataSource
 from proofPreset import ProofPreset
+from proofPreset.editJournal import EditJournal
+from proofPreset.editLog import EditLog, recoverPreset
+from proofPreset.searchIndex import GroupSearchIndex
+from proofPreset.asyncLoading import PresetLoader, loadPresetFile
+from proofPreset.presetWatcher import PresetWatcher, getWatchedDirs
 from comProofDrawerWindows.presetsEditor import PresetsEditor
 from comProofDrawerWindows.proofGroupInspector import ProofGroupInspector
+from comProofDrawerWindows.virtualList import VirtualList
+from comProofDrawerWindows.previewWindow import PreviewWindow
+from proofRender.glyphSource import FontGlyphSource
 
 class ProofDrawer:
-    def __init__(self, presetsList):
+    def __init__(self, presetsList=None, presetPaths=None, watchInterval=1.0,
+                 autosaveDir=None):
+        """
+        presetsList is a list of ProofPreset() objects.
+
+        Or pass presetPaths (preset file paths) instead:
+        the window opens right away with placeholder presets,
+        which are filled in as the files are loaded. The
+        presets' directories are then watched (every
+        watchInterval seconds) and changed files reloaded.
+
+        With an autosaveDir, every edit is logged there
+        (see proofPreset.editLog), and edits that weren't
+        saved (eg. after a crash) are recovered on launch.
+        """
         self.fonts = ["Font 1", "Font 2"]
-        self.presetsList = presetsList
+        self.presetLoader = None
+        self.presetWatchers = []
+        self.autosaveDir = autosaveDir
+        self._windowClosed = False
+        # Presets with recovered edits not saved to their file yet
+        self._recoveredPresets = set()
+
+        if presetPaths:
+            # Absolute, like the paths watchers report
+            self.presetPaths = [os.path.abspath(path) for path in presetPaths]
+            self.presetsList = [self._makePlaceholderPreset(path)
+                                for path in self.presetPaths]
+        else:
+            self.presetPaths = [None] * len(presetsList)
+            self.presetsList = [self._recoverPreset(None, preset) for preset in presetsList]
 
         self.currentPreset = self.presetsList[0]
         self.presetNamesList = self._getPresetNames()
 
+        # One undo / redo journal per preset
+        self.journals = [EditJournal(preset) for preset in self.presetsList]
+        self.currentJournal = self.journals[0]
+        # Placeholders aren't logged: that would overwrite
+        # their autosave before it's recovered
+        self.editLogs = [None if presetPaths else self._startEditLog(index)
+                         for index in range(len(self.presetsList))]
+
+        # Library-wide index, used to filter additionalGroupNames
+        self.searchIndex = GroupSearchIndex(self.presetsList)
+        self.additionalGroupNames = self.currentPreset.uniqueGroupNames
+
         # These 3 might be up for deletion
         self.proofGroupInspector = None
         self.editedGroupIndex = None
+        # Groups the inspector edits (the selection when it opened)
+        self.inspectedGroupIndices = []
         self.listHasBeenEdited = False # A flag for later... see closeWindowCB()
 
         self._buildUI()
+        self.currentPreset.addObserver(self._currentPresetChanged)
         self._refreshProofGroups()
+        self._refreshPrintEstimate()
 
         addObserver(self, "_inspectorClosed", "com.InspectorClosed")
         addObserver(self, "editProofGroupCB", "com.ProofGroupEdited")
         self.w.bind("close", self.closeWindowCB)
 
+        if presetPaths:
+            self.presetLoader = PresetLoader(self.presetPaths,
+                                             self._presetLoadedInBackground)
+            self.presetLoader.start()
+
+            for presetDir in getWatchedDirs(self.presetPaths):
+                watcher = PresetWatcher(presetDir, self._presetFilesChanged,
+                                        interval=watchInterval)
+                self.presetWatchers.append(watcher.start())
+
     def _buildUI(self):
         editPresetsImgPath = os.path.join(currentFileDir,\
                                           "..", "resources",\
@@ -106,15 +171,24 @@ class ProofDrawer:
         self.w.line1 = HorizontalLine((left, row, -10, 1))
 
         row += 15
-        self.w.proofGroups = List((left + 3, row, listWidth, 255),
-                                  rowHeight=18,
-                                  items=[],
-                                  columnDescriptions=listForList,
-                                  allowsSorting=False,
-                                  allowsMultipleSelection=False,
-                                  editCallback=self.editProofGroupCB)
+        # Rows are served on demand from the current preset
+        proofGroupsSource = GroupsDataSource(lambda: self.currentPreset.groups)
+        self.w.proofGroups = VirtualList((left + 3, row, listWidth, 255),
+                                         proofGroupsSource,
+                                         columnDescriptions=listForList,
+                                         rowHeight=18,
+                                         allowsSorting=False,
+                                         allowsMultipleSelection=True,
+                                         editCallback=self.editProofGroupCB)
 
         buttonGroup1Left = popUpLeft + presetsPopUpWidth + 3
+        self.w.undoButton = Button((buttonGroup1Left, row, 30, 20),
+                                   "↶",
+                                   callback=self.undoCB)
+        self.w.redoButton = Button((buttonGroup1Left, row + 25, 30, 20),
+                                   "↷",
+                                   callback=self.redoCB)
+
         buttonGroup1Top = row + 58
         self.w.inspectGroup = Button((buttonGroup1Left, buttonGroup1Top, 30, 20),
                                      "\u24D8",
@@ -134,19 +208,30 @@ class ProofDrawer:
                                     "-",
                                     callback=self.removeGroupCB)
 
+        self.w.printEstimate = TextBox((left + 3, row + 257, listWidth, 17),
+                                       "",
+                                       sizeStyle="small")
+
         row += 275
         self.w.line2 = HorizontalLine((left, row, -10, 1))
 
         row += 10
-        self.w.additionalGroupNamesText = TextBox((left, row, -10, 20),
+        self.w.additionalGroupNamesText = TextBox((left, row, 160, 20),
                                                   "Add more proof groups:")
 
+        self.w.groupNamesSearch = SearchBox((left + 165, row - 2, listWidth - 162, 22),
+                                            callback=self.filterGroupNamesCB)
+
         row += 25
-        self.w.additionalGroupNames = List((left + 3, row, listWidth, 150),
-                                           rowHeight=17,
-                                           items=self.currentPreset.uniqueGroupNames,
-                                           allowsSorting=False,
-                                           allowsMultipleSelection=True)
+        groupNamesSource = ListDataSource(lambda: self.additionalGroupNames)
+        self.w.additionalGroupNames = VirtualList((left + 3, row, listWidth, 150),
+                                                  groupNamesSource,
+                                                  columnDescriptions=[{"title": "Group name",
+                                                                       "key": "name"}],
+                                                  showColumnTitles=False,
+                                                  rowHeight=17,
+                                                  allowsSorting=False,
+                                                  allowsMultipleSelection=True)
 
         self.w.addGroup = Button((buttonGroup1Left, row + 60, 30, 20),
                                  "+",
@@ -155,7 +240,7 @@ class ProofDrawer:
         buttonWidth = 100
         self.w.previewButton = Button((width/2 - buttonWidth - 10, -37, buttonWidth, 20),
                                       "Preview",
-                                      callback=self.testerCB)
+                                      callback=self.previewCB)
 
         self.w.printButton = Button((width/2 + 10, -37, buttonWidth, 20),
                                     "Print",
@@ -171,10 +256,13 @@ class ProofDrawer:
         presetsEditor.w.open()
 
     def setCurrentPresetCB(self, sender):
-        selectedPresetIndex = sender.get()
-        self.currentPreset = self.presetsList[selectedPresetIndex]
-        self._refreshProofGroups()
-        self.w.additionalGroupNames.set(self.currentPreset.uniqueGroupNames)
+        self._setCurrentPreset(sender.get())
+
+    def filterGroupNamesCB(self, sender):
+        """
+        Filter additionalGroupNames as user types
+        """
+        self._refreshAdditionalGroupNames()
 
     def inspectGroupCB(self, sender):
         """
@@ -184,8 +272,9 @@ class ProofDrawer:
         if not self.w.proofGroups.getSelection():
             return
 
-        editGroupIndex = self.w.proofGroups.getSelection()[0]
-        selectedGroup = self.currentPreset.groups[editGroupIndex]
+        # Read-only: edits come back through editProofGroupCB()
+        self.inspectedGroupIndices = list(self.w.proofGroups.getSelection())
+        selectedGroup = self.currentPreset.view.groups[self.inspectedGroupIndices[0]]
 
         self.proofGroupInspector = ProofGroupInspector(selectedGroup)
         self.proofGroupInspector.w.open()
@@ -198,8 +287,12 @@ class ProofDrawer:
         Edit selected proof group and refresh proof groups list.
         senderOrInfo accepts callback sender or info from PostEvent
 
-        ProofPreset.editGroup() is called on a field-by-field basis
+        ProofPreset.editGroups() is called on a field-by-field basis
         so we're not trying to edit "name" when only editing "leading"
+
+        Fields changed in the Inspector are set on every
+        group it was opened for (other fields are left
+        alone); a List edit only changes its row.
         """
         # Don't do anything if proof groups aren't
         # ready to be edited or if nothing is selected
@@ -207,67 +300,73 @@ class ProofDrawer:
         not self.w.proofGroups.getSelection():
             return
 
-        selectedIndex = self.w.proofGroups.getSelection()[0]
-        currentGroup = self.currentPreset.groups[selectedIndex]
-
-        # Generate new dict to pass into ProofPreset.editGroup()
-        propertiesToUpdate = {}
-        for key, currentValue in currentGroup.items():
-            # "info" coming back from Inspector
-            if isinstance(senderOrInfo, dict) and senderOrInfo["editedProofGroup"]:
-                newValue = senderOrInfo["editedProofGroup"][key]
-            # "sender" coming back from List
-            else:
-                newValue = senderOrInfo[selectedIndex][key]
-
-            if newValue != currentValue:
-                propertiesToUpdate[key] = newValue
+        selection = self.w.proofGroups.getSelection()
+        fromInspector = isinstance(senderOrInfo, dict)
+        if fromInspector:
+            # "info" coming back from Inspector: only changed fields
+            editedIndices = self.inspectedGroupIndices
+            propertiesToUpdate = dict(senderOrInfo["editedProofGroup"])
+        else:
+            # "sender" coming back from List (rows only have shown keys)
+            editedIndices = [senderOrInfo.getEditedIndex()]
+            currentGroup = self.currentPreset.groups[editedIndices[0]]
+            editedRow = senderOrInfo[editedIndices[0]]
+            propertiesToUpdate = hf.getChangedValues(currentGroup,
+                                                     {key: editedRow[key] for key in currentGroup
+                                                      if key in editedRow})
+        if not editedIndices or not propertiesToUpdate:
+            return
 
         try:
-            self.currentPreset.editGroup(selectedIndex, propertiesToUpdate)
+            self.currentPreset.editGroups(editedIndices, propertiesToUpdate)
         except Exception as e:
             # Error handling here (some sort of warning window)
             print(e)
+            # Drop rejected values typed into the row
+            self.w.proofGroups.dataSource.invalidate(editedIndices)
 
-        self._refreshProofGroups(selectedIndex)
+        self._refreshProofGroups(selection)
 
     def moveGroupCB(self, sender):
         """
-        Move selected group and refresh proof groups list.
+        Move selected groups and refresh proof groups list.
 
         Both up and down buttons call this method because they
-        both call ProofPreset.moveGroup(currentIndex, new Index)
+        both call ProofPreset.moveGroups(selection, newIndex).
+        Selected groups are moved together, one row up or down.
         """
         if not self.w.proofGroups or not self.w.proofGroups.getSelection():
             return
 
         direction = sender.getTitle()
-        currentIndex = self.w.proofGroups.getSelection()[0]
+        selection = self.w.proofGroups.getSelection()
 
         if direction == "↑":
             # First object can't move up
-            if currentIndex == 0:
+            if selection[0] == 0:
                 return
-            newIndex = currentIndex - 1
+            newIndex = selection[0] - 1
         else:
             # Last object can't move down
-            if currentIndex == len(self.w.proofGroups) - 1:
+            if selection[-1] == len(self.w.proofGroups) - 1:
                 return
-            newIndex = currentIndex + 1
+            newIndex = selection[-1] + 2 - len(selection)
 
-        self.currentPreset.moveGroup(currentIndex, newIndex)
-        self._refreshProofGroups(newSelection=newIndex)
+        self.currentPreset.moveGroups(selection, newIndex)
+        self._refreshProofGroups(newSelection=range(newIndex, newIndex + len(selection)))
 
     def removeGroupCB(self, sender):
         """
-        Delete selected group and refresh proof groups list
+        Delete selected groups and refresh proof groups list
         """
         if not self.w.proofGroups or not self.w.proofGroups.getSelection():
             return
-        groupToDeleteIndex = self.w.proofGroups.getSelection()[0]
+        groupsToDeleteIndices = self.w.proofGroups.getSelection()
 
-        self.currentPreset.removeGroup(groupToDeleteIndex)
-        self._refreshProofGroups(newSelection=groupToDeleteIndex) # This will select next group
+        self.currentPreset.removeGroups(groupsToDeleteIndices)
+        # This will select next group
+        newSelection = min(groupsToDeleteIndices[0], max(len(self.currentPreset.groups) - 1, 0))
+        self._refreshProofGroups(newSelection=newSelection)
 
     def addProofGroupsCB(self, sender):
         """
@@ -277,28 +376,81 @@ class ProofDrawer:
         if not newGroupNamesIndices:
             return
 
-        for index in newGroupNamesIndices:
-            groupToAdd = {"name": self.w.additionalGroupNames[index]}
-            self.currentPreset.addGroup(groupToAdd)
+        # One batch: names are checked once, and the
+        # list only refreshes rows that were added
+        firstNewIndex = len(self.currentPreset.groups)
+        self.currentPreset.addGroups([{"name": self.additionalGroupNames[index]}
+                                      for index in newGroupNamesIndices])
 
-        self._refreshProofGroups()
+        self._refreshProofGroups(range(firstNewIndex, len(self.currentPreset.groups)))
+
+    def undoCB(self, sender):
+        """
+        Undo last change to current preset
+        """
+        if not self.currentJournal.canUndo:
+            return
+        self.currentJournal.undo()
+        self._refreshProofGroups(self._selectionAfterUndoRedo())
+
+    def redoCB(self, sender):
+        """
+        Redo last undone change to current preset
+        """
+        if not self.currentJournal.canRedo:
+            return
+        self.currentJournal.redo()
+        self._refreshProofGroups(self._selectionAfterUndoRedo())
 
     def closeWindowCB(self, sender):
         """
-        On close, save the state of the current preset.
+        On close, save edited presets to their files.
+        Presets without a file keep their autosave,
+        recovered on next launch.
         """
+        self._windowClosed = True
+        if self.presetLoader is not None:
+            self.presetLoader.cancel()
+        for watcher in self.presetWatchers:
+            watcher.stop()
+
         # if self.proofGroupInspector:
         #     self.proofGroupInspector.w.close()
 
-        # listToWrite = hf.convertToListOfPyDicts(self.w.proofGroups)
-
-        # newPresetPath = os.path.join(currentFilePath, "..", "resources",\
-        #                              "presets", "newTestPreset.json")
-        # writeJSONpreset(newPresetPath, listToWrite)
+        for preset, presetPath, editLog in zip(self.presetsList, self.presetPaths, self.editLogs):
+            if editLog is None:
+                continue
+            if presetPath is None:
+                editLog.close()
+                continue
+            if self._hasUnsavedEdits(preset, editLog):
+                # Rows are never the source of truth: write the preset itself
+                preset.exportToJSON(presetPath)
+            editLog.close(removeFiles=True)
+
+        self.currentPreset.removeObserver(self._currentPresetChanged)
+        for journal in self.journals:
+            journal.detach()
+        for preset in self.presetsList:
+            self.searchIndex.removePreset(preset)
 
         removeObserver(self, "com.InspectorClosed")
         removeObserver(self, "com.ProofGroupEdited")
 
+    def previewCB(self, sender):
+        """
+        Open a preview of the current preset,
+        drawn with the current font
+        """
+        font = CurrentFont()
+        if font is None:
+            # Error handling here (some sort of warning window)
+            print("Open a font to preview proofs")
+            return
+
+        previewWindow = PreviewWindow(self.currentPreset.view, FontGlyphSource(font))
+        previewWindow.w.open()
+
     def testerCB(self, sender):
         """
         Use this for fake CB
@@ -311,11 +463,234 @@ class ProofDrawer:
         """
         return [preset.name for preset in self.presetsList]
 
+    def _makePlaceholderPreset(self, presetPath):
+        """
+        Return an empty preset to show while presetPath loads
+        """
+        fileName = os.path.splitext(os.path.basename(presetPath))[0]
+        return ProofPreset("%s (loading…)" % fileName)
+
+    def _getAutosavePath(self, presetPath, preset):
+        """
+        Return autosave snapshot path of preset (read from
+        presetPath, or None), or None without an autosaveDir.
+        Not a .json, so PresetWatchers of the same
+        directory ignore it.
+        """
+        if self.autosaveDir is None:
+            return None
+        if presetPath is not None:
+            fileName = os.path.splitext(os.path.basename(presetPath))[0]
+        else:
+            fileName = preset.name
+        return os.path.join(self.autosaveDir, fileName + ".autosave")
+
+    def _recoverPreset(self, presetPath, preset):
+        """
+        Return preset as it was autosaved, if it has
+        edits that weren't saved, or else preset
+        """
+        autosavePath = self._getAutosavePath(presetPath, preset)
+        if autosavePath is None:
+            return preset
+
+        try:
+            recoveredPreset = recoverPreset(autosavePath)
+        except Exception as error:
+            # Error handling here (some sort of warning window)
+            print(error)
+            return preset
+        if recoveredPreset is None:
+            return preset
+
+        self._recoveredPresets.add(id(recoveredPreset))
+        return recoveredPreset
+
+    def _hasUnsavedEdits(self, preset, editLog):
+        """
+        Return True if preset has edits that weren't
+        written to its file (logged or recovered)
+        """
+        if editLog is None:
+            return False
+        return bool(editLog.changeCount) or id(preset) in self._recoveredPresets
+
+    def _startEditLog(self, index):
+        """
+        Return EditLog of preset at index, or None
+        """
+        preset = self.presetsList[index]
+        autosavePath = self._getAutosavePath(self.presetPaths[index], preset)
+        if autosavePath is None:
+            return None
+        return EditLog(preset, autosavePath)
+
+    def _presetLoadedInBackground(self, loadedCount, totalCount, index, result):
+        """
+        PresetLoader progress callback (loader thread):
+        hand result over to the main thread
+        """
+        callAfter(self._presetLoaded, index, result)
+
+    def _presetLoaded(self, index, result):
+        """
+        Replace placeholder at index with loaded preset
+        """
+        if self._windowClosed:
+            return
+
+        if isinstance(result, Exception):
+            # Error handling here (some sort of warning window)
+            print(result)
+            fileName = os.path.splitext(os.path.basename(self.presetPaths[index]))[0]
+            self.presetsList[index].name = "%s (failed to load)" % fileName
+            self._refreshPresetNames()
+            return
+
+        self._replacePreset(index, self._recoverPreset(self.presetPaths[index], result))
+
+    def _presetFilesChanged(self, changedPaths, removedPaths):
+        """
+        PresetWatcher callback (watcher thread): re-import
+        only the changed files here, then update the UI
+        on the main thread
+        """
+        loadedPresets = []
+        for presetPath in changedPaths:
+            try:
+                loadedPresets.append((presetPath, loadPresetFile(presetPath)))
+            except Exception as error:
+                # Probably caught mid-write; next change will retry
+                print(error)
+
+        callAfter(self._presetsReloaded, loadedPresets, removedPaths)
+
+    def _presetsReloaded(self, loadedPresets, removedPaths):
+        """
+        Push reloaded presets into presetsList and the
+        presets pop-up. New files are added at the end;
+        removed files are dropped (unless they're in use).
+        Presets with unsaved edits are kept as they are,
+        and written back on close.
+        """
+        if self._windowClosed:
+            return
+
+        for presetPath, newPreset in loadedPresets:
+            if presetPath in self.presetPaths:
+                index = self.presetPaths.index(presetPath)
+                if self._hasUnsavedEdits(self.presetsList[index], self.editLogs[index]):
+                    # Error handling here (some sort of warning window)
+                    print("%s changed on disk; keeping unsaved edits" % presetPath)
+                    continue
+                self._replacePreset(index, newPreset)
+            else:
+                self.presetPaths.append(presetPath)
+                self.presetsList.append(newPreset)
+                self.journals.append(EditJournal(newPreset))
+                self.editLogs.append(self._startEditLog(len(self.presetsList) - 1))
+                self.searchIndex.addPreset(newPreset)
+
+        for presetPath in removedPaths:
+            if presetPath not in self.presetPaths:
+                continue
+            index = self.presetPaths.index(presetPath)
+            if self.presetsList[index] is self.currentPreset:
+                continue
+            if self._hasUnsavedEdits(self.presetsList[index], self.editLogs[index]):
+                continue
+
+            self.journals.pop(index).detach()
+            editLog = self.editLogs.pop(index)
+            if editLog is not None:
+                editLog.close(removeFiles=True)
+            self.searchIndex.removePreset(self.presetsList.pop(index))
+            self.presetPaths.pop(index)
+
+        self._refreshPresetNames()
+
+    def _replacePreset(self, index, newPreset):
+        """
+        Swap preset at index for newPreset, without
+        rebuilding the rest of the UI. Autosave files
+        of the old preset are only removed if it has
+        no unsaved edits.
+        """
+        oldPreset = self.presetsList[index]
+
+        self.journals[index].detach()
+        editLog = self.editLogs[index]
+        if editLog is not None:
+            editLog.close(removeFiles=not self._hasUnsavedEdits(oldPreset, editLog))
+        self.searchIndex.removePreset(oldPreset)
+
+        self.presetsList[index] = newPreset
+        self.journals[index] = EditJournal(newPreset)
+        self.editLogs[index] = self._startEditLog(index)
+        self.searchIndex.addPreset(newPreset)
+
+        if oldPreset is self.currentPreset:
+            self._setCurrentPreset(index)
+        self._refreshPresetNames()
+
+    def _setCurrentPreset(self, index):
+        """
+        Make preset at index current and show its groups.
+        The proof groups list follows its changes, so only
+        affected rows are rebuilt.
+        """
+        self.currentPreset.removeObserver(self._currentPresetChanged)
+
+        self.currentPreset = self.presetsList[index]
+        self.currentJournal = self.journals[index]
+        self.currentPreset.addObserver(self._currentPresetChanged)
+
+        self.w.proofGroups.reload()
+        self._refreshProofGroups()
+        self._refreshAdditionalGroupNames()
+        self._refreshPrintEstimate()
+
+    def _currentPresetChanged(self, info):
+        """
+        Preset observer: drop cached rows the change touched,
+        and refresh additional group names if names changed
+        """
+        self.w.proofGroups.dataSource.groupsChanged(info)
+
+        action = info["action"]
+        if action == "editGroup":
+            renamed = "name" in info["newValues"]
+        elif action == "editGroups":
+            renamed = any("name" in newValues for newValues in info["newValues"])
+        else:
+            renamed = action not in ("moveGroup", "moveGroups")
+
+        # uniqueGroupNames is kept up to date by the
+        # preset, so this doesn't rescan groups
+        if renamed:
+            self._refreshAdditionalGroupNames()
+
+        # So is the print index (eg. after toggling
+        # a print checkbox)
+        if action not in ("moveGroup", "moveGroups"):
+            self._refreshPrintEstimate()
+
+    def _refreshPresetNames(self):
+        """
+        Update presets pop-up, keeping selection
+        on the current preset
+        """
+        self.presetNamesList = self._getPresetNames()
+        self.w.presetsList.setItems(self.presetNamesList)
+        self.w.presetsList.set(self.presetsList.index(self.currentPreset))
+
     def _uiEnabled(self, onOff=True):
         """
         A master switch for all editable UI elements
         """
         self.w.proofGroups.enable(onOff)
+        self.w.undoButton.enable(onOff)
+        self.w.redoButton.enable(onOff)
         self.w.fontsList.enable(onOff)
         self.w.presetsList.enable(onOff)
         self.w.editPresets.enable(onOff)
@@ -324,6 +699,7 @@ class ProofDrawer:
         self.w.moveGroupUP.enable(onOff)
         self.w.moveGroupDN.enable(onOff)
         self.w.removeGroup.enable(onOff)
+        self.w.groupNamesSearch.enable(onOff)
         self.w.additionalGroupNames.enable(onOff)
         self.w.addGroup.enable(onOff)
 
@@ -334,42 +710,67 @@ class ProofDrawer:
         """
         self._uiEnabled(True)
 
+    def _selectionAfterUndoRedo(self):
+        """
+        Keep current selection, unless the list got shorter
+        """
+        selection = self.w.proofGroups.getSelection()
+        if not selection:
+            return 0
+        return min(selection[0], max(len(self.currentPreset.groups) - 1, 0))
+
+    def _refreshAdditionalGroupNames(self):
+        """
+        Show current preset's unique group names
+        that match the search box
+        """
+        query = self.w.groupNamesSearch.get().strip()
+        self.additionalGroupNames = self.searchIndex.filterNames(self.currentPreset.uniqueGroupNames,
+                                                                 query)
+        self.w.additionalGroupNames.reload()
+
+    def _refreshPrintEstimate(self):
+        """
+        Show how many groups will be printed, and
+        on about how many pages
+        """
+        printIndex = self.currentPreset.printIndex
+        self.w.printEstimate.set("%d of %d groups to print, about %d pages"
+                                 % (printIndex.count, len(self.currentPreset.groups),
+                                    printIndex.estimatePageCount()))
+
     def _refreshProofGroups(self, newSelection=0):
         """
-        Refresh the proof groups list, set order numbers,
-        and set selection.
+        Refresh the proof groups list and set selection.
 
-        newSelection defaults to first index in list.
+        newSelection (an index or a list of indices)
+        defaults to first index in list.
         """
         # Set flag so editProofGroupCB() isn't
-        # called when set proofGroups contents &
-        # set order numbers
+        # called when proofGroups contents are reset
         self._proofReadyToEdit = False
 
-        self.w.proofGroups.set(self.currentPreset.groups)
-
-        newOrder = 1
-        for item in self.w.proofGroups:
-            item["order"] = newOrder
-            newOrder += 1
+        # Changed rows were already dropped by
+        # _currentPresetChanged(): just redraw
+        self.w.proofGroups.redraw()
 
         self._proofReadyToEdit = True
-        self.w.proofGroups.setSelection([newSelection])
+        if isinstance(newSelection, int):
+            newSelection = [newSelection]
+        self.w.proofGroups.setSelection(newSelection)
 
 
 if __name__ == "__main__":
     currentFileDir = os.path.dirname(__file__)
     presetsDir = os.path.join(currentFileDir, "..", "resources", "presets")
 
-    presetsToUse = []
-    for fileName in os.listdir(presetsDir):
+    presetPaths = []
+    for fileName in sorted(os.listdir(presetsDir)):
         ext = os.path.splitext(fileName)[1]
         if ext == ".json":
-            jsonPath = os.path.join(presetsDir, fileName)
-            newPreset = ProofPreset()
-            newPreset.importFromJSON(jsonPath)
-            presetsToUse.append(newPreset)
+            presetPaths.append(os.path.join(presetsDir, fileName))
 
-    proofDrawer = ProofDrawer(presetsToUse)
+    autosaveDir = os.path.join(presetsDir, "autosave")
+    proofDrawer = ProofDrawer(presetPaths=presetPaths, autosaveDir=autosaveDir)
     proofDrawer.w.open()
     proofDrawer.w.center()
@@ -3,11 +3,46 @@ Proof preset-related stuff in here
 """
 
 import copy
+import functools
+import itertools
 import json
 import os.path
+import threading
+import weakref
+from collections import Counter, deque
 
 from proofPreset import utils
+from proofPreset import validation
+from proofPreset.columns import GroupColumns
 from proofPreset.errors import ProofPresetError
+from proofPreset.groupSequence import GroupSequence
+from proofPreset.printIndex import PrintIndex
+from proofPreset.views import PresetSnapshot, PresetView
+
+def _locked(method):
+    """
+    Run method holding the preset's lock. Changes it
+    posts reach observers once the (outermost) lock
+    is released, see ProofPreset._deliverChanges()
+    """
+    @functools.wraps(method)
+    def lockedMethod(self, *args, **kwargs):
+        deliver = False
+        try:
+            with self._lock:
+                self._lockDepth += 1
+                version = self._version
+                try:
+                    return method(self, *args, **kwargs)
+                finally:
+                    self._lockDepth -= 1
+                    # Readers (eg. snapshot()) never deliver
+                    deliver = not self._lockDepth and self._version != version
+        finally:
+            # Changes posted before an error, too
+            if deliver:
+                self._deliverChanges()
+    return lockedMethod
 
 class ProofPreset:
     """
@@ -16,21 +51,45 @@ class ProofPreset:
     Only top-most structure exists when initialized:
     {"name": presetName, "groups": []}
 
+    Groups are kept in a GroupSequence (list-like, with
+    O(log n) insert / delete / move), so reordering
+    large presets stays fast.
+
+    Every method that changes the preset holds its lock
+    (re-entrant), and bumps version. Observers are called
+    after the lock is released, in version order. Other
+    threads should read through snapshot(): it only holds
+    the lock to copy group references, and stays consistent
+    while the preset keeps changing.
+
     Import / export methods:
-    - importFromJSON(jsonInput, overwrite=False)
-    - importPyDict(pyDictInput)
+    - importFromJSON(jsonInput, overwrite=False, trustedChecksums=None)
+    - importPyDict(pyDictInput, overwrite=False, validate=True)
+    - importColumns(names, typeSizes=None, leadings=None, prints=None, contents=None, overwrite=False)
     - importFromXML(xmlTaggedInput)
     - exportToJSON(filePath)
     - exportToXML(filePath)
 
     Preset methods:
     - duplicatePreset()
+    - snapshot()
+    - addObserver(callback)
+    - removeObserver(callback)
+    - applyChange(info)
 
     Group methods:
     - addGroup(groupToAdd, overwrite=False)
     - removeGroup(groupToRemove)
     - moveGroup(currentIndex, newIndex)
     - editGroup(groupToEdit, newProperties)
+    - addGroups(groupsToAdd, overwrite=False)
+    - removeGroups(groupsToRemove)
+    - moveGroups(groupsToMove, newIndex)
+    - editGroups(groupsToEdit, newProperties)
+
+    Query methods (see proofPreset.columns):
+    - selectGroups(condition)
+    - filterGroups(condition)
 
     Properties:
     - name (can be set)
@@ -39,6 +98,12 @@ class ProofPreset:
     - groupNames
     - uniqueGroupNames
     - groups
+    - columns
+    - printIndex
+    - printableGroups
+    - view
+    - version
+    - lock
     - shortGroups
     - xmlGroups
     """
@@ -48,12 +113,40 @@ class ProofPreset:
         """
         self.preset = {}
         self.preset["name"] = presetName
-        self.preset["groups"] = []
+        self.preset["groups"] = GroupSequence()
 
         self._xmlGroups = None
 
+        # Next copy counter for each name
         self._groupNameCount = {}
-
+        # Reference counts of group names and of
+        # unique (base) names, kept up to date by
+        # every add, remove, rename and import
+        self._nameCount = {}
+        self._uniqueNameCount = {}
+
+        # Built on first query, see columns
+        self._columns = None
+        # Built when first asked for, then kept
+        # up to date, see printIndex
+        self._printIndex = None
+
+        # Writers hold the lock; each posted change
+        # is a new version. Live snapshots keep copies
+        # of groups from before they changed.
+        self._lock = threading.RLock()
+        self._lockDepth = 0
+        self._version = 0
+        self._snapshots = weakref.WeakSet()
+
+        # (version, info) of changes observers haven't
+        # seen yet; one thread at a time delivers them
+        self._observers = []
+        self._pendingChanges = deque()
+        self._deliveryLock = threading.Lock()
+        self._deliveredVersion = 0
+
+    @_locked
     def duplicatePreset(self, duplicateName=None):
         """
         Return a deepcopy of this instance of the
@@ -65,7 +158,20 @@ class ProofPreset:
         The duplicated object will need to be
         captured by a variable.
         """
-        duplicatePreset = copy.deepcopy(self)
+        # Observers and snapshots belong to the original,
+        # so the duplicate starts without them. The print
+        # index and columns are caches: rebuilt when needed
+        duplicatePreset = copy.deepcopy(self, {id(self._observers): [],
+                                               id(self._lock): threading.RLock(),
+                                               id(self._snapshots): weakref.WeakSet(),
+                                               id(self._pendingChanges): deque(),
+                                               id(self._deliveryLock): threading.Lock(),
+                                               id(self._printIndex): None,
+                                               id(self._columns): None})
+        duplicatePreset._lockDepth = 0
+        duplicatePreset._version = 0
+        duplicatePreset._deliveredVersion = 0
+        duplicatePreset._adoptGroups(duplicatePreset.preset["groups"])
 
         if duplicateName is None:
             duplicatePreset.name = self.name + "-copy"
@@ -74,6 +180,135 @@ class ProofPreset:
 
         return duplicatePreset
 
+    @property
+    def view(self):
+        """
+        Return read-only view of this preset (see
+        proofPreset.views): nothing is copied, and it
+        follows the preset as it changes
+        """
+        return PresetView(self)
+
+    @_locked
+    def snapshot(self):
+        """
+        Return read-only view of this preset as it is now
+        (at version), that later changes don't affect (eg.
+        to hand to a background thread).
+
+        Only group references are copied: the preset
+        copies a group for its live snapshots before
+        changing it, so this is cheap and never blocks
+        writers for long.
+        """
+        printableGroups = None if self._printIndex is None else self._printIndex.groups
+        snapshot = PresetSnapshot(self.name, self._version, self.preset["groups"],
+                                  self._uniqueNameCount, printableGroups)
+        self._snapshots.add(snapshot)
+        return PresetView(snapshot)
+
+    @property
+    def version(self):
+        """
+        Number of changes posted so far
+        """
+        return self._version
+
+    @property
+    def deliveredVersion(self):
+        """
+        Version of the change observers are being called
+        with (or were last called with). Observers run
+        after the lock is released, so the preset may
+        already be at a later version.
+        """
+        return self._deliveredVersion
+
+    @property
+    def lock(self):
+        """
+        The preset's (re-entrant) lock: hold it to make
+        several changes, or read several things, at once
+        """
+        return self._lock
+
+    def addObserver(self, callback):
+        """
+        Call callback(info) every time groups change.
+
+        Callbacks run once the change is made and the
+        preset's lock is released (so a slow observer
+        doesn't block readers or writers), one change at
+        a time, in version order (see deliveredVersion).
+
+        info is a dict with an "action" key and the data
+        needed to replay (or reverse) the change:
+        {"action": "addGroup", "index": 3, "group": ProofGroup}
+        {"action": "removeGroup", "index": 3, "group": ProofGroup}
+        {"action": "moveGroup", "currentIndex": 3, "newIndex": 1}
+        {"action": "editGroup", "index": 3,
+         "oldValues": {"typeSize": 10}, "newValues": {"typeSize": 12}}
+        {"action": "importPreset"}
+
+        Batch methods post one info for the whole batch
+        (indices are sorted):
+        {"action": "addGroups", "indices": [3, 4], "groups": [ProofGroup, ...]}
+        {"action": "removeGroups", "indices": [1, 3], "groups": [ProofGroup, ...]}
+        {"action": "moveGroups", "currentIndices": [1, 3], "newIndices": [5, 6]}
+        {"action": "editGroups", "indices": [1, 3],
+         "oldValues": [{"typeSize": 10}, ...], "newValues": [{"typeSize": 12}, ...]}
+        """
+        if callback not in self._observers:
+            self._observers.append(callback)
+
+    def removeObserver(self, callback):
+        """
+        Stop calling callback on group changes
+        """
+        if callback in self._observers:
+            self._observers.remove(callback)
+
+    @_locked
+    def applyChange(self, info):
+        """
+        Apply a change info dict (as posted to observers)
+        directly to groups, without name checks or validation,
+        and post it to observers.
+
+        Only group changes (single or batch) can be
+        applied. Used to undo / redo / replay edits.
+        """
+        groups = self.preset["groups"]
+        action = info["action"]
+
+        if action == "addGroup":
+            groups.insert(info["index"], info["group"])
+            self._trackNames([info["group"]], 1)
+        elif action == "removeGroup":
+            self._trackNames([groups[info["index"]]], -1)
+            del groups[info["index"]]
+        elif action == "moveGroup":
+            groups.insert(info["newIndex"], groups.pop(info["currentIndex"]))
+        elif action == "editGroup":
+            self._setGroupValues(groups[info["index"]], info["newValues"])
+        elif action == "addGroups":
+            _insertItems(groups, info["indices"], info["groups"])
+            self._trackNames(info["groups"], 1)
+        elif action == "removeGroups":
+            self._trackNames([groups[index] for index in info["indices"]], -1)
+            _deleteItems(groups, info["indices"])
+        elif action == "moveGroups":
+            movedGroups = [groups[index] for index in info["currentIndices"]]
+            _deleteItems(groups, info["currentIndices"])
+            _insertItems(groups, info["newIndices"], movedGroups)
+        elif action == "editGroups":
+            for index, newValues in zip(info["indices"], info["newValues"]):
+                self._setGroupValues(groups[index], newValues)
+        else:
+            raise ProofPresetError("Can't apply %s" % action)
+
+        self._postChange(info)
+
     @property
     def name(self):
         """
@@ -82,6 +317,7 @@ class ProofPreset:
         return self.preset["name"]
 
     @name.setter
+    @_locked
     def name(self, newName):
         """
         Rename preset
@@ -92,31 +328,91 @@ class ProofPreset:
     def jsonPreset(self):
         """
         Return preset as a JSON object with
-        2 spaces for indentation
+        2 spaces for indentation (from a snapshot,
+        so it's consistent while the preset changes)
         """
-        return json.dumps(self.preset, indent=2)
+        return self.snapshot().jsonPreset
 
     @property
     def groupNames(self):
         """
         Return all group names as an attribute
+        (read holding the lock, so no edit is half done)
         """
-        return [group.name for group in self.preset["groups"]]
+        with self._lock:
+            return [group["name"] for group in self.preset["groups"]]
 
     @property
     def uniqueGroupNames(self):
         """
-        Return unique group names as an attribute
+        Return unique group names (without copy
+        counters) as an attribute.
+
+        Kept up to date as groups change, so this
+        doesn't scan groups.
         """
-        return [groupName for groupName in self._groupNameCount]
+        return list(self._uniqueNameCount)
 
     @property
     def groups(self):
         """
-        Groups attribute (not copy of groups)
+        Groups attribute (not copy of groups),
+        see view for a read-only one
         """
         return self.preset["groups"]
-        # return self._getGroups(verbose=True)
+
+    @property
+    def columns(self):
+        """
+        Return columnar view of groups, a
+        columns.GroupColumns() object.
+
+        Built when first asked for, then kept up to
+        date row by row; imports and large batches
+        drop it until it's asked for again.
+        """
+        if self._columns is None:
+            self._columns = GroupColumns(self.preset["groups"])
+        return self._columns
+
+    @property
+    def printIndex(self):
+        """
+        Return index of printable groups, a
+        printIndex.PrintIndex() object.
+
+        Built when first asked for, then updated by
+        every change (including "print" edits), so
+        counts and page estimates don't rescan groups.
+        """
+        if self._printIndex is None:
+            self._printIndex = PrintIndex(self.preset["groups"])
+        return self._printIndex
+
+    @property
+    def printableGroups(self):
+        """
+        Groups (not copies) that will be printed,
+        in preset order
+        """
+        return self.printIndex.groups
+
+    def selectGroups(self, condition):
+        """
+        Return indices of groups matching condition,
+        built from columns.Column() objects:
+
+        preset.selectGroups((Column("typeSize") >= 24) & Column("print"))
+        """
+        return self.columns.select(condition)
+
+    def filterGroups(self, condition):
+        """
+        Return groups (not copies) matching condition,
+        see ProofPreset.selectGroups()
+        """
+        groups = self.preset["groups"]
+        return [groups[index] for index in self.selectGroups(condition)]
 
     # This is probably useless, so delete & update doc
     @property
@@ -157,6 +453,7 @@ class ProofPreset:
 
         return xmlGroups
 
+    @_locked
     def addGroup(self, groupToAdd, overwrite=False):
         """
         Add one group. (Keep loop outside.)
@@ -191,17 +488,28 @@ class ProofPreset:
 
         # Not overwriting: just add to groups
         if not overwrite:
-            newGroup.name = self._countNameCopies(newGroup.name)
+            self._nameCopy(newGroup)
             self.preset["groups"].append(newGroup)
+            self._trackNames([newGroup], 1)
+            self._postChange({"action": "addGroup",
+                              "index": len(self.preset["groups"]) - 1,
+                              "group": newGroup})
 
         # Overwriting: find existing group with same name,
         # and copy newGroup to saved group
         else:
-            for group in self.preset["groups"]:
+            for index, group in enumerate(self.preset["groups"]):
                 if group.name == newGroup.name:
+                    self._beforeGroupChange(group)
+                    oldValues = dict(group)
                     for key in group:
                         group[key] = newGroup[key]
+                    self._postChange({"action": "editGroup",
+                                      "index": index,
+                                      "oldValues": oldValues,
+                                      "newValues": dict(group)})
 
+    @_locked
     def removeGroup(self, groupToRemove):
         """
         Remove group by name or index.
@@ -210,18 +518,24 @@ class ProofPreset:
         be a valid name or valid index.
         """
         if isinstance(groupToRemove, str):
-            if groupToRemove not in self.groupNames:
+            if groupToRemove not in self._nameCount:
                 raise KeyError("Group doesn't exist")
-
-            for group in self.preset["groups"]:
-                if group["name"] == groupToRemove:
-                    self.preset["groups"].remove(group)
+            groupToRemove = self.groupNames.index(groupToRemove)
 
         elif isinstance(groupToRemove, int):
-            if groupToRemove > len(self.preset["groups"]) - 1:
+            groupCount = len(self.preset["groups"])
+            if not -groupCount <= groupToRemove < groupCount:
                 raise IndexError("Index out of range")
-            del self.preset["groups"][groupToRemove]
+            # Negative index: store the real one so it can be undone
+            groupToRemove %= len(self.preset["groups"])
 
+        removedGroup = self.preset["groups"].pop(groupToRemove)
+        self._trackNames([removedGroup], -1)
+        self._postChange({"action": "removeGroup",
+                          "index": groupToRemove,
+                          "group": removedGroup})
+
+    @_locked
     def moveGroup(self, currentIndex, newIndex):
         """
         Move group in currentIndex to newIndex.
@@ -240,6 +554,18 @@ class ProofPreset:
         currentGroup = self.preset["groups"].pop(currentIndex)
         self.preset["groups"].insert(newIndex, currentGroup)
 
+        # Post the real (positive) indices so the move can be reversed
+        lastIndex = len(self.preset["groups"]) - 1
+        currentIndex %= lastIndex + 1
+        if newIndex < 0:
+            newIndex = max(0, newIndex + lastIndex)
+        newIndex = min(newIndex, lastIndex)
+
+        self._postChange({"action": "moveGroup",
+                          "currentIndex": currentIndex,
+                          "newIndex": newIndex})
+
+    @_locked
     def editGroup(self, groupToEdit, newProperties):
         """
         Edit group by name or index.
@@ -252,33 +578,209 @@ class ProofPreset:
         Anything else will be ignored.
         """
         if isinstance(groupToEdit, str):
-            if groupToEdit not in self.groupNames:
+            if groupToEdit not in self._nameCount:
                 raise ValueError("Group name doesn't exist")
-            for group in self.preset["groups"]:
-                if groupToEdit == group["name"]:
-                    groupToEdit = group
+            groupIndex = self.groupNames.index(groupToEdit)
 
         elif isinstance(groupToEdit, int):
-            if groupToEdit > len(self.preset["groups"]) - 1:
+            groupCount = len(self.preset["groups"])
+            if not -groupCount <= groupToEdit < groupCount:
                 raise IndexError("Index out of range")
-            groupToEdit = self.preset["groups"][groupToEdit]
+            groupIndex = groupToEdit % groupCount
+
+        groupToEdit = self.preset["groups"][groupIndex]
 
         # Ignore attributes not part of ProofGroup
         # and check if name has been duplicated
-        for key, value in newProperties.items():
-            if not hasattr(groupToEdit, key):
-                continue
-            elif key == "name" and value in self.groupNames:
-                raise ValueError("Name already exists")
+        oldValues = {}
+        newValues = {}
+        try:
+            for key, value in newProperties.items():
+                if key not in groupToEdit:
+                    continue
+                elif key == "name" and value in self._nameCount:
+                    raise ValueError("Name already exists")
+
+                oldValue = groupToEdit[key]
+                self._setGroupValue(groupToEdit, key, value)
+                oldValues[key] = oldValue
+                newValues[key] = groupToEdit[key]
+
+        # Post whatever was changed before the error, too
+        finally:
+            if newValues:
+                self._postChange({"action": "editGroup",
+                                  "index": groupIndex,
+                                  "oldValues": oldValues,
+                                  "newValues": newValues})
+
+    @_locked
+    def addGroups(self, groupsToAdd, overwrite=False):
+        """
+        Add several groups at once, see ProofPreset.addGroup().
+
+        Names are checked once for the whole batch (with
+        the same results as adding groups one by one), and
+        observers get a single addGroups change (or
+        editGroups, when overwriting).
+        """
+        groupsToAdd = list(groupsToAdd)
+        for groupToAdd in groupsToAdd:
+            if not isinstance(groupToAdd, dict):
+                raise TypeError("groupToAdd has to be a dictionary")
+            elif "name" not in groupToAdd.keys():
+                raise ProofPresetError("groupToAdd needs a name")
+
+        newGroups = [ProofGroup(groupToAdd) for groupToAdd in groupsToAdd]
+        if not newGroups:
+            return
+        groups = self.preset["groups"]
+
+        if not overwrite:
+            firstIndex = len(groups)
+            for newGroup in newGroups:
+                self._nameCopy(newGroup)
+                self._trackNames([newGroup], 1)
+
+            groups.extend(newGroups)
+            self._postChange({"action": "addGroups",
+                              "indices": list(range(firstIndex, len(groups))),
+                              "groups": newGroups})
+
+        # Overwriting: copy each new group to the
+        # saved groups with the same name
+        else:
+            nameIndices = {}
+            for index, group in enumerate(groups):
+                nameIndices.setdefault(group.name, []).append(index)
+
+            indices = []
+            oldValues = []
+            newValues = []
+            for newGroup in newGroups:
+                for index in nameIndices.get(newGroup.name, ()):
+                    group = groups[index]
+                    self._beforeGroupChange(group)
+                    oldValues.append(dict(group))
+                    for key in group:
+                        group[key] = newGroup[key]
+                    indices.append(index)
+                    newValues.append(dict(group))
+
+            if indices:
+                self._postChange({"action": "editGroups",
+                                  "indices": indices,
+                                  "oldValues": oldValues,
+                                  "newValues": newValues})
+
+    @_locked
+    def removeGroups(self, groupsToRemove):
+        """
+        Remove several groups at once, by name or index
+        (see ProofPreset.removeGroup()).
+
+        Nothing is removed unless every name and
+        index is valid.
+        """
+        indices = self._getGroupIndices(groupsToRemove, KeyError)
+        if not indices:
+            return
+
+        groups = self.preset["groups"]
+        removedGroups = [groups[index] for index in indices]
+        _deleteItems(groups, indices)
+        self._trackNames(removedGroups, -1)
+        self._postChange({"action": "removeGroups",
+                          "indices": indices,
+                          "groups": removedGroups})
+
+    @_locked
+    def moveGroups(self, groupsToMove, newIndex):
+        """
+        Move groups at indices in groupsToMove (eg. a
+        multiple selection) so they end up next to each
+        other, in their current order, starting at newIndex.
+        """
+        if not all(isinstance(index, int) for index in groupsToMove) or\
+        not isinstance(newIndex, int):
+            raise TypeError("Only pass in index")
+
+        indices = self._getGroupIndices(groupsToMove, KeyError)
+        if not 0 <= newIndex <= len(self.preset["groups"]) - len(indices):
+            raise IndexError("Index out of range")
+
+        newIndices = list(range(newIndex, newIndex + len(indices)))
+        if newIndices == indices:
+            return
 
-            setattr(groupToEdit, key, value)
+        groups = self.preset["groups"]
+        movedGroups = [groups[index] for index in indices]
+        _deleteItems(groups, indices)
+        _insertItems(groups, newIndices, movedGroups)
+        self._postChange({"action": "moveGroups",
+                          "currentIndices": indices,
+                          "newIndices": newIndices})
 
-    def importFromJSON(self, jsonInput, overwrite=False):
+    @_locked
+    def editGroups(self, groupsToEdit, newProperties):
+        """
+        Set the same properties on several groups at once,
+        by name or index (see ProofPreset.editGroup()).
+        eg. set "typeSize" on every selected group.
+
+        "name" can only be set on one group at a time.
+        """
+        indices = self._getGroupIndices(groupsToEdit, ValueError)
+        if "name" in newProperties:
+            if len(indices) > 1:
+                raise ValueError("Can't give several groups the same name")
+            elif newProperties["name"] in self._nameCount:
+                raise ValueError("Name already exists")
+
+        editedIndices = []
+        oldValues = []
+        newValues = []
+        try:
+            for index in indices:
+                groupToEdit = self.preset["groups"][index]
+                groupOldValues = {}
+                groupNewValues = {}
+                try:
+                    for key, value in newProperties.items():
+                        # Ignore attributes not part of ProofGroup
+                        if key not in groupToEdit:
+                            continue
+
+                        oldValue = groupToEdit[key]
+                        self._setGroupValue(groupToEdit, key, value)
+                        groupOldValues[key] = oldValue
+                        groupNewValues[key] = groupToEdit[key]
+                finally:
+                    if groupNewValues:
+                        editedIndices.append(index)
+                        oldValues.append(groupOldValues)
+                        newValues.append(groupNewValues)
+
+        # Post whatever was changed before the error, too
+        finally:
+            if editedIndices:
+                self._postChange({"action": "editGroups",
+                                  "indices": editedIndices,
+                                  "oldValues": oldValues,
+                                  "newValues": newValues})
+
+    @_locked
+    def importFromJSON(self, jsonInput, overwrite=False, trustedChecksums=None):
         """
         Import JSON object and convert to a ProofPreset() object.
         jsonInput can be a filePath or a JSON object.
 
         The overwrite behaviour is the same as ProofPreset.importPyDict()
+
+        If trustedChecksums (a validation.TrustedChecksums()
+        object) is passed, JSON that already passed validation
+        isn't validated again, and valid JSON that needed no
+        normalizing is added to it.
         """
         jsonObj = None
         if isinstance(jsonInput, str):
@@ -295,9 +797,28 @@ class ProofPreset:
             raise ProofPresetError("Invalid JSON input")
 
         presetFromJSON = json.loads(jsonObj)
-        self.importPyDict(presetFromJSON, overwrite)
-
-    def importPyDict(self, pyDictInput, overwrite=False):
+        if trustedChecksums is None:
+            self.importPyDict(presetFromJSON, overwrite)
+            return
+
+        # JSON has no 12.0: whole sizes are normal, and
+        # cheap enough to convert on the trusted path too
+        presetFromJSON = validation.normalizeSizes(presetFromJSON)
+        checksum = validation.getChecksum(jsonObj)
+        if checksum in trustedChecksums:
+            self.importPyDict(presetFromJSON, overwrite, validate=False)
+            return
+
+        normalizedPreset = validation.checkPreset(presetFromJSON)
+        self.importPyDict(normalizedPreset, overwrite, validate=False)
+        # Only trust JSON that needed no normalizing, so
+        # skipping validation later imports the same thing
+        if all(normalizedGroup is group for normalizedGroup, group in
+               zip(normalizedPreset["groups"], presetFromJSON["groups"])):
+            trustedChecksums.add(checksum)
+
+    @_locked
+    def importPyDict(self, pyDictInput, overwrite=False, validate=True):
         """
         Import a WHOLE ProofPreset (py dict).
         To import from JSON, use ProofPreset.importFromJSON()
@@ -308,10 +829,18 @@ class ProofPreset:
 
         If overwrite is False, raise an error when there's
         already a stored preset["groups"].
+
+        All groups are validated and normalized first (see
+        proofPreset.validation); a PresetValidationError
+        lists every problem found. Pass validate=False to
+        skip this for input known to be valid.
         """
         if not overwrite and self.preset["groups"]:
             raise ProofPresetError("There's already a preset in here.")
 
+        if validate:
+            pyDictInput = validation.checkPreset(pyDictInput)
+
         # Validate imported preset
         if not pyDictInput["name"]:
             raise ProofPresetError("Imported preset has no name")
@@ -320,16 +849,34 @@ class ProofPreset:
 
         newPreset = {}
         newPreset["name"] = pyDictInput["name"]
-        newPreset["groups"] = []
-
-        for group in pyDictInput["groups"]:
-            newGroup = ProofGroup(group)
-            newPreset["groups"].append(newGroup)
+        newPreset["groups"] = GroupSequence(ProofGroup(group)
+                                            for group in pyDictInput["groups"])
 
         # Import preset & fix groupNames
         self.preset = newPreset
         self._inspectAndFixGroupNames(restartCount=True)
+        self._postChange({"action": "importPreset"})
+
+    @_locked
+    def importColumns(self, names, typeSizes=None, leadings=None, prints=None,
+                      contents=None, overwrite=False):
+        """
+        Import groups from parallel sequences (one item per
+        group), see ProofGroup.fromColumns().
+
+        Values aren't validated: use this for data that's
+        already normalized. Overwrite behaviour is the same
+        as ProofPreset.importPyDict()
+        """
+        if not overwrite and self.preset["groups"]:
+            raise ProofPresetError("There's already a preset in here.")
+
+        self.preset["groups"] = GroupSequence(ProofGroup.fromColumns(names, typeSizes, leadings,
+                                                                     prints, contents))
+        self._inspectAndFixGroupNames(restartCount=True)
+        self._postChange({"action": "importPreset"})
 
+    @_locked
     def importFromXML(self, xmlTaggedInput):
         """
         Import XML-tagged proof and convert to ProofPreset() object.
@@ -376,8 +923,9 @@ class ProofPreset:
         utils.checkXMLtagsSequence(self._xmlGroups, "group")
 
         # Main import & fix groupNames
-        self.preset["groups"] = self._makePresetGroupsFromXML()
+        self.preset["groups"] = GroupSequence(self._makePresetGroupsFromXML())
         self._inspectAndFixGroupNames()
+        self._postChange({"action": "importPreset"})
 
     def exportToJSON(self, filePath):
         """
@@ -388,13 +936,17 @@ class ProofPreset:
 
         This method is a helper built on top of
         ProofPreset.getPreset(jsonFormat=True)
+
+        Writes a snapshot, so it can run on a background
+        thread while the preset is being edited.
         """
         ext = os.path.splitext(filePath)[1].lower()
         if ext != ".json":
             raise ProofPresetError("File not .json")
 
+        jsonPreset = self.snapshot().jsonPreset
         with open(filePath, "w+") as jsonFile:
-            jsonFile.write(self.jsonPreset)
+            jsonFile.write(jsonPreset)
 
     def exportToXML(self, filePath):
         """
@@ -405,6 +957,8 @@ class ProofPreset:
 
         This method is a helper built on top of
         ProofPreset.getXMLGroups()
+
+        Writes a snapshot, like exportToJSON().
         """
         ext = os.path.splitext(filePath)[1].lower()
         if ext not in (".xml", ".txt"):
@@ -433,7 +987,7 @@ class ProofPreset:
         nameToReturn = newName
         # If newName hasn't been tracked,
         # initialize key/value in dict
-        if newName not in self.groupNames:
+        if newName not in self._nameCount:
             self._groupNameCount[newName] = 1
 
         # Else, append count to nameToReturn and
@@ -444,6 +998,134 @@ class ProofPreset:
 
         return nameToReturn
 
+    def _nameCopy(self, newGroup):
+        """
+        Give a group that's about to be added a
+        "count", if its name is already taken
+        """
+        baseName = newGroup.name
+        newGroup.name = self._countNameCopies(baseName)
+        if newGroup.name != baseName:
+            newGroup._baseName = baseName
+
+    def _setGroupValue(self, group, key, value):
+        """
+        setattr() on a group in this preset, keeping
+        name counts up to date when it's renamed.
+
+        A name like "UC-2" is counted as a copy of "UC"
+        if "UC" is a unique name (eg. when undoing)
+        """
+        self._beforeGroupChange(group)
+        if key != "name":
+            setattr(group, key, value)
+            return
+
+        self._trackNames([group], -1)
+        try:
+            group.name = value
+            baseName, _, count = value.rpartition("-")
+            if count.isdigit() and baseName in self._uniqueNameCount:
+                group._baseName = baseName
+            else:
+                group._baseName = None
+        finally:
+            self._trackNames([group], 1)
+
+    def _setGroupValues(self, group, newValues):
+        """
+        Set replayed values (see applyChange()) on a group
+        """
+        self._beforeGroupChange(group)
+        for key, value in newValues.items():
+            if key == "name":
+                self._setGroupValue(group, key, value)
+            else:
+                group[key] = value
+
+    @_locked
+    def _editGroupDirectly(self, group, key, value):
+        """
+        Set a value on one of this preset's groups, set
+        directly (group.typeSize = 12) rather than through
+        a preset method: post it as an editGroup change,
+        so caches, undo and observers see it. Finding
+        the group is O(n).
+        """
+        groupIndex = None
+        for index, presetGroup in enumerate(self.preset["groups"]):
+            if presetGroup is group:
+                groupIndex = index
+                break
+
+        if groupIndex is None:
+            # Removed from the preset since
+            group._presetRef = None
+            group[key] = value
+        elif group[key] != value:
+            self.editGroup(groupIndex, {key: value})
+
+    def _beforeGroupChange(self, group):
+        """
+        Let live snapshots keep a copy of group as it
+        is, before it's changed in place
+        """
+        if self._snapshots:
+            for snapshot in list(self._snapshots):
+                snapshot._preserve(group)
+
+    def _restoreBaseNames(self, baseNames):
+        """
+        Set base names ({name: baseName}) that JSON
+        doesn't keep (eg. when recovering an autosave),
+        and count names again
+        """
+        for group in self.preset["groups"]:
+            baseName = baseNames.get(group.name)
+            if baseName is not None:
+                group._baseName = baseName
+        self._nameCount = {}
+        self._uniqueNameCount = {}
+        self._trackNames(self.preset["groups"], 1)
+
+    def _trackNames(self, groups, delta):
+        """
+        Add (delta=1) or remove (delta=-1) groups'
+        names to / from the name reference counts
+        """
+        if delta > 0:
+            groups = self._adoptGroups(groups)
+
+        nameCount = self._nameCount
+        uniqueNameCount = self._uniqueNameCount
+        for group in groups:
+            name = group["name"]
+            count = nameCount.get(name, 0) + delta
+            if count:
+                nameCount[name] = count
+            else:
+                del nameCount[name]
+
+            baseName = group.baseName
+            count = uniqueNameCount.get(baseName, 0) + delta
+            if count:
+                uniqueNameCount[baseName] = count
+            else:
+                del uniqueNameCount[baseName]
+
+    def _adoptGroups(self, groups):
+        """
+        Point groups to this preset, so changing them
+        directly (group.typeSize = 12) still keeps
+        snapshots as they were. Return groups (as a
+        list, if they were an iterator).
+        """
+        groups = list(groups)
+        presetRef = weakref.ref(self)
+        for group in groups:
+            group._presetRef = presetRef
+        return groups
+
     def _inspectAndFixGroupNames(self, restartCount=False):
         """
         On fresh XML, JSON, or preset import, count how many
@@ -456,6 +1138,8 @@ class ProofPreset:
 
         When restartCount=True, self._groupNameCount -> empty dict
         Do this when importing an entire preset
+
+        Name reference counts are rebuilt from scratch.
         """
         if restartCount:
             self._groupNameCount = {}
@@ -463,28 +1147,120 @@ class ProofPreset:
         groupNames = self.groupNames
 
         # Do an overall count of all groupNames
-        # use list.count() instead of incrementing
-        # so we can skip same names as we iterate
-        for name in groupNames:
-            if name not in self._groupNameCount.keys():
-                nameCount = groupNames.count(name)
+        # (one pass, so big imports stay fast)
+        for name, nameCount in Counter(groupNames).items():
+            if name not in self._groupNameCount:
                 self._groupNameCount[name] = nameCount
 
         # For all names that appear more than once,
         # append a "count"
-        for countedName, value in self._groupNameCount.items():
-            if value <= 1:
-                continue
-
+        countedNames = {countedName for countedName, value in self._groupNameCount.items()
+                        if value > 1}
+        if countedNames:
             # Start count at 0 but don't append "-0"
-            nameCount = 0
+            nameCounts = {}
             for group in self.preset["groups"]:
-                if group.name == countedName:
-                    if nameCount == 0:
-                        nameCount += 1
-                        continue
-                    group.name += "-%s" % nameCount
-                    nameCount += 1
+                name = group.name
+                if name not in countedNames:
+                    continue
+                nameCount = nameCounts.get(name, 0)
+                if nameCount:
+                    self._beforeGroupChange(group)
+                    group.name = "%s-%s" % (name, nameCount)
+                    group._baseName = name
+                nameCounts[name] = nameCount + 1
+
+        self._nameCount = {}
+        self._uniqueNameCount = {}
+        self._trackNames(self.preset["groups"], 1)
+
+    def _getGroupIndices(self, groupsToFind, nameError):
+        """
+        Return sorted list of (positive, unique) indices of
+        groupsToFind, a list of group names and / or indices.
+        Unknown names raise nameError.
+        """
+        groupCount = len(self.preset["groups"])
+        nameIndices = None
+        indices = set()
+
+        for groupToFind in groupsToFind:
+            if isinstance(groupToFind, str):
+                # First group with that name, like groupNames.index()
+                if nameIndices is None:
+                    nameIndices = {}
+                    for index, name in enumerate(self.groupNames):
+                        nameIndices.setdefault(name, index)
+                if groupToFind not in nameIndices:
+                    raise nameError("Group doesn't exist")
+                indices.add(nameIndices[groupToFind])
+
+            elif isinstance(groupToFind, int):
+                if not -groupCount <= groupToFind < groupCount:
+                    raise IndexError("Index out of range")
+                indices.add(groupToFind % groupCount)
+
+            else:
+                raise TypeError("Groups must be names or indices")
+
+        return sorted(indices)
+
+    def _postChange(self, info):
+        """
+        Queue change info for observers (called holding
+        the lock, see _deliverChanges()), after updating
+        the preset's caches.
+
+        Observers may run when the preset has changed
+        again, so info gets what they'd otherwise read
+        from the preset: groupCount (after the change),
+        edited group(s) and imported groups.
+        """
+        self._version += 1
+
+        groups = self.preset["groups"]
+        info = dict(info, groupCount=len(groups))
+        action = info["action"]
+        if action == "editGroup":
+            info["group"] = groups[info["index"]]
+        elif action == "editGroups":
+            info["groups"] = [groups[index] for index in info["indices"]]
+        elif action == "importPreset":
+            info["groups"] = list(groups)
+
+        # Keep columns in sync, row by row
+        if self._columns is not None:
+            try:
+                if not self._columns.groupsChanged(info, self.preset["groups"]):
+                    self._columns = None
+            except BufferError:
+                # A NumPy view of a column is still alive,
+                # so the arrays can't be resized
+                self._columns = None
+
+        if self._printIndex is not None:
+            self._printIndex.groupsChanged(info, self.preset["groups"])
+
+        self._pendingChanges.append((self._version, info))
+
+    def _deliverChanges(self):
+        """
+        Call observers with queued changes, in order,
+        without holding the preset's lock. One thread
+        delivers at a time: changes queued meanwhile (by
+        other threads, or by observers themselves) are
+        delivered by it, before it returns.
+        """
+        while self._pendingChanges:
+            if not self._deliveryLock.acquire(blocking=False):
+                return
+            try:
+                while self._pendingChanges:
+                    self._deliveredVersion, info = self._pendingChanges.popleft()
+                    for callback in list(self._observers):
+                        callback(info)
+            finally:
+                self._deliveryLock.release()
 
     def _makePresetGroupsFromXML(self):
         """
@@ -518,7 +1294,8 @@ class ProofPreset:
 
     def _getGroups(self, verbose=True):
         """
-        Return list of ProofPreset groups.
+        Return list of ProofPreset groups, as read-only
+        views (see proofPreset.views).
 
         If NOT verbose, return without preset info:
         [
@@ -534,7 +1311,7 @@ class ProofPreset:
         """
         if not verbose:
             returnGroups = []
-            for group in self.preset["groups"]:
+            for group in self.snapshot().groups:
                 tempGroup = {}
                 tempGroup["name"] = group.name
                 tempGroup["contents"] = group.contents
@@ -542,17 +1319,69 @@ class ProofPreset:
                 returnGroups.append(tempGroup)
 
         else:
-            returnGroups = copy.deepcopy(self.preset["groups"])
+            # Read-only views instead of deep copies
+            returnGroups = list(self.view.groups)
 
         return returnGroups
 
+# Batches touching more than 1 / _REBUILD_RATIO of the
+# items are applied in one pass, rebuilding the list;
+# smaller ones item by item (O(log n) each in a GroupSequence)
+_REBUILD_RATIO = 8
+
+def _isLargeBatch(items, indices):
+    return len(indices) * _REBUILD_RATIO > len(items)
+
+def _deleteItems(items, indices):
+    """
+    Delete items at (sorted) indices from list, in place
+    """
+    if not _isLargeBatch(items, indices):
+        for index in reversed(indices):
+            del items[index]
+        return
+
+    indices = set(indices)
+    items[:] = [item for index, item in enumerate(items) if index not in indices]
+
+def _insertItems(items, indices, newItems):
+    """
+    Insert newItems into list, in place, so they end
+    up at (sorted) indices
+    """
+    if not _isLargeBatch(items, indices):
+        # In order: earlier insertions are all before index
+        for index, item in zip(indices, newItems):
+            items.insert(index, item)
+        return
+
+    oldItems = iter(items[:])
+    newItemsByIndex = dict(zip(indices, newItems))
+    items[:] = [newItemsByIndex[index] if index in newItemsByIndex else next(oldItems)
+                for index in range(len(items) + len(newItemsByIndex))]
+
 class ProofGroup(dict):
     """
     A proof group object.
 
     Subclassed from dict object, so we can do fancy things
     like iterate over key, value.
+
+    The set of characters used in contents is cached, and
+    only recomputed after contents is replaced. Don't
+    mutate the contents list in place once it's been read.
+
+    Build many groups at once with ProofGroup.fromColumns()
     """
+    _keysInGroup = ("name", "typeSize", "leading", "print", "contents")
+
+    # Name before a preset appended a copy counter
+    # (see baseName), None if name has no counter
+    _baseName = None
+
+    # weakref to the preset the group is in
+    _presetRef = None
+
     def __init__(self, groupDict):
         """
         Initialized with default NoneType. If None,
@@ -561,12 +1390,18 @@ class ProofGroup(dict):
 
         Remove unecessary keys and add necessary ones.
         """
-        self._keysInGroup = ["name", "typeSize", "leading",\
-                            "print", "contents"]
+        self._characterSet = None
 
         if not isinstance(groupDict, dict):
             raise TypeError("Pass in a dictionary")
 
+        # Fast path: groupDict already has exactly our keys,
+        # in our order (eg. our own exports), so there's
+        # nothing to remove or add
+        if tuple(groupDict) == self._keysInGroup:
+            super().__init__(groupDict)
+            return
+
         if "name" not in groupDict.keys():
             raise KeyError('"name" not in groupDict')
 
@@ -577,6 +1412,41 @@ class ProofGroup(dict):
         # Initialize dict object w/ key:value from newGroup
         super().__init__(newGroup)
 
+    @classmethod
+    def fromColumns(cls, names, typeSizes=None, leadings=None, prints=None,
+                    contents=None):
+        """
+        Return list of ProofGroup() objects built from
+        parallel sequences (one item per group). Columns
+        left out get empty values.
+
+        Values are used as is (not checked or converted).
+        """
+        count = len(names)
+        columns = [typeSizes, leadings, prints, contents]
+        for column in columns:
+            if column is not None and len(column) != count:
+                raise ProofPresetError("Columns must all have the same length")
+
+        typeSizes = itertools.repeat("", count) if typeSizes is None else typeSizes
+        leadings = itertools.repeat("", count) if leadings is None else leadings
+        prints = itertools.repeat(False, count) if prints is None else prints
+        if contents is None:
+            contents = [[] for _ in range(count)]
+
+        groups = []
+        newGroup = cls.__new__
+        initDict = dict.__init__
+        for name, typeSize, leading, printGroup, groupContents in\
+        zip(names, typeSizes, leadings, prints, contents):
+            group = newGroup(cls)
+            group._characterSet = None
+            initDict(group, name=name, typeSize=typeSize, leading=leading,
+                     print=printGroup, contents=groupContents)
+            groups.append(group)
+
+        return groups
+
     @property
     def name(self):
         """
@@ -592,6 +1462,16 @@ class ProofGroup(dict):
         """
         self["name"] = newName
 
+    @property
+    def baseName(self):
+        """
+        Name without the copy counter a preset appended
+        to it (eg. "UC" for "UC-2")
+        """
+        if self._baseName is None:
+            return self["name"]
+        return self._baseName
+
     @property
     def typeSize(self):
         """
@@ -662,6 +1542,69 @@ class ProofGroup(dict):
             raise TypeError("Contents must be a list")
         self["contents"] = utils.cleanList(newContents)
 
+    @property
+    def characterSet(self):
+        """
+        Return frozenset of all (non-whitespace)
+        characters used in contents
+        """
+        if self._characterSet is None:
+            self._characterSet = utils.getCharacterSet(self["contents"])
+        return self._characterSet
+
+    def _shallowCopy(self):
+        """
+        Return copy sharing this group's values (contents
+        are replaced, never changed in place) and its
+        cached character set
+        """
+        newGroup = ProofGroup.__new__(ProofGroup)
+        dict.update(newGroup, self)
+        newGroup._characterSet = self._characterSet
+        if self._baseName is not None:
+            newGroup._baseName = self._baseName
+        return newGroup
+
+    def __setitem__(self, key, value):
+        """
+        Drop cached character set when contents are
+        replaced. In a preset, let its live snapshots
+        keep a copy of the group first.
+
+        Set directly (not by a preset method), a group
+        value in a preset is edited with editGroup(), so
+        the preset's indexes and observers see it.
+        """
+        preset = None if self._presetRef is None else self._presetRef()
+        if preset is None:
+            if key == "contents":
+                self._characterSet = None
+            super().__setitem__(key, value)
+            return
+
+        with preset._lock:
+            # Only counts this thread's calls while it holds the lock
+            direct = not preset._lockDepth and key in self
+        if direct:
+            preset._editGroupDirectly(self, key, value)
+            return
+
+        with preset._lock:
+            preset._beforeGroupChange(self)
+            if key == "contents":
+                self._characterSet = None
+            super().__setitem__(key, value)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def __getstate__(self):
+        # Copies and pickles don't belong to the preset
+        state = dict(self.__dict__)
+        state.pop("_presetRef", None)
+        return state
+
     def _addMissingKeysToGroup(self, groupToProcess):
         """
         Return new dict with missing keys added
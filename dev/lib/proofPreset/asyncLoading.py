@@ -0,0 +1,140 @@
+"""
+Load presets without blocking the caller
+
+File reads and parsing (importFromJSON / importFromXML)
+run in an executor, off the event loop's thread. Presets
+are reported as soon as each one is ready, so a UI can
+show placeholders and fill them in as they arrive.
+
+loadPresets() is a plain coroutine, so it can be driven
+(and tested) by any asyncio event loop. PresetLoader runs
+it on its own thread + event loop for apps that don't use
+asyncio on their main thread (eg. RoboFont).
+"""
+
+import asyncio
+import os.path
+import threading
+
+from proofPreset import ProofPreset
+from proofPreset.errors import ProofPresetError
+
+def loadPresetFile(filePath):
+    """
+    Return a ProofPreset() read from filePath.
+
+    .json files are imported as presets; .xml and .txt
+    files as proof groups, named after the file.
+    """
+    fileName, ext = os.path.splitext(os.path.basename(filePath))
+    ext = ext.lower()
+
+    if ext == ".json":
+        preset = ProofPreset()
+        preset.importFromJSON(filePath)
+    elif ext in (".xml", ".txt"):
+        preset = ProofPreset(fileName)
+        preset.importFromXML(filePath)
+    else:
+        raise ProofPresetError("Can't load %s files" % ext)
+
+    return preset
+
+async def loadPresets(filePaths, progress=None, executor=None):
+    """
+    Load all filePaths concurrently and return a list of
+    results in the same order as filePaths. A result is a
+    ProofPreset(), or the exception raised while loading it.
+
+    progress(loadedCount, totalCount, index, result) is
+    called on the event loop's thread as soon as each file
+    is done (in completion order, not filePaths order).
+
+    Cancelling the task cancels all loads that haven't
+    started yet.
+    """
+    loop = asyncio.get_running_loop()
+    filePaths = list(filePaths)
+    results = [None] * len(filePaths)
+
+    async def loadOne(index, filePath):
+        try:
+            result = await loop.run_in_executor(executor, loadPresetFile, filePath)
+        # CancelledError isn't an Exception, so it isn't caught here
+        except Exception as error:
+            result = error
+        return index, result
+
+    tasks = [asyncio.ensure_future(loadOne(index, filePath))
+             for index, filePath in enumerate(filePaths)]
+
+    try:
+        loadedCount = 0
+        for nextDone in asyncio.as_completed(tasks):
+            index, result = await nextDone
+            results[index] = result
+            loadedCount += 1
+            if progress is not None:
+                progress(loadedCount, len(filePaths), index, result)
+
+    except asyncio.CancelledError:
+        for task in tasks:
+            task.cancel()
+        raise
+
+    return results
+
+class PresetLoader:
+    """
+    Run loadPresets() on a background thread with
+    its own event loop.
+
+    progress is called on the loader thread, so UI code
+    has to pass results back to the main thread itself.
+    """
+    def __init__(self, filePaths, progress=None):
+        self.filePaths = list(filePaths)
+        self.progress = progress
+        self.results = None
+        self.cancelled = False
+
+        self._loop = None
+        self._task = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        """
+        Stop loading presets that haven't started yet
+        """
+        self._ready.wait()
+        if self._loop is not None and not self._loop.is_closed():
+            try:
+                self._loop.call_soon_threadsafe(self._task.cancel)
+            except RuntimeError:
+                # Loop closed in the meantime: nothing left to cancel
+                pass
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+
+    @property
+    def isRunning(self):
+        return self._thread.is_alive()
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        try:
+            self._loop = loop
+            self._task = loop.create_task(loadPresets(self.filePaths, self.progress))
+            self._ready.set()
+            self.results = loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            self.cancelled = True
+        finally:
+            self._ready.set()
+            loop.close()
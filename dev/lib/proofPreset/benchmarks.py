@@ -0,0 +1,199 @@
+"""
+Timings for big presets
+
+Run `python -m proofPreset.benchmarks`
+"""
+
+import json
+import os.path
+import random
+import tempfile
+import time
+
+from proofPreset import ProofPreset, ProofGroup
+from proofPreset import columns
+from proofPreset.columns import Column, GroupColumns
+from proofPreset.editLog import EditLog, recoverPreset
+from proofPreset.groupSequence import GroupSequence
+
+def makePresetDict(groupCount):
+    """
+    Return a normalized preset dict with groupCount
+    groups (as read back from our own JSON exports)
+    """
+    return {
+        "name": "Benchmark",
+        "groups": [{"name": "Group %d" % index, "typeSize": 12.0, "leading": 14.0,
+                    "print": index % 2 == 0, "contents": ["HOHOHO", "nonono"]}
+                   for index in range(groupCount)]
+    }
+
+def timeIt(label, function):
+    start = time.perf_counter()
+    result = function()
+    print("%-40s %.3fs" % (label, time.perf_counter() - start))
+    return result
+
+def benchmarkImport(groupCount=200000):
+    presetDict = makePresetDict(groupCount)
+    jsonPreset = json.dumps(presetDict)
+    print("Importing %d groups" % groupCount)
+
+    def slowPath():
+        # Extra key: every group goes through key clean-up
+        groups = [dict(group, extra=None) for group in presetDict["groups"]]
+        return [ProofGroup(group) for group in groups]
+
+    timeIt("ProofGroup(), keys to clean up", slowPath)
+    timeIt("ProofGroup(), normalized", lambda: [ProofGroup(group) for group in presetDict["groups"]])
+
+    columns = [[group[key] for group in presetDict["groups"]]
+               for key in ("name", "typeSize", "leading", "print", "contents")]
+    timeIt("ProofGroup.fromColumns()", lambda: ProofGroup.fromColumns(*columns))
+
+    timeIt("importPyDict()", lambda: ProofPreset().importPyDict(presetDict))
+    timeIt("importFromJSON()", lambda: ProofPreset().importFromJSON(jsonPreset))
+    timeIt("importColumns()", lambda: ProofPreset().importColumns(*columns))
+
+def benchmarkReorder(groupCount=100000, operationCount=20000):
+    """
+    Compare a list and a GroupSequence() under random
+    moves, inserts / deletes and index lookups
+    """
+    randomGen = random.Random(0)
+    moves = [(randomGen.randrange(groupCount), randomGen.randrange(groupCount))
+             for _ in range(operationCount)]
+    print("%d operations on %d groups" % (operationCount, groupCount))
+
+    def moveAll(items):
+        for currentIndex, newIndex in moves:
+            items.insert(newIndex, items.pop(currentIndex))
+
+    def insertAndDelete(items):
+        for index, otherIndex in moves:
+            items.insert(index, None)
+            del items[otherIndex]
+
+    def lookUp(items):
+        for index, _ in moves:
+            items[index]
+
+    for label, function in (("moves", moveAll), ("inserts + deletes", insertAndDelete),
+                            ("index lookups", lookUp)):
+        for container in (list, GroupSequence):
+            items = container(range(groupCount))
+            timeIt("%s, %s" % (label, container.__name__), lambda: function(items))
+
+    # The same through ProofPreset.moveGroup()
+    presetDict = makePresetDict(groupCount)
+    for container in (list, GroupSequence):
+        preset = ProofPreset()
+        preset.importPyDict(presetDict, validate=False)
+        preset.preset["groups"] = container(preset.groups)
+        timeIt("moveGroup(), %s" % container.__name__,
+               lambda: [preset.moveGroup(currentIndex, newIndex)
+                        for currentIndex, newIndex in moves])
+        timeIt("moveGroups() of 2, %s" % container.__name__,
+               lambda: [preset.moveGroups(sorted({currentIndex, newIndex}), 0)
+                        for currentIndex, newIndex in moves[:2000]])
+
+def benchmarkQuery(groupCount=200000):
+    """
+    Compare a loop over groups with a columnar query
+    """
+    preset = ProofPreset()
+    preset.importPyDict(makePresetDict(groupCount), validate=False)
+    preset.editGroups(range(0, groupCount, 3), {"typeSize": 24})
+    condition = (Column("typeSize") >= 24) & Column("print")
+    print("Querying %d groups" % groupCount)
+
+    timeIt("loop over groups",
+           lambda: [index for index, group in enumerate(preset.groups)
+                    if group.typeSize != "" and group.typeSize >= 24 and group.print])
+    timeIt("build columns", lambda: preset.columns)
+    timeIt("selectGroups()", lambda: preset.selectGroups(condition))
+
+    randomGen = random.Random(0)
+    moves = [(randomGen.randrange(groupCount), randomGen.randrange(groupCount))
+             for _ in range(20)]
+    timeIt("20 x (moveGroup() + selectGroups())",
+           lambda: [(preset.moveGroup(*move), preset.selectGroups(condition)) for move in moves])
+    if columns.numpy is not None:
+        pureColumns = GroupColumns(preset.groups, useNumpy=False)
+        timeIt("selectGroups(), without NumPy", lambda: pureColumns.select(condition))
+
+def benchmarkPrintToggles(groupCount=200000, toggleCount=100):
+    """
+    Compare rescanning groups for the print count after
+    each checkbox toggle with the preset's print index
+    """
+    preset = ProofPreset()
+    preset.importPyDict(makePresetDict(groupCount), validate=False)
+    randomGen = random.Random(0)
+    indices = [randomGen.randrange(groupCount) for _ in range(toggleCount)]
+    print("Toggling print on %d of %d groups" % (toggleCount, groupCount))
+
+    def toggle(count):
+        for index in indices:
+            preset.editGroup(index, {"print": not preset.groups[index].print})
+            count()
+
+    timeIt("rescan after each toggle",
+           lambda: toggle(lambda: sum(1 for group in preset.groups if group.print)))
+    timeIt("build print index", lambda: preset.printIndex)
+    timeIt("print index after each toggle",
+           lambda: toggle(lambda: preset.printIndex.estimatePageCount()))
+
+def benchmarkSnapshot(groupCount=200000):
+    """
+    Compare deep-copying groups with a read-only
+    view and a snapshot
+    """
+    preset = ProofPreset()
+    preset.importPyDict(makePresetDict(groupCount), validate=False)
+    print("Copying %d groups" % groupCount)
+
+    timeIt("duplicatePreset()", preset.duplicatePreset)
+    timeIt("view", lambda: preset.view)
+    timeIt("snapshot()", preset.snapshot)
+
+def benchmarkAutosave(groupCount=20000, editCount=20):
+    """
+    Compare saving the whole preset after each edit
+    with appending edits to an edit log, and time
+    recovering from the log
+    """
+    preset = ProofPreset()
+    preset.importPyDict(makePresetDict(groupCount), validate=False)
+    randomGen = random.Random(0)
+    indices = [randomGen.randrange(groupCount) for _ in range(editCount)]
+    print("Saving %d edits on %d groups" % (editCount, groupCount))
+
+    def edit(save):
+        for index in indices:
+            preset.editGroup(index, {"typeSize": randomGen.choice([9, 12, 24])})
+            save()
+
+    with tempfile.TemporaryDirectory() as tempDir:
+        presetPath = os.path.join(tempDir, "preset.json")
+        timeIt("exportToJSON() after each edit", lambda: edit(lambda: preset.exportToJSON(presetPath)))
+
+        snapshotPath = os.path.join(tempDir, "preset.autosave")
+        editLog = timeIt("start edit log", lambda: EditLog(preset, snapshotPath))
+        timeIt("edit log after each edit", lambda: edit(editLog.sync))
+        timeIt("recoverPreset()", lambda: recoverPreset(snapshotPath))
+        editLog.close(removeFiles=True)
+
+
+if __name__ == "__main__":
+    benchmarkImport()
+    print()
+    benchmarkReorder()
+    print()
+    benchmarkQuery()
+    print()
+    benchmarkPrintToggles()
+    print()
+    benchmarkSnapshot()
+    print()
+    benchmarkAutosave()
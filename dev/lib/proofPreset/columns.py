@@ -0,0 +1,320 @@
+"""
+Columnar views of a preset's groups, and queries over them
+
+GroupColumns keeps one array.array per column (typeSize,
+leading, print, lineCount, characterCount), so questions
+like "printable groups at 24pt or more" are answered by
+scanning compact arrays instead of every ProofGroup dict.
+Unset type sizes and leadings ("") are stored as NaN, so
+they never match a comparison (except !=).
+
+Conditions are built from Column() objects with comparison
+operators, and combined with & | ~:
+
+(Column("typeSize") >= 24) & Column("print")
+Column("lineCount") > 100
+
+If NumPy is installed, columns are wrapped as NumPy arrays
+(without copying) and conditions are evaluated in bulk by
+NumPy. Results are the same either way.
+
+Columns follow the preset's changes (groupsChanged()):
+edits set their rows, adds, removes and moves insert and
+delete rows (appends extend the arrays), so a query after
+an edit doesn't rebuild every array.
+"""
+
+import array
+import itertools
+import operator
+
+from proofPreset.errors import ProofPresetError
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+COLUMN_NAMES = ("typeSize", "leading", "print", "lineCount", "characterCount")
+
+_TYPECODES = {
+    "typeSize": "d",
+    "leading": "d",
+    "print": "b",
+    "lineCount": "q",
+    "characterCount": "q"
+}
+
+_NAN = float("nan")
+
+def _getSize(value):
+    if value == "" or value is None:
+        return _NAN
+    return float(value)
+
+def getRow(group):
+    """
+    Return tuple of group's column values,
+    in COLUMN_NAMES order
+    """
+    contents = group["contents"]
+    return (_getSize(group["typeSize"]), _getSize(group["leading"]), int(bool(group["print"])),
+            len(contents), sum(len(line) for line in contents))
+
+class GroupColumns:
+    """
+    Column arrays for a list of groups.
+
+    useNumpy defaults to True when NumPy is installed.
+
+    Methods:
+    - getColumn(name)
+    - setRow(index, group)
+    - insertRow(index, group)
+    - deleteRow(index)
+    - groupsChanged(info, groups)
+    - evaluate(condition)
+    - select(condition)
+    """
+    # Batches touching more than 1 / _rebuildRatio
+    # of the rows are left to a rebuild
+    _rebuildRatio = 8
+
+    def __init__(self, groups, useNumpy=None):
+        if useNumpy is None:
+            useNumpy = numpy is not None
+        elif useNumpy and numpy is None:
+            raise ProofPresetError("NumPy isn't installed")
+        self.useNumpy = useNumpy
+
+        # One pass per column: much faster than
+        # building a row tuple per group
+        groups = list(groups)
+        contents = [group["contents"] for group in groups]
+        values = {
+            "typeSize": [_NAN if size == "" or size is None else size
+                         for size in [group["typeSize"] for group in groups]],
+            "leading": [_NAN if leading == "" or leading is None else leading
+                        for leading in [group["leading"] for group in groups]],
+            "print": [bool(group["print"]) for group in groups],
+            "lineCount": list(map(len, contents)),
+            "characterCount": [sum(map(len, lines)) for lines in contents]
+        }
+        self._length = len(groups)
+        self._columns = {name: array.array(_TYPECODES[name], values[name])
+                         for name in COLUMN_NAMES}
+
+    def __len__(self):
+        return self._length
+
+    def getColumn(self, name):
+        """
+        Return column's array.array (not a copy)
+        """
+        if name not in self._columns:
+            raise ProofPresetError("Unknown column: %s" % name)
+        return self._columns[name]
+
+    def setRow(self, index, group):
+        """
+        Update row at index after group was edited
+        """
+        for name, value in zip(COLUMN_NAMES, getRow(group)):
+            self._columns[name][index] = value
+
+    def insertRow(self, index, group, row=None):
+        """
+        Insert a row for group before index
+        (row: its values, if already known)
+        """
+        if row is None:
+            row = getRow(group)
+        for name, value in zip(COLUMN_NAMES, row):
+            self._columns[name].insert(index, value)
+        self._length += 1
+
+    def deleteRow(self, index):
+        """
+        Delete row at index, and return its values
+        """
+        row = tuple(self._columns[name][index] for name in COLUMN_NAMES)
+        for name in COLUMN_NAMES:
+            del self._columns[name][index]
+        self._length -= 1
+        return row
+
+    def groupsChanged(self, info, groups):
+        """
+        Update columns after a change (info as posted to
+        preset observers); groups are the changed groups.
+
+        Return False if the change isn't applied (an import,
+        or a batch touching many rows): rebuild instead.
+        """
+        action = info["action"]
+
+        if action == "editGroup":
+            self.setRow(info["index"], groups[info["index"]])
+        elif action == "editGroups":
+            for index in set(info["indices"]):
+                self.setRow(index, groups[index])
+        elif action == "addGroup":
+            self.insertRow(info["index"], groups[info["index"]])
+        elif action == "removeGroup":
+            self.deleteRow(info["index"])
+        elif action == "moveGroup":
+            self.insertRow(info["newIndex"], None, self.deleteRow(info["currentIndex"]))
+
+        elif action == "addGroups" and info["indices"][0] == self._length:
+            # Appended (addGroups() always appends)
+            added = GroupColumns(info["groups"], useNumpy=False)
+            for name in COLUMN_NAMES:
+                self._columns[name].extend(added._columns[name])
+            self._length += len(added)
+        elif action.endswith("Groups") and self._isLargeBatch(info):
+            return False
+        elif action == "addGroups":
+            for index in info["indices"]:
+                self.insertRow(index, groups[index])
+        elif action == "removeGroups":
+            for index in reversed(info["indices"]):
+                self.deleteRow(index)
+        elif action == "moveGroups":
+            rows = [self.deleteRow(index) for index in reversed(info["currentIndices"])]
+            rows.reverse()
+            for newIndex, row in zip(info["newIndices"], rows):
+                self.insertRow(newIndex, None, row)
+
+        else:
+            return False
+        return True
+
+    def _isLargeBatch(self, info):
+        indices = info.get("indices", info.get("currentIndices", ()))
+        return len(indices) * self._rebuildRatio > self._length
+
+    def evaluate(self, condition):
+        """
+        Return mask of condition: a NumPy bool array,
+        or a list of bools without NumPy
+        """
+        return condition.evaluate(self)
+
+    def select(self, condition):
+        """
+        Return list of indices of rows matching condition
+        """
+        mask = self.evaluate(condition)
+        if self.useNumpy:
+            return numpy.flatnonzero(mask).tolist()
+        return list(itertools.compress(range(self._length), mask))
+
+    def _getValues(self, name):
+        values = self.getColumn(name)
+        if self.useNumpy:
+            # A view over the array's buffer, not a copy
+            return numpy.frombuffer(values, dtype=values.typecode)
+        return values
+
+    def _truthy(self, name):
+        values = self._getValues(name)
+        if self.useNumpy:
+            return numpy.nan_to_num(values) != 0
+        # NaN (unset) is false
+        return [value == value and value != 0 for value in values]
+
+    def _compare(self, name, compare, other):
+        values = self._getValues(name)
+        if self.useNumpy:
+            return compare(values, other)
+        return [compare(value, other) for value in values]
+
+    def _combine(self, combine, mask, otherMask):
+        if self.useNumpy:
+            return combine(mask, otherMask)
+        return [combine(value, otherValue) for value, otherValue in zip(mask, otherMask)]
+
+    def _negate(self, mask):
+        if self.useNumpy:
+            return ~mask
+        return [not value for value in mask]
+
+class Condition:
+    """
+    Base class of query conditions: combine
+    with & (and), | (or), ~ (not)
+    """
+    def evaluate(self, columns):
+        raise NotImplementedError
+
+    def __and__(self, other):
+        return _Combined(operator.and_, self, other)
+
+    def __or__(self, other):
+        return _Combined(operator.or_, self, other)
+
+    def __invert__(self):
+        return _Not(self)
+
+class Column(Condition):
+    """
+    A column in a query. Compare it with a number to get a
+    condition; on its own, it's true where the value is
+    set and not zero (eg. Column("print")).
+    """
+    def __init__(self, name):
+        if name not in COLUMN_NAMES:
+            raise ProofPresetError("Unknown column: %s" % name)
+        self.name = name
+
+    def evaluate(self, columns):
+        return columns._truthy(self.name)
+
+    def __lt__(self, other):
+        return _Comparison(self.name, operator.lt, other)
+
+    def __le__(self, other):
+        return _Comparison(self.name, operator.le, other)
+
+    def __gt__(self, other):
+        return _Comparison(self.name, operator.gt, other)
+
+    def __ge__(self, other):
+        return _Comparison(self.name, operator.ge, other)
+
+    def __eq__(self, other):
+        return _Comparison(self.name, operator.eq, other)
+
+    def __ne__(self, other):
+        return _Comparison(self.name, operator.ne, other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "Column(%r)" % self.name
+
+class _Comparison(Condition):
+    def __init__(self, name, compare, other):
+        self.name = name
+        self.compare = compare
+        self.other = other
+
+    def evaluate(self, columns):
+        return columns._compare(self.name, self.compare, self.other)
+
+class _Combined(Condition):
+    def __init__(self, combine, condition, otherCondition):
+        self.combine = combine
+        self.condition = condition
+        self.otherCondition = otherCondition
+
+    def evaluate(self, columns):
+        return columns._combine(self.combine, self.condition.evaluate(columns),
+                                self.otherCondition.evaluate(columns))
+
+class _Not(Condition):
+    def __init__(self, condition):
+        self.condition = condition
+
+    def evaluate(self, columns):
+        return columns._negate(self.condition.evaluate(columns))
@@ -0,0 +1,87 @@
+"""
+Character coverage of proof groups
+
+Each ProofGroup caches the set of characters used in
+its contents (ProofGroup.characterSet). Checking a group
+against a font is then a single set difference with the
+font's cmap, so groups a font can't render can be skipped
+or flagged before any layout happens.
+
+cmap is a dict of {unicode value: glyph name}, like
+fontTools' getBestCmap() or RoboFont's font.unicodeData
+(glyph names / lists are ignored, only keys matter).
+"""
+
+def getSupportedCharacters(cmap):
+    """
+    Return frozenset of characters in cmap
+    """
+    if isinstance(cmap, frozenset):
+        return cmap
+    return frozenset(chr(unicodeValue) for unicodeValue in cmap)
+
+def getMissingCharacters(group, cmap):
+    """
+    Return frozenset of characters in group
+    that aren't in cmap
+    """
+    return group.characterSet - getSupportedCharacters(cmap)
+
+def getCoverageReport(preset, cmap):
+    """
+    Return a list of per-group coverage info:
+    [
+        {
+            "index": 0,
+            "name": "UC",
+            "missing": ["Ə"],
+            "coverage": 0.96
+        },
+        ...
+    ]
+
+    "missing" is sorted. "coverage" is the fraction of the
+    group's characters the font has (1.0 for empty groups).
+    """
+    supported = getSupportedCharacters(cmap)
+
+    report = []
+    for index, group in enumerate(preset.groups):
+        characterSet = group.characterSet
+        missing = characterSet - supported
+
+        if characterSet:
+            coverage = 1 - len(missing) / len(characterSet)
+        else:
+            coverage = 1.0
+
+        report.append({
+            "index": index,
+            "name": group.name,
+            "missing": sorted(missing),
+            "coverage": coverage
+        })
+
+    return report
+
+def getRenderableGroups(preset, cmap, onlyPrinted=False):
+    """
+    Return list of groups whose characters are
+    all in cmap, in preset order.
+
+    If onlyPrinted, groups that aren't set to print
+    are skipped too.
+    """
+    supported = getSupportedCharacters(cmap)
+    groups = preset.printableGroups if onlyPrinted else preset.groups
+    return [group for group in groups
+            if group.characterSet <= supported]
+
+def getUnrenderableGroupIndices(preset, cmap):
+    """
+    Return indices of groups that use at least
+    one character that isn't in cmap
+    """
+    supported = getSupportedCharacters(cmap)
+    return [index for index, group in enumerate(preset.groups)
+            if not group.characterSet <= supported]
@@ -0,0 +1,192 @@
+"""
+Undo / redo journal for ProofPreset edits
+
+Instead of snapshotting the whole preset (duplicatePreset()
+deepcopies everything), the journal listens to a preset's
+change notifications and records each change. Undo applies
+the inverse change, redo applies the change again, so both
+only cost as much as the change itself.
+"""
+
+import sys
+from collections import deque
+
+from proofPreset.errors import ProofPresetError
+
+class EditJournal:
+    """
+    An undo / redo journal for one ProofPreset() object.
+
+    Recorded actions:
+    - addGroup
+    - removeGroup
+    - moveGroup
+    - editGroup (including contents changes)
+    - addGroups, removeGroups, moveGroups, editGroups
+      (a whole batch is undone in one step)
+
+    Importing a whole preset clears the journal.
+
+    maxSize is an approximate memory cap (in bytes) for all
+    recorded changes. When it's exceeded, the oldest changes
+    are dropped. The most recent change is always kept.
+    """
+    def __init__(self, preset, maxSize=1024 * 1024):
+        self.preset = preset
+        self.maxSize = maxSize
+
+        self._undoStack = deque()
+        self._redoStack = []
+        self._size = 0
+        self._replaying = False
+
+        self.preset.addObserver(self._record)
+
+    def detach(self):
+        """
+        Stop recording changes and forget all of them
+        """
+        self.preset.removeObserver(self._record)
+        self.clear()
+
+    def clear(self):
+        """
+        Forget all recorded changes
+        """
+        self._undoStack.clear()
+        self._redoStack = []
+        self._size = 0
+
+    @property
+    def canUndo(self):
+        return bool(self._undoStack)
+
+    @property
+    def canRedo(self):
+        return bool(self._redoStack)
+
+    @property
+    def size(self):
+        """
+        Approximate memory used by recorded changes (bytes)
+        """
+        return self._size
+
+    def undo(self):
+        """
+        Reverse the last recorded change
+        """
+        if not self._undoStack:
+            raise ProofPresetError("Nothing to undo")
+
+        info, size = self._undoStack.pop()
+        self._replay(invertChange(info))
+        self._redoStack.append((info, size))
+
+    def redo(self):
+        """
+        Re-apply the last undone change
+        """
+        if not self._redoStack:
+            raise ProofPresetError("Nothing to redo")
+
+        info, size = self._redoStack.pop()
+        self._replay(info)
+        self._undoStack.append((info, size))
+
+    def _replay(self, info):
+        """
+        Apply change to preset without recording it
+        """
+        self._replaying = True
+        try:
+            self.preset.applyChange(info)
+        finally:
+            self._replaying = False
+
+    def _record(self, info):
+        """
+        Observer callback: store change, drop redo
+        history and evict oldest changes if over maxSize
+        """
+        if self._replaying:
+            return
+
+        if info["action"] == "importPreset":
+            self.clear()
+            return
+
+        for _, size in self._redoStack:
+            self._size -= size
+        self._redoStack = []
+
+        info = stripChange(info)
+        size = estimateSize(info)
+        self._undoStack.append((info, size))
+        self._size += size
+
+        while self._size > self.maxSize and len(self._undoStack) > 1:
+            _, oldSize = self._undoStack.popleft()
+            self._size -= oldSize
+
+def stripChange(info):
+    """
+    Return info without what applyChange() finds in
+    the preset itself (groupCount, edited groups),
+    to keep or log it
+    """
+    info = dict(info)
+    info.pop("groupCount", None)
+    if info["action"] == "editGroup":
+        info.pop("group", None)
+    elif info["action"] == "editGroups":
+        info.pop("groups", None)
+    return info
+
+def invertChange(info):
+    """
+    Return the change info dict that reverses info
+    """
+    action = info["action"]
+
+    if action == "addGroup":
+        return dict(info, action="removeGroup")
+    elif action == "removeGroup":
+        return dict(info, action="addGroup")
+    elif action == "moveGroup":
+        return dict(info, currentIndex=info["newIndex"],
+                    newIndex=info["currentIndex"])
+    elif action == "editGroup":
+        return dict(info, oldValues=info["newValues"],
+                    newValues=info["oldValues"])
+    elif action == "addGroups":
+        return dict(info, action="removeGroups")
+    elif action == "removeGroups":
+        return dict(info, action="addGroups")
+    elif action == "moveGroups":
+        return dict(info, currentIndices=info["newIndices"],
+                    newIndices=info["currentIndices"])
+    elif action == "editGroups":
+        # The same group can be edited more than
+        # once in a batch: undo in reverse order
+        return dict(info, indices=info["indices"][::-1],
+                    oldValues=info["newValues"][::-1],
+                    newValues=info["oldValues"][::-1])
+
+    raise ProofPresetError("Can't invert %s" % action)
+
+def estimateSize(value):
+    """
+    Return rough memory footprint of value (bytes).
+    Only walks into dicts, lists and tuples.
+    """
+    size = sys.getsizeof(value)
+
+    if isinstance(value, dict):
+        for key, item in value.items():
+            size += sys.getsizeof(key) + estimateSize(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            size += estimateSize(item)
+
+    return size
@@ -0,0 +1,331 @@
+"""
+Write-ahead edit log, for autosaving presets
+
+Writing a whole preset to JSON after every change is too
+slow for big presets. EditLog listens to a preset's change
+notifications (like EditJournal) and appends each change to
+a log file, one JSON line per change, so saving an edit only
+costs as much as the edit. Lines are flushed right away and
+fsynced at most every syncInterval seconds (one fsync for
+a burst of edits).
+
+Once the log passes compactSize bytes, it's compacted: a
+snapshot of the preset is written (on a background thread)
+and the log starts over. Files, for snapshotPath:
+- snapshotPath: preset at some sequence number
+- snapshotPath + ".log": changes after it
+- snapshotPath + ".log.old": changes of a log being
+  compacted (only exists while compacting, or after a crash)
+
+Changes are numbered with the preset's version (observers
+get them after the preset's lock is released, see
+ProofPreset.deliveredVersion), and snapshots record their
+version, so after a crash at any point,
+recoverPreset(snapshotPath) rebuilds the preset from the
+last snapshot plus every logged change made after it.
+"""
+
+import json
+import os
+import threading
+
+from proofPreset import ProofGroup, ProofPreset
+from proofPreset.editJournal import stripChange
+from proofPreset.errors import ProofPresetError
+
+def _encodeGroup(group):
+    """
+    Return group as a plain dict, with its base
+    name (see ProofGroup.baseName) if it has one
+    """
+    groupDict = dict(group)
+    if group.baseName != group.name:
+        groupDict["baseName"] = group.baseName
+    return groupDict
+
+def _decodeGroup(groupDict):
+    baseName = groupDict.pop("baseName", None)
+    group = ProofGroup(groupDict)
+    if baseName is not None:
+        group._baseName = baseName
+    return group
+
+def _encodeChange(info):
+    """
+    Return change info with groups as plain dicts
+    (see stripChange() for what isn't logged)
+    """
+    info = stripChange(info)
+    if "group" in info:
+        info["group"] = _encodeGroup(info["group"])
+    if "groups" in info:
+        info["groups"] = [_encodeGroup(group) for group in info["groups"]]
+    return info
+
+def _decodeChange(info):
+    """
+    Return logged change info with groups as ProofGroups
+    """
+    if "group" in info:
+        info["group"] = _decodeGroup(info["group"])
+    if "groups" in info:
+        info["groups"] = [_decodeGroup(group) for group in info["groups"]]
+    return info
+
+def _writeFile(filePath, text):
+    """
+    Write text to filePath atomically and durably
+    """
+    tempPath = filePath + ".tmp"
+    with open(tempPath, "w") as tempFile:
+        tempFile.write(text)
+        tempFile.flush()
+        os.fsync(tempFile.fileno())
+    os.replace(tempPath, filePath)
+
+def _readLog(logPath):
+    """
+    Return list of (sequence, change info) in logPath.
+    Reading stops at the first incomplete or
+    unreadable line (eg. cut off by a crash).
+    """
+    records = []
+    if not os.path.isfile(logPath):
+        return records
+
+    with open(logPath, "r") as logFile:
+        for line in logFile:
+            if not line.endswith("\n"):
+                break
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            records.append((record["sequence"], record["change"]))
+    return records
+
+def recoverPreset(snapshotPath):
+    """
+    Return ProofPreset rebuilt from snapshotPath and the
+    changes logged after it, or None if there's no snapshot
+    """
+    if not os.path.isfile(snapshotPath):
+        return None
+
+    with open(snapshotPath, "r") as snapshotFile:
+        snapshot = json.load(snapshotFile)
+    sequence = snapshot["sequence"]
+    presetDict = snapshot["preset"]
+
+    preset = ProofPreset(presetDict["name"])
+    if presetDict["groups"]:
+        # Written by us from a valid preset
+        preset.importPyDict(presetDict, validate=False)
+        preset._restoreBaseNames(snapshot["baseNames"])
+
+    # Changes of a compaction that didn't finish come first
+    records = _readLog(snapshotPath + ".log.old") + _readLog(snapshotPath + ".log")
+    for recordSequence, info in sorted(records, key=lambda record: record[0]):
+        if recordSequence <= sequence:
+            continue
+        # A gap means changes were lost: stop there
+        if recordSequence != sequence + 1:
+            break
+        preset.applyChange(_decodeChange(info))
+        sequence = recordSequence
+
+    return preset
+
+class EditLog:
+    """
+    Log every change of preset to files at snapshotPath.
+
+    Starts by writing a snapshot of preset (recover it
+    first with recoverPreset(), if needed).
+
+    Methods:
+    - sync()
+    - compact(wait=False)
+    - close(removeFiles=False)
+
+    Properties:
+    - changeCount (changes logged since the log was opened)
+    - logSize (bytes in the current log)
+    """
+    def __init__(self, preset, snapshotPath, compactSize=1024 * 1024, syncInterval=0.5):
+        self.preset = preset
+        self.snapshotPath = snapshotPath
+        self.logPath = snapshotPath + ".log"
+        self.oldLogPath = snapshotPath + ".log.old"
+        self.compactSize = compactSize
+        self.syncInterval = syncInterval
+
+        self._lock = threading.Lock()
+        self._changeCount = 0
+        self._syncTimer = None
+        self._compactThread = None
+        self._compactError = None
+
+        snapshotDir = os.path.dirname(os.path.abspath(snapshotPath))
+        os.makedirs(snapshotDir, exist_ok=True)
+
+        # Start over from the preset as it is: older
+        # logs were recovered or belong to another preset.
+        # Holding the lock, so no change is missed.
+        with preset.lock:
+            snapshot = preset.snapshot()
+            self._writeSnapshot(snapshot, snapshot.version)
+            # Changes up to here are in the snapshot (those
+            # not delivered yet are delivered to us too)
+            self._snapshotVersion = snapshot.version
+            self._logFile = open(self.logPath, "w")
+            self._logSize = 0
+            if os.path.exists(self.oldLogPath):
+                os.remove(self.oldLogPath)
+
+            preset.addObserver(self._record)
+
+    @property
+    def changeCount(self):
+        return self._changeCount
+
+    @property
+    def logSize(self):
+        return self._logSize
+
+    def sync(self):
+        """
+        fsync logged changes now
+        """
+        with self._lock:
+            self._syncTimer = None
+            if self._logFile is not None and not self._logFile.closed:
+                os.fsync(self._logFile.fileno())
+
+    def compact(self, wait=False):
+        """
+        Write a snapshot of the preset and start a new log.
+        The snapshot is written on a background thread;
+        if wait is True, wait until it's written (after any
+        compaction already running).
+        """
+        if wait and self._compactThread is not None:
+            self._compactThread.join()
+
+        # Lock order: preset, then log (observers run
+        # holding the preset's lock if an edit was made
+        # holding it). The rotated log must only have
+        # changes up to the snapshot's version.
+        with self.preset.lock, self._lock:
+            compactThread = self._compactThread
+            if compactThread is None or not compactThread.is_alive():
+                snapshot = self.preset.snapshot()
+                self._rotateLog()
+                self._snapshotVersion = snapshot.version
+                compactThread = threading.Thread(target=self._compact,
+                                                 args=(snapshot, snapshot.version), daemon=True)
+                self._compactThread = compactThread
+                compactThread.start()
+
+        if wait:
+            compactThread.join()
+            if self._compactError is not None:
+                error, self._compactError = self._compactError, None
+                raise ProofPresetError("Couldn't compact edit log") from error
+
+    def close(self, removeFiles=False):
+        """
+        Stop logging. The log is compacted into a
+        snapshot first, unless removeFiles is True
+        (eg. after the preset itself was saved).
+        """
+        self.preset.removeObserver(self._record)
+        if not removeFiles:
+            self.compact(wait=True)
+        elif self._compactThread is not None:
+            self._compactThread.join()
+
+        with self._lock:
+            if self._syncTimer is not None:
+                self._syncTimer.cancel()
+                self._syncTimer = None
+            self._logFile.close()
+
+        if removeFiles:
+            for filePath in (self.snapshotPath, self.logPath, self.oldLogPath):
+                if os.path.exists(filePath):
+                    os.remove(filePath)
+
+    def _record(self, info):
+        """
+        Preset observer: append change to the log
+        """
+        version = self.preset.deliveredVersion
+
+        if info["action"] == "importPreset":
+            # Nothing to replay: the whole preset changed,
+            # so it's saved before going on
+            with self._lock:
+                if version <= self._snapshotVersion:
+                    return
+                self._changeCount += 1
+            self.compact(wait=True)
+            return
+
+        with self._lock:
+            # Already in the last snapshot
+            if version <= self._snapshotVersion:
+                return
+            self._changeCount += 1
+            line = json.dumps({"sequence": version, "change": _encodeChange(info)}) + "\n"
+            self._logFile.write(line)
+            self._logFile.flush()
+            self._logSize += len(line)
+
+            if self._syncTimer is None and self.syncInterval is not None:
+                self._syncTimer = threading.Timer(self.syncInterval, self.sync)
+                self._syncTimer.daemon = True
+                self._syncTimer.start()
+            needsCompacting = self._logSize > self.compactSize
+
+        if needsCompacting:
+            self.compact()
+
+    def _rotateLog(self):
+        """
+        Move the log aside for compacting, start a new one
+        """
+        self._logFile.flush()
+        os.fsync(self._logFile.fileno())
+        self._logFile.close()
+
+        if os.path.exists(self.oldLogPath):
+            # Last compaction failed: keep its changes too
+            with open(self.logPath, "r") as logFile, open(self.oldLogPath, "a") as oldLogFile:
+                oldLogFile.write(logFile.read())
+                oldLogFile.flush()
+                os.fsync(oldLogFile.fileno())
+        else:
+            os.replace(self.logPath, self.oldLogPath)
+
+        self._logFile = open(self.logPath, "w")
+        self._logSize = 0
+
+    def _compact(self, snapshot, sequence):
+        """
+        Compaction thread: write snapshot, then drop
+        the old log it replaces
+        """
+        try:
+            self._writeSnapshot(snapshot, sequence)
+            os.remove(self.oldLogPath)
+        except Exception as error:
+            # The old log is kept, so nothing's lost
+            self._compactError = error
+
+    def _writeSnapshot(self, snapshot, sequence):
+        # Base names aren't part of presets' JSON
+        baseNames = {group.name: group.baseName for group in snapshot.groups
+                     if group.baseName != group.name}
+        _writeFile(self.snapshotPath, '{"sequence": %d, "baseNames": %s, "preset": %s}'
+                   % (sequence, json.dumps(baseNames), snapshot.jsonPreset))
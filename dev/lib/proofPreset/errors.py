@@ -7,3 +7,24 @@ class XMLtagError(Exception):
 
 class ProofPresetError(Exception):
     pass
+
+class ReadOnlyError(ProofPresetError, TypeError):
+    """
+    Raised when trying to change a read-only view
+    """
+    pass
+
+class PresetValidationError(ProofPresetError):
+    """
+    Raised with every problem found in an imported preset.
+    issues is a list of validation.ValidationIssue()
+    """
+    def __init__(self, issues):
+        self.issues = list(issues)
+        lines = []
+        for groupIndex, field, message in self.issues:
+            where = "preset" if groupIndex is None else "group %d" % groupIndex
+            if field is not None:
+                where += " %s" % field
+            lines.append("%s: %s" % (where, message))
+        super().__init__("Invalid preset (%d issues):\n%s" % (len(lines), "\n".join(lines)))
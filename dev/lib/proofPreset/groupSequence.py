@@ -0,0 +1,281 @@
+"""
+List-like container for a preset's groups
+
+A plain list pays O(n) for every insert, pop or move in
+the middle, so reordering many groups one by one (eg.
+sorting 100k groups with moveGroup()) is quadratic.
+
+GroupSequence keeps items in blocks of a few hundred items
+and a Fenwick tree of block lengths, so finding an index,
+inserting, deleting and moving are O(log n) (plus a small
+copy within one block). Iterating is as cheap as a list.
+
+It behaves like a list (indexing, slicing, len(), iteration,
+insert / pop / remove / index, comparison with lists), so
+callers and vanilla Lists don't need to know.
+
+Run `python -m proofPreset.benchmarks` for timings
+against a list.
+"""
+
+import itertools
+from collections.abc import MutableSequence
+
+class GroupSequence(MutableSequence):
+    """
+    A list-like sequence with O(log n) insert,
+    delete, move and index lookup.
+
+    Extra methods:
+    - move(currentIndex, newIndex)
+    - weightBefore(index)
+
+    Subclasses can set _getWeight(item) -> number: weights
+    are summed per block too, so weightBefore(index) (eg.
+    how many marked items come before index) is O(log n).
+    """
+    # Blocks are split when they reach twice this size
+    _loadFactor = 256
+
+    _getWeight = None
+
+    def __init__(self, items=()):
+        self._setItems(list(items))
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        blockIndex, offset = self._locate(index)
+        return self._blocks[blockIndex][offset]
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            items = list(self)
+            items[index] = value
+            self._setItems(items)
+            return
+        blockIndex, offset = self._locate(index)
+        block = self._blocks[blockIndex]
+        if self._getWeight is not None:
+            self._updateTree(blockIndex, 0, self._getWeight(value) - self._getWeight(block[offset]))
+        block[offset] = value
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            items = list(self)
+            del items[index]
+            self._setItems(items)
+            return
+        blockIndex, offset = self._locate(index)
+        block = self._blocks[blockIndex]
+        weight = 0 if self._getWeight is None else self._getWeight(block[offset])
+        del block[offset]
+        self._length -= 1
+
+        if block:
+            self._updateTree(blockIndex, -1, -weight)
+        else:
+            self._totalWeight -= weight
+            del self._blocks[blockIndex]
+            self._buildTree()
+
+    def insert(self, index, value):
+        """
+        Insert value before index (like list.insert(),
+        out of range indices are clamped)
+        """
+        if index < 0:
+            index = max(index + self._length, 0)
+        index = min(index, self._length)
+
+        if index == self._length:
+            blockIndex = len(self._blocks) - 1
+            if blockIndex < 0:
+                self._blocks.append([])
+                self._buildTree()
+                blockIndex = 0
+            offset = len(self._blocks[blockIndex])
+        else:
+            blockIndex, offset = self._locate(index)
+
+        block = self._blocks[blockIndex]
+        block.insert(offset, value)
+        self._length += 1
+
+        if len(block) >= 2 * self._loadFactor:
+            self._blocks[blockIndex:blockIndex + 1] = [block[:self._loadFactor],
+                                                       block[self._loadFactor:]]
+            self._buildTree()
+        else:
+            weight = 0 if self._getWeight is None else self._getWeight(value)
+            self._updateTree(blockIndex, 1, weight)
+
+    def append(self, value):
+        self.insert(self._length, value)
+
+    def extend(self, values):
+        values = list(values)
+        if not values:
+            return
+        if self._blocks and len(self._blocks[-1]) + len(values) < 2 * self._loadFactor:
+            self._blocks[-1].extend(values)
+            self._length += len(values)
+            weight = 0 if self._getWeight is None else sum(map(self._getWeight, values))
+            self._updateTree(len(self._blocks) - 1, len(values), weight)
+            return
+        self._setItems(list(self) + values)
+
+    def pop(self, index=-1):
+        if not self._length:
+            raise IndexError("pop from empty GroupSequence")
+        value = self[index]
+        del self[index]
+        return value
+
+    def move(self, currentIndex, newIndex):
+        """
+        Move item at currentIndex to newIndex
+        (same as insert(newIndex, pop(currentIndex)))
+        """
+        self.insert(newIndex, self.pop(currentIndex))
+
+    def weightBefore(self, index):
+        """
+        Return sum of weights of items before index
+        (0 <= index <= len), see _getWeight
+        """
+        if index >= self._length:
+            return self._totalWeight
+        blockIndex, offset = self._locate(index)
+
+        weight = 0
+        tree = self._weightTree
+        position = blockIndex
+        while position:
+            weight += tree[position]
+            position -= position & -position
+        return weight + sum(map(self._getWeight, self._blocks[blockIndex][:offset]))
+
+    @property
+    def totalWeight(self):
+        return self._totalWeight
+
+    def index(self, value, start=0, stop=None):
+        if start < 0:
+            start = max(start + self._length, 0)
+        if stop is None:
+            stop = self._length
+        elif stop < 0:
+            stop += self._length
+
+        for index, item in enumerate(itertools.islice(self, start, stop), start):
+            if item is value or item == value:
+                return index
+        raise ValueError("%r is not in GroupSequence" % (value,))
+
+    def clear(self):
+        self._setItems([])
+
+    def sort(self, key=None, reverse=False):
+        self._setItems(sorted(self, key=key, reverse=reverse))
+
+    def reverse(self):
+        self._setItems(list(reversed(self)))
+
+    def copy(self):
+        return type(self)(self)
+
+    def __iter__(self):
+        return itertools.chain.from_iterable(self._blocks)
+
+    def __reversed__(self):
+        for block in reversed(self._blocks):
+            yield from reversed(block)
+
+    def __contains__(self, value):
+        return any(value in block for block in self._blocks)
+
+    def __eq__(self, other):
+        if isinstance(other, (list, GroupSequence)):
+            return len(self) == len(other) and list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "%s(%r)" % (type(self).__name__, list(self))
+
+    def __reduce__(self):
+        # Subclasses keep their _getWeight / _loadFactor
+        return (type(self), (list(self),))
+
+    def _setItems(self, items):
+        """
+        Replace everything with items (a list)
+        """
+        self._blocks = [items[start:start + self._loadFactor]
+                        for start in range(0, len(items), self._loadFactor)]
+        self._length = len(items)
+        self._buildTree()
+
+    def _buildTree(self):
+        """
+        Rebuild Fenwick trees of block lengths
+        (and weights) in O(blocks)
+        """
+        self._tree = _buildFenwick([len(block) for block in self._blocks])
+        if self._getWeight is None:
+            self._weightTree = None
+            self._totalWeight = 0
+        else:
+            blockWeights = [sum(map(self._getWeight, block)) for block in self._blocks]
+            self._weightTree = _buildFenwick(blockWeights)
+            self._totalWeight = sum(blockWeights)
+
+    def _updateTree(self, blockIndex, delta, weightDelta=0):
+        _addFenwick(self._tree, blockIndex + 1, delta)
+        if weightDelta:
+            _addFenwick(self._weightTree, blockIndex + 1, weightDelta)
+            self._totalWeight += weightDelta
+
+    def _locate(self, index):
+        """
+        Return (blockIndex, offset) of item at index
+        """
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("GroupSequence index out of range")
+
+        if len(self._blocks) == 1:
+            return 0, index
+
+        # Walk down the tree: find the last block whose
+        # prefix length is <= index
+        tree = self._tree
+        position = 0
+        step = 1 << (len(tree) - 1).bit_length()
+        while step:
+            nextPosition = position + step
+            if nextPosition < len(tree) and tree[nextPosition] <= index:
+                position = nextPosition
+                index -= tree[nextPosition]
+            step >>= 1
+        return position, index
+
+def _buildFenwick(values):
+    tree = [0] + values
+    size = len(tree)
+    for position in range(1, size):
+        parent = position + (position & -position)
+        if parent < size:
+            tree[parent] += tree[position]
+    return tree
+
+def _addFenwick(tree, position, delta):
+    while position < len(tree):
+        tree[position] += delta
+        position += position & -position
@@ -0,0 +1,167 @@
+"""
+Kerning pair proofs, most important pairs first
+
+Kerning (and kerning groups) are expanded to character
+pairs, ranked by how often each pair shows up in a text
+corpus, and laid out as paged ProofGroup() objects. A page
+budget caps the output, so only the top pairs get proofed.
+
+Pair frequency tables are built once per corpus and cached
+on disk as JSON, keyed by a hash of the corpus text.
+"""
+
+import hashlib
+import heapq
+import json
+import os.path
+from collections import Counter
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".proofDrawer", "cache")
+PAIR_PATTERN = "{0}{c}{c2}{1}"
+
+# In-memory copy of frequency tables read this session
+_frequencyTables = {}
+
+def getPairFrequencies(corpus, cacheDir=DEFAULT_CACHE_DIR):
+    """
+    Return dict of {"AV": count} for every
+    character pair in corpus.
+
+    corpus can be a file path or a string. The table is
+    cached in cacheDir (pass None to skip the disk cache).
+    """
+    if os.path.isfile(corpus):
+        with open(corpus, "r", encoding="utf-8") as corpusFile:
+            corpus = corpusFile.read()
+
+    corpusHash = hashlib.sha1(corpus.encode("utf-8")).hexdigest()
+    if corpusHash in _frequencyTables:
+        return _frequencyTables[corpusHash]
+
+    cachePath = None
+    if cacheDir is not None:
+        cachePath = os.path.join(cacheDir, "pairFrequencies-%s.json" % corpusHash)
+        if os.path.isfile(cachePath):
+            with open(cachePath, "r", encoding="utf-8") as cacheFile:
+                frequencies = json.load(cacheFile)
+            _frequencyTables[corpusHash] = frequencies
+            return frequencies
+
+    frequencies = dict(Counter(corpus[i:i + 2] for i in range(len(corpus) - 1)
+                               if not corpus[i:i + 2].isspace()))
+
+    if cachePath is not None:
+        os.makedirs(cacheDir, exist_ok=True)
+        # Write then rename, so a half-written file is never read
+        tempPath = cachePath + ".tmp"
+        with open(tempPath, "w", encoding="utf-8") as cacheFile:
+            json.dump(frequencies, cacheFile)
+        os.replace(tempPath, cachePath)
+
+    _frequencyTables[corpusHash] = frequencies
+    return frequencies
+
+def iterCharacterPairs(kerning, cmap, groups=None):
+    """
+    Yield (left, right, value) character pairs from kerning.
+
+    kerning is {(left, right): value}; left and right are
+    glyph names or kerning group names (keys in groups).
+    cmap is {unicode value: glyph name}. Glyphs without
+    a unicode value are skipped.
+
+    Glyph-glyph pairs (exceptions) win over group pairs.
+    """
+    groups = groups or {}
+    characters = {}
+    for unicodeValue, glyphName in cmap.items():
+        # Keep the lowest code point for double-encoded glyphs
+        if glyphName not in characters or unicodeValue < ord(characters[glyphName]):
+            characters[glyphName] = chr(unicodeValue)
+
+    def getCharacters(name):
+        if name in groups:
+            return [characters[glyphName] for glyphName in groups[name]
+                    if glyphName in characters]
+        elif name in characters:
+            return [characters[name]]
+        return []
+
+    seenPairs = set()
+    # Exceptions (plain glyph pairs) go first, so they win
+    sortedKerning = sorted(kerning.items(),
+                           key=lambda item: (item[0][0] in groups) + (item[0][1] in groups))
+
+    for (left, right), value in sortedKerning:
+        for leftCharacter in getCharacters(left):
+            for rightCharacter in getCharacters(right):
+                pair = leftCharacter + rightCharacter
+                if pair in seenPairs:
+                    continue
+                seenPairs.add(pair)
+                yield leftCharacter, rightCharacter, value
+
+def rankPairs(kerning, cmap, groups=None, frequencies=None, limit=None):
+    """
+    Return list of (left, right, value) sorted by frequency
+    (most frequent first). Without frequencies, pairs with
+    bigger kerning values come first.
+
+    If limit is given, only the top limit pairs are kept
+    (without sorting every pair).
+    """
+    frequencies = frequencies or {}
+
+    def sortKey(pair):
+        left, right, value = pair
+        return (-frequencies.get(left + right, 0), -abs(value), left, right)
+
+    pairs = iterCharacterPairs(kerning, cmap, groups)
+    if limit is None:
+        return sorted(pairs, key=sortKey)
+    return heapq.nsmallest(limit, pairs, key=sortKey)
+
+def getControl(character):
+    """
+    Return the control character used next to character
+    """
+    return "n" if character.islower() else "H"
+
+def buildKerningProof(preset, kerning, cmap, groups=None, corpus=None,
+                      maxPages=10, linesPerPage=40, pairsPerLine=4,
+                      groupName="Kerning", pattern=PAIR_PATTERN,
+                      typeSize="", leading="", cacheDir=DEFAULT_CACHE_DIR):
+    """
+    Add kerning proof pages to preset, most frequent pairs
+    first, and return the list of added groups.
+
+    Each page is one ProofGroup() of up to linesPerPage
+    lines, each line with up to pairsPerLine pairs.
+    No more than maxPages pages are added.
+
+    pattern is a format string: {c} and {c2} are the pair,
+    {0} and {1} the controls of left and right character.
+    """
+    frequencies = None
+    if corpus is not None:
+        frequencies = getPairFrequencies(corpus, cacheDir)
+
+    pairBudget = maxPages * linesPerPage * pairsPerLine
+    rankedPairs = rankPairs(kerning, cmap, groups, frequencies, limit=pairBudget)
+
+    pairStrings = [pattern.format(getControl(left), getControl(right),
+                                  c=left, c2=right)
+                   for left, right, _ in rankedPairs]
+    lines = [" ".join(pairStrings[i:i + pairsPerLine])
+             for i in range(0, len(pairStrings), pairsPerLine)]
+
+    firstIndex = len(preset.groups)
+    preset.addGroups([{
+        "name": groupName,
+        "typeSize": typeSize,
+        "leading": leading,
+        "print": True,
+        "contents": lines[pageIndex:pageIndex + linesPerPage]
+    } for pageIndex in range(0, len(lines), linesPerPage)])
+
+    return preset.groups[firstIndex:]
@@ -0,0 +1,402 @@
+"""
+SQLite-backed storage for ProofPreset objects
+
+Presets, groups and group content lines live in their own
+tables, so one group can be looked up or rewritten without
+reading or writing the rest of the library. Content lines
+are full-text indexed for searching.
+
+Tracked presets (presets loaded from or saved to a store)
+remember which groups changed, and savePreset() only
+rewrites those groups, inside a single transaction.
+"""
+
+import os.path
+import sqlite3
+
+from proofPreset import ProofPreset
+from proofPreset.errors import ProofPresetError
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS presets (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS groups (
+    presetId INTEGER NOT NULL REFERENCES presets(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    typeSize,
+    leading,
+    print INTEGER NOT NULL,
+    PRIMARY KEY (presetId, position)
+);
+CREATE INDEX IF NOT EXISTS groupsByName ON groups (name, presetId);
+CREATE TABLE IF NOT EXISTS contentLines (
+    id INTEGER PRIMARY KEY,
+    presetId INTEGER NOT NULL REFERENCES presets(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    lineNumber INTEGER NOT NULL,
+    line TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS contentLinesByGroup
+    ON contentLines (presetId, position, lineNumber);
+CREATE VIRTUAL TABLE IF NOT EXISTS contentSearch
+    USING fts5(line, content='contentLines', content_rowid='id', tokenize='%s');
+CREATE TRIGGER IF NOT EXISTS contentLinesInsert AFTER INSERT ON contentLines BEGIN
+    INSERT INTO contentSearch (rowid, line) VALUES (new.id, new.line);
+END;
+CREATE TRIGGER IF NOT EXISTS contentLinesDelete AFTER DELETE ON contentLines BEGIN
+    INSERT INTO contentSearch (contentSearch, rowid, line)
+        VALUES ('delete', old.id, old.line);
+END;
+"""
+
+class PresetStore:
+    """
+    A library of ProofPreset() objects in one SQLite file.
+
+    Preset methods:
+    - savePreset(preset)
+    - loadPreset(presetName)
+    - deletePreset(presetName)
+
+    Lookup methods:
+    - findGroups(groupName, presetName=None)
+    - searchContents(query)
+
+    Bulk methods:
+    - importJSONPresets(jsonPaths)
+    - exportJSONPresets(dirPath)
+
+    Properties:
+    - presetNames
+    """
+    def __init__(self, dbPath):
+        """
+        Open (or create) store at dbPath.
+        dbPath can be ":memory:"
+        """
+        self._connection = sqlite3.connect(dbPath)
+        self._connection.execute("PRAGMA foreign_keys = ON")
+
+        # Trigram tokenizer lets us search for any substring
+        # (eg. "|Q|"), but it only exists since SQLite 3.34
+        self._substringSearch = sqlite3.sqlite_version_info >= (3, 34, 0)
+        tokenizer = "trigram" if self._substringSearch else "unicode61"
+        self._connection.executescript(_SCHEMA % tokenizer)
+
+        # id(preset): [preset, presetId, dirty positions, observer]
+        # dirty positions is a set, or None if the whole
+        # preset has to be rewritten
+        self._tracked = {}
+
+    def close(self):
+        """
+        Stop tracking presets and close database
+        """
+        for tracked in list(self._tracked.values()):
+            self.untrack(tracked[0])
+        self._connection.close()
+
+    @property
+    def presetNames(self):
+        """
+        Return names of all stored presets
+        """
+        rows = self._connection.execute("SELECT name FROM presets ORDER BY name")
+        return [name for (name,) in rows]
+
+    def savePreset(self, preset):
+        """
+        Save preset in one transaction.
+
+        If preset is tracked by this store, only groups
+        that changed since the last save are written.
+        Otherwise, the whole preset is written (replacing any
+        stored preset with the same name) and tracked from now on.
+
+        Return the number of group positions written.
+        """
+        with self._connection:
+            return self._savePreset(preset)
+
+    def loadPreset(self, presetName):
+        """
+        Return stored preset as a (tracked) ProofPreset() object
+        """
+        presetId = self._getPresetId(presetName)
+        if presetId is None:
+            raise KeyError("Preset doesn't exist")
+
+        groups = []
+        groupRows = self._connection.execute(
+            "SELECT name, typeSize, leading, print FROM groups "
+            "WHERE presetId = ? ORDER BY position", (presetId,))
+        for name, typeSize, leading, printGroup in groupRows:
+            groups.append({
+                "name": name,
+                "typeSize": typeSize,
+                "leading": leading,
+                "print": bool(printGroup),
+                "contents": []
+            })
+
+        lineRows = self._connection.execute(
+            "SELECT position, line FROM contentLines "
+            "WHERE presetId = ? ORDER BY position, lineNumber", (presetId,))
+        for position, line in lineRows:
+            groups[position]["contents"].append(line)
+
+        preset = ProofPreset(presetName)
+        if groups:
+            # Already validated when it was saved
+            preset.importPyDict({"name": presetName, "groups": groups}, validate=False)
+
+        self._track(preset, presetId)
+        return preset
+
+    def deletePreset(self, presetName):
+        """
+        Remove preset and all its groups from store
+        """
+        presetId = self._getPresetId(presetName)
+        if presetId is None:
+            raise KeyError("Preset doesn't exist")
+
+        with self._connection:
+            self._deletePresetRows(presetId)
+
+        for tracked in list(self._tracked.values()):
+            if tracked[1] == presetId:
+                self.untrack(tracked[0])
+
+    def untrack(self, preset):
+        """
+        Stop tracking changes to preset
+        """
+        if id(preset) in self._tracked:
+            preset.removeObserver(self._tracked[id(preset)][3])
+            del self._tracked[id(preset)]
+
+    def findGroups(self, groupName, presetName=None):
+        """
+        Return list of (presetName, position) for all
+        groups named groupName. Narrow down to one preset
+        by passing presetName.
+        """
+        query = "SELECT presets.name, groups.position FROM groups "\
+                "JOIN presets ON presets.id = groups.presetId "\
+                "WHERE groups.name = ?"
+        parameters = [groupName]
+        if presetName is not None:
+            query += " AND presets.name = ?"
+            parameters.append(presetName)
+        query += " ORDER BY presets.name, groups.position"
+
+        return self._connection.execute(query, parameters).fetchall()
+
+    def searchContents(self, query):
+        """
+        Return list of (presetName, groupName, position, line)
+        for all content lines that contain query.
+        """
+        select = "SELECT presets.name, groups.name, groups.position, "\
+                 "contentLines.line FROM contentLines "\
+                 "JOIN groups ON groups.presetId = contentLines.presetId "\
+                 "AND groups.position = contentLines.position "\
+                 "JOIN presets ON presets.id = contentLines.presetId "
+        order = " ORDER BY presets.name, groups.position, contentLines.lineNumber"
+
+        # Trigrams can't match queries shorter than 3 characters
+        if self._substringSearch and len(query) >= 3:
+            phrase = '"%s"' % query.replace('"', '""')
+            rows = self._connection.execute(
+                select + "WHERE contentLines.id IN "
+                "(SELECT rowid FROM contentSearch WHERE contentSearch MATCH ?)"
+                + order, (phrase,))
+        else:
+            pattern = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            rows = self._connection.execute(
+                select + "WHERE contentLines.line LIKE ? ESCAPE '\\'" + order,
+                ("%" + pattern + "%",))
+
+        # LIKE and the trigram tokenizer are case-insensitive
+        return [row for row in rows if query in row[3]]
+
+    def importJSONPresets(self, jsonPaths):
+        """
+        Import JSON preset files into the store in a single
+        transaction. jsonPaths can be a list of file paths
+        or a directory containing .json files.
+
+        Return list of imported preset names.
+        """
+        if isinstance(jsonPaths, str):
+            if not os.path.isdir(jsonPaths):
+                raise ProofPresetError("Not a directory")
+            dirPath = jsonPaths
+            jsonPaths = [os.path.join(dirPath, fileName)
+                         for fileName in sorted(os.listdir(dirPath))
+                         if os.path.splitext(fileName)[1].lower() == ".json"]
+
+        presetNames = []
+        with self._connection:
+            for jsonPath in jsonPaths:
+                preset = ProofPreset()
+                preset.importFromJSON(jsonPath)
+                self._writeWholePreset(preset)
+                presetNames.append(preset.name)
+
+        return presetNames
+
+    def exportJSONPresets(self, dirPath):
+        """
+        Export every stored preset to dirPath/presetName.json
+
+        Return list of written file paths.
+        """
+        filePaths = []
+        for presetName in self.presetNames:
+            preset = self.loadPreset(presetName)
+            self.untrack(preset)
+
+            fileName = "%s.json" % presetName.replace(os.sep, "-")
+            filePath = os.path.join(dirPath, fileName)
+            preset.exportToJSON(filePath)
+            filePaths.append(filePath)
+
+        return filePaths
+
+    def _savePreset(self, preset):
+        """
+        Write preset, without committing
+        """
+        tracked = self._tracked.get(id(preset))
+        if tracked is None or tracked[2] is None:
+            if tracked is not None:
+                # Might have been renamed since last save
+                self._deletePresetRows(tracked[1])
+            written = self._writeWholePreset(preset)
+            if tracked is None:
+                self._track(preset, self._getPresetId(preset.name))
+            else:
+                tracked[2] = set()
+            return written
+
+        presetId = tracked[1]
+        self._connection.execute("UPDATE presets SET name = ? WHERE id = ?",
+                                 (preset.name, presetId))
+
+        dirtyPositions = sorted(tracked[2])
+        groupCount = len(preset.groups)
+        for position in dirtyPositions:
+            self._deleteGroupRows(presetId, position)
+            if position < groupCount:
+                self._insertGroupRows(presetId, position, preset.groups[position])
+
+        tracked[2] = set()
+        return len(dirtyPositions)
+
+    def _writeWholePreset(self, preset):
+        """
+        Replace stored preset with the same name, without committing
+        """
+        presetId = self._getPresetId(preset.name)
+        if presetId is not None:
+            self._deletePresetRows(presetId)
+
+        cursor = self._connection.execute("INSERT INTO presets (name) VALUES (?)",
+                                          (preset.name,))
+        presetId = cursor.lastrowid
+
+        for position, group in enumerate(preset.groups):
+            self._insertGroupRows(presetId, position, group)
+
+        # Stored again under a new id: fix tracked presets
+        for tracked in self._tracked.values():
+            if tracked[0] is preset:
+                tracked[1] = presetId
+
+        return len(preset.groups)
+
+    def _insertGroupRows(self, presetId, position, group):
+        self._connection.execute(
+            "INSERT INTO groups (presetId, position, name, typeSize, leading, print) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (presetId, position, group["name"], group["typeSize"],
+             group["leading"], int(group["print"])))
+        self._connection.executemany(
+            "INSERT INTO contentLines (presetId, position, lineNumber, line) "
+            "VALUES (?, ?, ?, ?)",
+            [(presetId, position, lineNumber, line)
+             for lineNumber, line in enumerate(group["contents"])])
+
+    def _deleteGroupRows(self, presetId, position):
+        self._connection.execute(
+            "DELETE FROM contentLines WHERE presetId = ? AND position = ?",
+            (presetId, position))
+        self._connection.execute(
+            "DELETE FROM groups WHERE presetId = ? AND position = ?",
+            (presetId, position))
+
+    def _deletePresetRows(self, presetId):
+        # Delete lines explicitly, so the search index triggers fire
+        self._connection.execute("DELETE FROM contentLines WHERE presetId = ?",
+                                 (presetId,))
+        self._connection.execute("DELETE FROM presets WHERE id = ?", (presetId,))
+
+    def _getPresetId(self, presetName):
+        row = self._connection.execute("SELECT id FROM presets WHERE name = ?",
+                                       (presetName,)).fetchone()
+        return row[0] if row else None
+
+    def _track(self, preset, presetId):
+        """
+        Observe preset and collect dirty group positions
+        """
+        if id(preset) in self._tracked:
+            self._tracked[id(preset)][1] = presetId
+            return
+
+        def markDirty(info):
+            self._markDirty(preset, info)
+
+        self._tracked[id(preset)] = [preset, presetId, set(), markDirty]
+        preset.addObserver(markDirty)
+
+    def _markDirty(self, preset, info):
+        """
+        Observer callback: remember which positions
+        have to be rewritten on next save
+        """
+        tracked = self._tracked[id(preset)]
+        if tracked[2] is None:
+            return
+
+        action = info["action"]
+        groupCount = info["groupCount"]
+
+        if action == "importPreset":
+            tracked[2] = None
+        elif action == "editGroup":
+            tracked[2].add(info["index"])
+        elif action == "addGroup":
+            # Everything from the insertion point shifts down
+            tracked[2].update(range(info["index"], groupCount))
+        elif action == "removeGroup":
+            # Everything shifts up, and the last position goes away
+            tracked[2].update(range(info["index"], groupCount + 1))
+        elif action == "moveGroup":
+            start = min(info["currentIndex"], info["newIndex"])
+            end = max(info["currentIndex"], info["newIndex"])
+            tracked[2].update(range(start, end + 1))
+        elif action == "editGroups":
+            tracked[2].update(info["indices"])
+        elif action == "addGroups":
+            tracked[2].update(range(info["indices"][0], groupCount))
+        elif action == "removeGroups":
+            tracked[2].update(range(info["indices"][0], groupCount + len(info["indices"])))
+        elif action == "moveGroups":
+            indices = info["currentIndices"] + info["newIndices"]
+            tracked[2].update(range(min(indices), max(indices) + 1))
@@ -0,0 +1,134 @@
+"""
+Watch a presets directory for changed files
+
+Polls file mtimes and sizes (no inotify / FSEvents
+libraries needed). Changes are batched: the callback only
+fires once the directory has been quiet for settleTime,
+so a script regenerating many presets at once causes a
+single reload.
+"""
+
+import os
+import threading
+import time
+
+def getWatchedDirs(filePaths):
+    """
+    Return sorted absolute directories of filePaths
+    (a bare file name is in the current directory)
+    """
+    return sorted({os.path.dirname(os.path.abspath(path)) for path in filePaths})
+
+class PresetWatcher:
+    """
+    Poll dirPath every interval seconds and call
+    callback(changedPaths, removedPaths) with sorted lists
+    of file paths once a burst of changes has settled.
+
+    New files count as changed. Only files with one of
+    extensions are watched.
+
+    The callback runs on the watcher thread (or on whichever
+    thread calls poll() directly).
+    """
+    def __init__(self, dirPath, callback, interval=1.0, settleTime=None,
+                 extensions=(".json",), clock=time.monotonic):
+        self.dirPath = dirPath
+        self.callback = callback
+        self.interval = interval
+        self.settleTime = interval if settleTime is None else settleTime
+        self.extensions = tuple(ext.lower() for ext in extensions)
+
+        self._clock = clock
+        self._fileStates = self._scan()
+        self._changedPaths = set()
+        self._removedPaths = set()
+        self._lastChangeTime = None
+
+        self._stopEvent = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """
+        Start polling on a background thread
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        self._stopEvent.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop polling (pending changes are dropped)
+        """
+        self._stopEvent.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    def poll(self):
+        """
+        Scan directory once. Call callback and return
+        (changedPaths, removedPaths) if a batch of changes
+        has settled, else return None.
+        """
+        fileStates = self._scan()
+        now = self._clock()
+
+        changed = {path for path, state in fileStates.items()
+                   if self._fileStates.get(path) != state}
+        removed = set(self._fileStates) - set(fileStates)
+        self._fileStates = fileStates
+
+        if changed or removed:
+            # A file can come back within the same burst
+            self._removedPaths -= changed
+            self._changedPaths -= removed
+            self._changedPaths |= changed
+            self._removedPaths |= removed
+            self._lastChangeTime = now
+            return None
+
+        if self._lastChangeTime is None or now - self._lastChangeTime < self.settleTime:
+            return None
+
+        batch = (sorted(self._changedPaths), sorted(self._removedPaths))
+        self._changedPaths = set()
+        self._removedPaths = set()
+        self._lastChangeTime = None
+
+        self.callback(*batch)
+        return batch
+
+    def _run(self):
+        while not self._stopEvent.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as error:
+                # Keep watching, even if one reload went wrong
+                print(error)
+
+    def _scan(self):
+        """
+        Return {filePath: (mtime, size)} for watched files
+        """
+        fileStates = {}
+        try:
+            entries = list(os.scandir(self.dirPath))
+        except FileNotFoundError:
+            return fileStates
+
+        for entry in entries:
+            if os.path.splitext(entry.name)[1].lower() not in self.extensions:
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                # Deleted while scanning
+                continue
+            if entry.is_file():
+                fileStates[entry.path] = (stat.st_mtime_ns, stat.st_size)
+
+        return fileStates
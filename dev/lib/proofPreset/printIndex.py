@@ -0,0 +1,204 @@
+"""
+Printable groups of a preset, kept up to date as it changes
+
+Counting or listing the groups that will be printed used to
+mean scanning every group for its "print" flag. PrintIndex
+keeps them in preset order and updates itself from the
+preset's change infos (adds, removes, moves, edits, imports),
+so the count and page estimates are O(1) and iterating
+only visits printable groups.
+
+Alongside the groups, each group's printed height (lines x
+leading) is remembered, so totals can be adjusted when a
+single group changes.
+"""
+
+import math
+
+from proofPreset.groupSequence import GroupSequence
+
+# Same defaults as proofRender.layout
+DEFAULT_PAGE_SIZE = (595.276, 841.89)
+DEFAULT_TYPE_SIZE = 12
+
+def _toPoints(value, default):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+def getPrintedLines(group):
+    """
+    Return (lineCount, height in points) of group's
+    contents (before line wrapping), or None if the
+    group isn't printed
+    """
+    if not group["print"]:
+        return None
+    typeSize = _toPoints(group["typeSize"], DEFAULT_TYPE_SIZE)
+    leading = _toPoints(group["leading"], typeSize * 1.2)
+    lineCount = len(group["contents"])
+    return lineCount, lineCount * leading
+
+class _PrintedLines(GroupSequence):
+    """
+    getPrintedLines() of every group, in preset order:
+    weightBefore(index) is the printable index of the
+    group at index
+    """
+    @staticmethod
+    def _getWeight(printedLines):
+        return 0 if printedLines is None else 1
+
+class PrintIndex:
+    """
+    Printable groups of a list of groups.
+
+    Properties:
+    - count
+    - groups (printable groups in order, not a copy)
+    - lineCount
+    - height
+
+    Methods:
+    - groupsChanged(info, groups)
+    - rebuild(groups)
+    - getPrintableIndex(index)
+    - estimatePageCount(pageSize=DEFAULT_PAGE_SIZE, margin=36, labelSize=8)
+    """
+    # Batches touching more than 1 / _rebuildRatio
+    # of the groups rebuild from scratch instead
+    _rebuildRatio = 8
+
+    def __init__(self, groups):
+        self.rebuild(groups)
+
+    @property
+    def count(self):
+        return len(self._groups)
+
+    @property
+    def groups(self):
+        return self._groups
+
+    @property
+    def lineCount(self):
+        return self._lineCount
+
+    @property
+    def height(self):
+        return self._height
+
+    def rebuild(self, groups):
+        """
+        Index groups from scratch
+        """
+        groups = list(groups)
+        printedLines = [getPrintedLines(group) for group in groups]
+        self._printedLines = _PrintedLines(printedLines)
+        self._groups = GroupSequence(group for group, lines in zip(groups, printedLines)
+                                     if lines is not None)
+        self._lineCount = 0
+        self._height = 0
+        for lines in printedLines:
+            self._addTotals(lines, 1)
+
+    def groupsChanged(self, info, groups):
+        """
+        Update index after a change (info as posted to
+        preset observers); groups are the changed groups
+        """
+        action = info["action"]
+
+        if action == "addGroup":
+            self._insert(info["index"], groups[info["index"]])
+        elif action == "removeGroup":
+            self._remove(info["index"])
+        elif action == "moveGroup":
+            self._insert(info["newIndex"], *self._remove(info["currentIndex"]))
+        elif action == "editGroup":
+            self._update(info["index"], groups[info["index"]])
+
+        elif action.endswith("Groups") and self._isLargeBatch(info, groups):
+            self.rebuild(groups)
+        elif action == "addGroups":
+            for index in info["indices"]:
+                self._insert(index, groups[index])
+        elif action == "removeGroups":
+            for index in reversed(info["indices"]):
+                self._remove(index)
+        elif action == "moveGroups":
+            removed = [self._remove(index) for index in reversed(info["currentIndices"])]
+            removed.reverse()
+            for newIndex, (group, lines) in sorted(zip(info["newIndices"], removed),
+                                                   key=lambda item: item[0]):
+                self._insert(newIndex, group, lines)
+        elif action == "editGroups":
+            for index in set(info["indices"]):
+                self._update(index, groups[index])
+
+        else:
+            self.rebuild(groups)
+
+    def getPrintableIndex(self, index):
+        """
+        Return how many printable groups come
+        before the group at index
+        """
+        return self._printedLines.weightBefore(index)
+
+    def estimatePageCount(self, pageSize=DEFAULT_PAGE_SIZE, margin=36, labelSize=8):
+        """
+        Return estimated page count, from total height of
+        labels and lines. Long lines that wrap and space
+        left at the bottom of pages aren't counted, so
+        it's a lower bound of what's printed.
+        """
+        if not self._groups:
+            return 0
+        pageHeight = pageSize[1] - 2 * margin
+        height = self.count * labelSize * 1.5 + self._height
+        return max(1, math.ceil(height / pageHeight))
+
+    def _isLargeBatch(self, info, groups):
+        indices = info.get("indices", info.get("currentIndices", ()))
+        return len(indices) * self._rebuildRatio > len(groups)
+
+    def _insert(self, index, group, lines=False):
+        if lines is False:
+            lines = getPrintedLines(group)
+        self._printedLines.insert(index, lines)
+        if lines is not None:
+            self._groups.insert(self._printedLines.weightBefore(index), group)
+            self._addTotals(lines, 1)
+
+    def _remove(self, index):
+        """
+        Remove and return (group or None, lines)
+        """
+        printableIndex = self._printedLines.weightBefore(index)
+        lines = self._printedLines.pop(index)
+        if lines is None:
+            return None, None
+        self._addTotals(lines, -1)
+        return self._groups.pop(printableIndex), lines
+
+    def _update(self, index, group):
+        oldLines = self._printedLines[index]
+        newLines = getPrintedLines(group)
+        if newLines == oldLines:
+            return
+
+        printableIndex = self._printedLines.weightBefore(index)
+        self._printedLines[index] = newLines
+        if oldLines is not None:
+            self._addTotals(oldLines, -1)
+            del self._groups[printableIndex]
+        if newLines is not None:
+            self._addTotals(newLines, 1)
+            self._groups.insert(printableIndex, group)
+
+    def _addTotals(self, lines, sign):
+        if lines is not None:
+            self._lineCount += sign * lines[0]
+            self._height += sign * lines[1]
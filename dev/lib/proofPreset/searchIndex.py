@@ -0,0 +1,266 @@
+"""
+Inverted n-gram index over group names and contents
+of a whole preset library
+
+Each group name and content line is broken into 1- to
+3-character n-grams (lowercased). A query is answered by
+intersecting the groups listed under its n-grams and checking
+only those candidates, instead of scanning every line of
+every preset.
+
+The index observes its presets, so it's updated
+incrementally whenever a group is added, removed, edited
+or a preset is re-imported.
+"""
+
+from proofPreset.views import GroupView
+
+_GRAM_SIZE = 3
+
+class GroupSearchIndex:
+    """
+    Search index for a list of ProofPreset() objects.
+
+    Methods:
+    - addPreset(preset)
+    - removePreset(preset)
+    - searchContents(query, caseSensitive=True)
+    - searchNames(query)
+    - filterNames(names, query)
+    """
+    def __init__(self, presets=None):
+        self._presets = []
+        self._observers = {}
+
+        # id(group): (preset, group, name, grams)
+        self._groups = {}
+        # id(preset): set of id(group)
+        self._presetGroups = {}
+
+        # n-gram: set of id(group)
+        self._contentGrams = {}
+        # n-gram: set of names, name: number of groups using it
+        self._nameGrams = {}
+        self._nameCount = {}
+
+        for preset in presets or []:
+            self.addPreset(preset)
+
+    def addPreset(self, preset):
+        """
+        Index all groups in preset and keep
+        the index updated when preset changes
+        """
+        if id(preset) in self._observers:
+            return
+
+        def updateIndex(info):
+            self._updateIndex(preset, info)
+
+        self._presets.append(preset)
+        self._observers[id(preset)] = updateIndex
+        self._presetGroups[id(preset)] = set()
+        preset.addObserver(updateIndex)
+
+        self._indexPreset(preset)
+
+    def removePreset(self, preset):
+        """
+        Drop preset from index and stop observing it
+        """
+        if id(preset) not in self._observers:
+            return
+
+        preset.removeObserver(self._observers.pop(id(preset)))
+        self._unindexPreset(preset)
+        del self._presetGroups[id(preset)]
+        self._presets.remove(preset)
+
+    def searchContents(self, query, caseSensitive=True):
+        """
+        Return list of (preset, group) for all groups
+        with at least one content line containing query.
+        Groups are read-only views (see proofPreset.views).
+
+        Results are ordered by preset (in the order they
+        were added to the index), then by group position.
+        """
+        if not query:
+            return []
+
+        candidates = self._candidates(self._contentGrams, query)
+        if not candidates:
+            return []
+
+        if not caseSensitive:
+            query = query.lower()
+
+        matches = []
+        for preset in self._presets:
+            presetCandidates = candidates & self._presetGroups[id(preset)]
+            if not presetCandidates:
+                continue
+
+            matchIds = set()
+            for groupId in presetCandidates:
+                group = self._groups[groupId][1]
+                for line in group["contents"]:
+                    if not caseSensitive:
+                        line = line.lower()
+                    if query in line:
+                        matchIds.add(groupId)
+                        break
+
+            # Walk groups once to put matches in preset order
+            if matchIds:
+                matches += [(preset, GroupView(group)) for group in preset.groups
+                            if id(group) in matchIds]
+
+        return matches
+
+    def searchNames(self, query):
+        """
+        Return set of group names (across all presets)
+        containing query, ignoring case
+        """
+        if not query:
+            return set(self._nameCount)
+
+        candidates = self._candidates(self._nameGrams, query)
+        query = query.lower()
+        return {name for name in candidates if query in name.lower()}
+
+    def filterNames(self, names, query):
+        """
+        Return names (eg. ProofPreset.uniqueGroupNames)
+        that contain query, keeping their order.
+        Names that aren't indexed are checked directly.
+        """
+        if not query:
+            return list(names)
+
+        matchingNames = self.searchNames(query)
+        lowerQuery = query.lower()
+
+        filteredNames = []
+        for name in names:
+            if name in matchingNames:
+                filteredNames.append(name)
+            elif name not in self._nameCount and lowerQuery in name.lower():
+                filteredNames.append(name)
+
+        return filteredNames
+
+    def _candidates(self, gramIndex, query):
+        """
+        Return intersection of the sets stored
+        under every n-gram in query
+        """
+        grams = _getGrams(query.lower(), queryGrams=True)
+        gramSets = []
+        for gram in grams:
+            if gram not in gramIndex:
+                return set()
+            gramSets.append(gramIndex[gram])
+
+        gramSets.sort(key=len)
+        return set.intersection(*gramSets)
+
+    def _updateIndex(self, preset, info):
+        """
+        Observer callback
+        """
+        action = info["action"]
+
+        if action == "addGroup":
+            self._indexGroup(preset, info["group"])
+        elif action == "removeGroup":
+            self._unindexGroup(info["group"])
+        elif action == "editGroup":
+            if "name" in info["newValues"] or "contents" in info["newValues"]:
+                group = info["group"]
+                self._unindexGroup(group)
+                self._indexGroup(preset, group)
+        elif action == "addGroups":
+            for group in info["groups"]:
+                self._indexGroup(preset, group)
+        elif action == "removeGroups":
+            for group in info["groups"]:
+                self._unindexGroup(group)
+        elif action == "editGroups":
+            for group, newValues in zip(info["groups"], info["newValues"]):
+                if "name" in newValues or "contents" in newValues:
+                    self._unindexGroup(group)
+                    self._indexGroup(preset, group)
+        elif action == "importPreset":
+            self._unindexPreset(preset)
+            for group in info["groups"]:
+                self._indexGroup(preset, group)
+        # moveGroup(s) doesn't change anything we index
+
+    def _indexPreset(self, preset):
+        for group in preset.groups:
+            self._indexGroup(preset, group)
+
+    def _unindexPreset(self, preset):
+        for groupId in list(self._presetGroups[id(preset)]):
+            self._unindexGroup(self._groups[groupId][1])
+
+    def _indexGroup(self, preset, group):
+        groupId = id(group)
+        name = group["name"]
+
+        grams = set()
+        for line in group["contents"]:
+            grams.update(_getGrams(line.lower()))
+
+        for gram in grams:
+            self._contentGrams.setdefault(gram, set()).add(groupId)
+
+        if name not in self._nameCount:
+            self._nameCount[name] = 0
+            for gram in _getGrams(name.lower()):
+                self._nameGrams.setdefault(gram, set()).add(name)
+        self._nameCount[name] += 1
+
+        self._groups[groupId] = (preset, group, name, grams)
+        self._presetGroups[id(preset)].add(groupId)
+
+    def _unindexGroup(self, group):
+        groupId = id(group)
+        if groupId not in self._groups:
+            return
+        preset, _, name, grams = self._groups.pop(groupId)
+        self._presetGroups[id(preset)].discard(groupId)
+
+        for gram in grams:
+            groupIds = self._contentGrams[gram]
+            groupIds.discard(groupId)
+            if not groupIds:
+                del self._contentGrams[gram]
+
+        self._nameCount[name] -= 1
+        if not self._nameCount[name]:
+            del self._nameCount[name]
+            for gram in _getGrams(name.lower()):
+                names = self._nameGrams[gram]
+                names.discard(name)
+                if not names:
+                    del self._nameGrams[gram]
+
+def _getGrams(text, queryGrams=False):
+    """
+    Return set of 1- to 3-character n-grams in text.
+
+    For queries, a query that's up to 3 characters long
+    is its own n-gram; longer queries only need trigrams.
+    """
+    if queryGrams:
+        if len(text) <= _GRAM_SIZE:
+            return {text}
+        return {text[i:i + _GRAM_SIZE] for i in range(len(text) - _GRAM_SIZE + 1)}
+
+    grams = set()
+    for size in range(1, _GRAM_SIZE + 1):
+        grams.update(text[i:i + size] for i in range(len(text) - size + 1))
+    return grams
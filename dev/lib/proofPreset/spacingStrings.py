@@ -0,0 +1,132 @@
+"""
+Generate spacing / control strings for proof groups
+
+Builds lines like the ones typed by hand in proof documents:
+|H| |O| HOHOHOHO
+|A| HAHAHAOAOAOA
+|B| HBHBHBOBOBOB
+
+Patterns are format strings:
+- {c} is the character being proofed
+- {c2} is the second character of a pair
+- {0}, {1}, ... are the control characters
+
+Everything is produced lazily (generators), so even huge
+character sets or pair lists never sit in memory at once.
+Lines are rarely asked for twice, so they aren't memoized:
+what repeats is the pattern, which is compiled once per
+label / controls into a template of {c} and {c2} only.
+"""
+
+import functools
+import itertools
+
+from proofPreset import ProofGroup
+
+SPACING_PATTERN = "{0}{c}{0}{c}{0}{c}{1}{c}{1}{c}{1}{c}"
+PAIR_PATTERN = "{0}{0}{c}{c2}{0}{0}"
+LABEL = "|{c}| "
+PAIR_LABEL = ""
+
+def getControlLine(controls=("H", "O"), repeat=4):
+    """
+    Return the line introducing the controls:
+    "|H| |O| HOHOHOHO"
+    """
+    labels = " ".join("|%s|" % control for control in controls)
+    return "%s %s" % (labels, "".join(controls) * repeat)
+
+def iterSpacingLines(characters, controls=("H", "O"),
+                     pattern=SPACING_PATTERN, label=LABEL,
+                     controlLine=True):
+    """
+    Yield one spacing line per character:
+    "|A| HAHAHAOAOAOA"
+
+    If controlLine, the controls line is yielded first.
+    """
+    controls = tuple(controls)
+    if controlLine:
+        yield getControlLine(controls)
+
+    renderLine = _compileTemplate(pattern, label, controls).format
+    for character in characters:
+        yield renderLine(c=character, c2="")
+
+def iterPairLines(characters, rightCharacters=None, controls=("H",),
+                  pattern=PAIR_PATTERN, label=PAIR_LABEL):
+    """
+    Yield one line per character pair:
+    "HHAVHH"
+
+    Pairs are every character in characters followed by
+    every character in rightCharacters (characters, if not
+    given). characters can also be an iterable of
+    (left, right) pairs, with rightCharacters="pairs".
+    """
+    controls = tuple(controls)
+
+    if rightCharacters == "pairs":
+        pairs = characters
+    else:
+        if rightCharacters is None:
+            # Iterated more than once, so it can't be a generator
+            characters = rightCharacters = tuple(characters)
+        pairs = itertools.product(characters, rightCharacters)
+
+    renderLine = _compileTemplate(pattern, label, controls).format
+    for left, right in pairs:
+        yield renderLine(c=left, c2=right)
+
+def iterSpacingGroups(lines, groupName, linesPerGroup=50):
+    """
+    Yield ProofGroup() objects, each with up to
+    linesPerGroup lines from the lines iterable.
+
+    Groups are named groupName, groupName-1, groupName-2, etc.
+    """
+    lines = iter(lines)
+    count = 0
+    while True:
+        contents = list(itertools.islice(lines, linesPerGroup))
+        if not contents:
+            return
+
+        name = groupName if not count else "%s-%s" % (groupName, count)
+        yield ProofGroup({"name": name, "contents": contents})
+        count += 1
+
+def clearCache():
+    """
+    Forget all compiled patterns
+    """
+    _compileTemplate.cache_clear()
+
+def _escape(text):
+    return text.replace("{", "{{").replace("}", "}}")
+
+@functools.lru_cache(maxsize=64)
+def _compileTemplate(pattern, label, controls):
+    """
+    Return (memoized) label + pattern with controls
+    filled in, leaving {c} and {c2}
+    """
+    controls = [_escape(control) for control in controls]
+    return (label + pattern).format(*controls, c="{c}", c2="{c2}")
+
+
+if __name__ == "__main__":
+    import time
+
+    # Basic Latin through Latin Extended-B letters
+    latin = [chr(code) for code in range(0x41, 0x250) if chr(code).isalpha()]
+
+    start = time.time()
+    lineCount = 0
+    for group in iterSpacingGroups(iterPairLines(latin), "Kerning", 100):
+        lineCount += len(group.contents)
+    print("%s pair lines in %.2fs" % (lineCount, time.time() - start))
+
+    start = time.time()
+    lineCount = sum(1 for _ in iterPairLines(latin))
+    print("%s pair lines, second pass, in %.2fs" % (lineCount, time.time() - start))
@@ -0,0 +1,73 @@
+"""
+Test loading presets with asyncio
+"""
+
+from proofPreset import ProofPreset
+from proofPreset import asyncLoading
+import asyncio
+import unittest
+import os.path
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+fileDir = os.path.dirname(__file__)
+resourcesDir = os.path.join(fileDir, "resources")
+
+class TestAsyncLoading(unittest.TestCase):
+    def setUp(self):
+        self.filePaths = [
+            os.path.join(resourcesDir, "proofPresetTest.json"),
+            os.path.join(resourcesDir, "xmlProofTest.xml"),
+            os.path.join(resourcesDir, "doesNotExist.json")
+        ]
+
+    def test_loadPresets(self):
+        progressCalls = []
+
+        def progress(loadedCount, totalCount, index, result):
+            progressCalls.append((loadedCount, totalCount, index))
+
+        results = asyncio.run(asyncLoading.loadPresets(self.filePaths, progress))
+
+        self.assertIsInstance(results[0], ProofPreset)
+        self.assertEqual(results[0].name, "proofPreset1")
+        self.assertEqual(results[1].name, "xmlProofTest")
+        self.assertEqual(len(results[1].groups), 3)
+        self.assertIsInstance(results[2], Exception)
+
+        self.assertEqual(sorted(call[2] for call in progressCalls), [0, 1, 2])
+        self.assertEqual([call[0] for call in progressCalls], [1, 2, 3])
+
+    def test_cancel(self):
+        # One worker, held busy, so the other loads can't start
+        blocker = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=1)
+        executor.submit(blocker.wait)
+
+        async def loadAndCancel():
+            task = asyncio.ensure_future(
+                asyncLoading.loadPresets(self.filePaths, executor=executor))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        try:
+            asyncio.run(loadAndCancel())
+        finally:
+            blocker.set()
+            executor.shutdown()
+
+    def test_presetLoader(self):
+        loaded = []
+        loader = asyncLoading.PresetLoader(self.filePaths[:2],
+                                           lambda *args: loaded.append(args[2]))
+        loader.start().join(5)
+
+        self.assertFalse(loader.isRunning)
+        self.assertEqual(sorted(loaded), [0, 1])
+        self.assertEqual(loader.results[0].name, "proofPreset1")
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False, verbosity=1)
@@ -0,0 +1,120 @@
+"""
+Test columnar group queries
+"""
+
+from proofPreset import ProofPreset, ProofPresetError
+from proofPreset import columns
+from proofPreset.columns import Column, GroupColumns
+import random
+import unittest
+
+class TestColumns(unittest.TestCase):
+    def setUp(self):
+        randomGen = random.Random(3)
+        self.preset = ProofPreset("testPreset")
+        self.preset.addGroups([{"name": "group %d" % index,
+                                "typeSize": randomGen.choice(["", 9, 12, 24, 36]),
+                                "print": randomGen.random() < 0.5,
+                                "contents": ["HOHO"] * randomGen.randrange(6)}
+                               for index in range(200)])
+
+    def _loop(self, predicate):
+        return [index for index, group in enumerate(self.preset.groups)
+                if predicate(group)]
+
+    def test_selectMatchesLoop(self):
+        actual = self.preset.selectGroups((Column("typeSize") >= 24) & Column("print"))
+        expected = self._loop(lambda group: group.typeSize != "" and
+                              group.typeSize >= 24 and group.print)
+        self.assertEqual(actual, expected)
+
+        actual = self.preset.selectGroups((Column("lineCount") > 3) | ~Column("typeSize"))
+        expected = self._loop(lambda group: len(group.contents) > 3 or group.typeSize == "")
+        self.assertEqual(actual, expected)
+
+        actual = self.preset.filterGroups(Column("characterCount") == 20)
+        expected = [group for group in self.preset.groups if len(group.contents) == 5]
+        self.assertTrue(expected)
+        self.assertTrue(all(group is expectedGroup
+                            for group, expectedGroup in zip(actual, expected)))
+
+    def test_columnsFollowChanges(self):
+        condition = Column("typeSize") == 72
+        self.assertEqual(self.preset.selectGroups(condition), [])
+        columnsBefore = self.preset.columns
+
+        self.preset.editGroups([3, 5], {"typeSize": 72})
+        self.preset.editGroup(7, {"typeSize": 72})
+        self.assertIs(self.preset.columns, columnsBefore)
+        self.assertEqual(self.preset.selectGroups(condition), [3, 5, 7])
+
+        self.preset.moveGroup(7, 0)
+        self.assertEqual(self.preset.selectGroups(condition), [0, 4, 6])
+        self.preset.removeGroup(4)
+        self.assertEqual(self.preset.selectGroups(condition), [0, 5])
+
+    def test_structuralChangesKeepColumns(self):
+        randomGen = random.Random(5)
+        columnsBefore = self.preset.columns
+        for editIndex in range(200):
+            groupCount = len(self.preset.groups)
+            index = randomGen.randrange(groupCount)
+            operation = randomGen.randrange(6)
+            if operation == 0:
+                self.preset.addGroup({"name": "new %d" % editIndex, "typeSize": 72})
+            elif operation == 1:
+                self.preset.addGroups([{"name": "new %d-%d" % (editIndex, count), "print": True,
+                                        "contents": ["HO"] * count} for count in range(3)])
+            elif operation == 2 and groupCount > 100:
+                self.preset.removeGroups(randomGen.sample(range(groupCount), 3))
+            elif operation == 3:
+                self.preset.removeGroup(index)
+            elif operation == 4:
+                self.preset.moveGroups(sorted(randomGen.sample(range(groupCount), 3)), 10)
+            else:
+                self.preset.moveGroup(index, randomGen.randrange(groupCount))
+
+        self.assertIs(self.preset.columns, columnsBefore)
+        expected = GroupColumns(self.preset.groups, useNumpy=False)
+        for name in columns.COLUMN_NAMES:
+            actual = self.preset.columns.getColumn(name)
+            self.assertEqual(str(actual), str(expected.getColumn(name)))
+
+        # Large batches rebuild
+        self.preset.removeGroups(list(range(0, len(self.preset.groups), 2)))
+        self.assertIsNot(self.preset.columns, columnsBefore)
+        self.assertEqual(len(self.preset.columns), len(self.preset.groups))
+
+    def test_directEditsKeepColumns(self):
+        columnsBefore = self.preset.columns
+        self.preset.groups[1]["typeSize"] = 30
+        self.preset.groups[2].typeSize = 9
+        self.preset.groups[3].update(typeSize=40, print=True)
+        self.preset.groups[4].contents = ["HO"] * 9
+
+        self.assertIs(self.preset.columns, columnsBefore)
+        condition = Column("typeSize") >= 24
+        self.assertIn(1, self.preset.selectGroups(condition))
+        self.assertNotIn(2, self.preset.selectGroups(condition))
+        self.assertIn(3, self.preset.selectGroups(condition & Column("print")))
+        self.assertEqual(self.preset.selectGroups(Column("lineCount") == 9), [4])
+
+        expected = GroupColumns(self.preset.groups, useNumpy=False)
+        for name in columns.COLUMN_NAMES:
+            actual = self.preset.columns.getColumn(name)
+            self.assertEqual(str(actual), str(expected.getColumn(name)))
+
+    def test_unknownColumn(self):
+        with self.assertRaises(ProofPresetError):
+            Column("name")
+
+    @unittest.skipIf(columns.numpy is None, "NumPy isn't installed")
+    def test_numpyMatchesPurePython(self):
+        condition = ((Column("typeSize") < 20) | Column("print")) & ~(Column("lineCount") == 0)
+        numpyColumns = GroupColumns(self.preset.groups, useNumpy=True)
+        pureColumns = GroupColumns(self.preset.groups, useNumpy=False)
+        self.assertEqual(numpyColumns.select(condition), pureColumns.select(condition))
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False, verbosity=1)
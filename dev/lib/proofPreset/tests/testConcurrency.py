@@ -0,0 +1,279 @@
+"""
+Stress test edits racing with background exports
+"""
+
+from comProofDrawerUtils.listDataSource import GroupsDataSource
+from proofPreset import ProofPreset
+from proofPreset.presetStore import PresetStore
+from proofPreset.searchIndex import GroupSearchIndex
+import json
+import os.path
+import random
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+class TestConcurrency(unittest.TestCase):
+    def setUp(self):
+        self.preset = ProofPreset("testPreset")
+        self.preset.addGroups([{"name": "group %d" % index, "typeSize": 12, "leading": 12,
+                                "print": index % 2 == 0, "contents": ["HOHO %d" % index]}
+                               for index in range(100)])
+        self.randomGen = random.Random(6)
+        self.nextName = 100
+
+        # Switch threads often, so races actually happen
+        self.switchInterval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-5)
+
+    def tearDown(self):
+        sys.setswitchinterval(self.switchInterval)
+
+    def _edit(self):
+        """
+        Make one random change, like the drawer's edit,
+        move and remove buttons would
+        """
+        preset = self.preset
+        groupCount = len(preset.groups)
+        index = self.randomGen.randrange(groupCount)
+        operation = self.randomGen.randrange(6)
+
+        if operation == 0:
+            # Type size and leading always change together:
+            # a torn read would see them differ
+            size = self.randomGen.choice([9, 12, 24, 36])
+            preset.editGroup(index, {"typeSize": size, "leading": size,
+                                     "contents": ["HOHO %s" % size] * 3})
+        elif operation == 1:
+            size = self.randomGen.choice([9, 12, 24, 36])
+            preset.editGroups(self.randomGen.sample(range(groupCount), 5),
+                              {"typeSize": size, "leading": size})
+        elif operation == 2:
+            preset.moveGroup(index, self.randomGen.randrange(groupCount))
+        elif operation == 3:
+            preset.moveGroups([index], self.randomGen.randrange(groupCount))
+        elif operation == 4 and groupCount > 50:
+            preset.removeGroup(index)
+        else:
+            preset.addGroup({"name": "group %d" % self.nextName, "typeSize": 18,
+                             "leading": 18, "print": True})
+            self.nextName += 1
+
+    def test_exportsMatchVersions(self):
+        # Exact state at every version, recorded by the writer
+        states = {self.preset.version: self.preset.jsonPreset}
+        def recordState(info):
+            states[self.preset.deliveredVersion] = self.preset.jsonPreset
+        self.preset.addObserver(recordState)
+
+        stopped = threading.Event()
+        exports = []
+        def exportContinuously():
+            while not stopped.is_set():
+                snapshot = self.preset.snapshot()
+                # A slow job: edits go on in the meantime
+                time.sleep(0.001)
+                exports.append((snapshot.version, snapshot.jsonPreset))
+
+        exporter = threading.Thread(target=exportContinuously)
+        exporter.start()
+        try:
+            for _ in range(1000):
+                self._edit()
+        finally:
+            stopped.set()
+            exporter.join()
+
+        self.assertTrue(exports)
+        versions = [version for version, _ in exports]
+        self.assertEqual(versions, sorted(versions))
+        for version, jsonPreset in exports:
+            self.assertEqual(json.loads(jsonPreset), json.loads(states[version]))
+
+    def test_exportToJSONWhileEditing(self):
+        stopped = threading.Event()
+        errors = []
+        with tempfile.TemporaryDirectory() as tempDir:
+            def exportContinuously():
+                filePath = os.path.join(tempDir, "preset.json")
+                xmlPath = os.path.join(tempDir, "groups.xml")
+                while not stopped.is_set():
+                    self.preset.exportToJSON(filePath)
+                    with open(filePath) as jsonFile:
+                        groups = json.load(jsonFile)["groups"]
+                    names = [group["name"] for group in groups]
+                    if len(set(names)) != len(names):
+                        errors.append("duplicate names")
+                    if any(group["typeSize"] != group["leading"] for group in groups):
+                        errors.append("torn group")
+
+                    names = self.preset.groupNames
+                    if len(set(names)) != len(names):
+                        errors.append("duplicate names")
+
+                    self.preset.exportToXML(xmlPath)
+                    with open(xmlPath) as xmlFile:
+                        names = [block.split("\n")[1] for block in xmlFile.read().split("<group>")[1:]]
+                    if len(set(names)) != len(names):
+                        errors.append("duplicate names in XML")
+
+            exporter = threading.Thread(target=exportContinuously)
+            exporter.start()
+            try:
+                for _ in range(1000):
+                    self._edit()
+            finally:
+                stopped.set()
+                exporter.join()
+
+        self.assertEqual(errors, [])
+
+    def test_editsWithConcurrentReaders(self):
+        infos = []
+        self.preset.addObserver(infos.append)
+        versionBefore = self.preset.version
+
+        stopped = threading.Event()
+        errors = []
+        readCounts = []
+        def snapshotContinuously():
+            readCount = 0
+            while not stopped.is_set():
+                snapshot = self.preset.snapshot()
+                if any(group["typeSize"] != group["leading"] for group in snapshot.groups):
+                    errors.append("torn group")
+                readCount += 1
+            readCounts.append(readCount)
+
+        readers = [threading.Thread(target=snapshotContinuously) for _ in range(2)]
+        for reader in readers:
+            reader.start()
+        try:
+            for _ in range(500):
+                self._edit()
+        finally:
+            stopped.set()
+            for reader in readers:
+                reader.join()
+
+        self.assertEqual(errors, [])
+        self.assertTrue(all(readCounts))
+        # Every change reached the observer, on this thread
+        self.assertEqual(len(infos), self.preset.version - versionBefore)
+        self.assertEqual(self.preset.deliveredVersion, self.preset.version)
+
+    def test_observersRunWithoutLock(self):
+        entered = threading.Event()
+        resume = threading.Event()
+        versions = []
+        def slowObserver(info):
+            versions.append(self.preset.deliveredVersion)
+            entered.set()
+            resume.wait()
+        self.preset.addObserver(slowObserver)
+
+        writer = threading.Thread(target=self.preset.editGroup, args=(0, {"typeSize": 72}))
+        writer.start()
+        entered.wait()
+        try:
+            # The slow observer doesn't hold the lock:
+            # reads and other edits go on
+            self.assertTrue(self.preset._lock.acquire(blocking=False))
+            self.preset._lock.release()
+            self.assertEqual(self.preset.snapshot().groups[0].typeSize, 72)
+            self.preset.editGroup(0, {"typeSize": 96})
+            self.assertEqual(versions, [self.preset.version - 1])
+        finally:
+            resume.set()
+            writer.join()
+
+        # The second change was delivered after the first
+        self.assertEqual(versions, [self.preset.version - 1, self.preset.version])
+
+    def test_snapshotIsCopyOnWrite(self):
+        snapshot = self.preset.snapshot()
+        self.preset.editGroup(0, {"typeSize": 72})
+        self.preset.editGroup(0, {"typeSize": 96})
+        self.assertEqual(snapshot.groups[0].typeSize, 12)
+        self.assertEqual(self.preset.groups[0].typeSize, 96)
+        self.assertEqual(snapshot.version + 2, self.preset.version)
+
+        # Only the changed group was copied
+
+        # Dropped snapshots stop collecting copies
+        del snapshot
+        self.preset.editGroup(1, {"typeSize": 72})
+        self.assertEqual(len(self.preset._snapshots), 0)
+
+    def test_observersSeeTheirOwnChange(self):
+        preset = self.preset
+
+        # Makes two more changes while the first one is
+        # delivered: observers after it get the first one
+        # with the preset already two versions ahead
+        def moveAndRemove(info):
+            if info["action"] == "editGroup":
+                preset.moveGroup(info["index"], 0)
+                preset.removeGroup(len(preset.groups) - 1)
+        preset.addObserver(moveAndRemove)
+
+        searchIndex = GroupSearchIndex([preset])
+        store = PresetStore(":memory:")
+        store.savePreset(preset)
+        dataSource = GroupsDataSource(lambda: preset.groups)
+        preset.addObserver(dataSource.groupsChanged)
+        for index in range(len(preset.groups)):
+            dataSource.rowAt(index)
+        seen = []
+        preset.addObserver(lambda info: seen.append((preset.deliveredVersion, info["action"],
+                                                     info["groupCount"])))
+
+        version = preset.version
+        preset.editGroup(5, {"name": "renamed", "contents": ["XYZ"]})
+        self.assertEqual(seen, [(version + 1, "editGroup", 100),
+                                (version + 2, "moveGroup", 100),
+                                (version + 3, "removeGroup", 99)])
+
+        # The renamed group was indexed, not the one at index 5 by then
+        self.assertEqual([group.name for _, group in searchIndex.searchContents("XYZ")],
+                         ["renamed"])
+        freshIndex = GroupSearchIndex([preset])
+        self.assertEqual([group.name for _, group in searchIndex.searchContents("HOHO")],
+                         [group.name for _, group in freshIndex.searchContents("HOHO")])
+
+        store.savePreset(preset)
+        self.assertEqual(store.loadPreset("testPreset").groupNames, preset.groupNames)
+        self.assertEqual([dataSource.valueAt(index, "name") for index in range(len(dataSource))],
+                         preset.groupNames)
+        store.close()
+
+    def test_directChangesKeepSnapshots(self):
+        snapshot = self.preset.snapshot()
+        group = self.preset.groups[0]
+        group.typeSize = 72
+        group["leading"] = 72
+        group.update(contents=["OHO"])
+        self.assertEqual(snapshot.groups[0].typeSize, 12)
+        self.assertEqual(snapshot.groups[0].leading, 12)
+        self.assertEqual(snapshot.groups[0].contents, ["HOHO 0"])
+        self.assertEqual(self.preset.groups[0].contents, ["OHO"])
+
+        # Groups of a duplicate belong to the duplicate
+        duplicate = self.preset.duplicatePreset()
+        duplicateSnapshot = duplicate.snapshot()
+        duplicate.groups[1].typeSize = 72
+        self.assertEqual(duplicateSnapshot.groups[1].typeSize, 12)
+
+    def test_duplicateHasItsOwnLock(self):
+        self.preset.snapshot()
+        duplicate = self.preset.duplicatePreset()
+        self.assertIsNot(duplicate._lock, self.preset._lock)
+        duplicate.editGroup(0, {"typeSize": 72})
+        self.assertEqual(self.preset.groups[0].typeSize, 12)
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False, verbosity=1)
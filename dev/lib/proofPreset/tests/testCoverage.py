@@ -0,0 +1,56 @@
+"""
+Test character coverage of proof groups
+"""
+
+from proofPreset import ProofPreset, ProofGroup
+from proofPreset import coverage
+import unittest
+
+class TestCoverage(unittest.TestCase):
+    def setUp(self):
+        self.preset = ProofPreset("testPreset")
+        self.preset.addGroup({"name": "UC", "print": True,
+                              "contents": ["ABC DEF"]})
+        self.preset.addGroup({"name": "lc", "contents": ["abc"]})
+        self.preset.addGroup({"name": "extended", "print": True,
+                              "contents": ["AƏB", "|Ə| HƏH"]})
+
+        self.cmap = {ord(char): "glyph" for char in "ABCDEFHabc|"}
+
+    def test_characterSet(self):
+        group = ProofGroup({"name": "test", "contents": ["|H| HOH", "  OO"]})
+        self.assertEqual(group.characterSet, frozenset("|HO"))
+
+    def test_characterSetCachedUntilContentsChange(self):
+        group = self.preset.groups[0]
+        self.assertIs(group.characterSet, group.characterSet)
+
+        self.preset.editGroup(0, {"contents": ["XYZ"]})
+        self.assertEqual(group.characterSet, frozenset("XYZ"))
+
+        group.name = "renamed"
+        self.assertEqual(group.characterSet, frozenset("XYZ"))
+
+    def test_coverageReport(self):
+        report = coverage.getCoverageReport(self.preset, self.cmap)
+
+        self.assertEqual([item["missing"] for item in report], [[], [], ["Ə"]])
+        self.assertEqual(report[2]["name"], "extended")
+        self.assertAlmostEqual(report[2]["coverage"], 4 / 5)
+
+    def test_renderableGroups(self):
+        actual = [group.name for group in
+                  coverage.getRenderableGroups(self.preset, self.cmap)]
+        self.assertEqual(actual, ["UC", "lc"])
+
+        actual = [group.name for group in
+                  coverage.getRenderableGroups(self.preset, self.cmap,
+                                               onlyPrinted=True)]
+        self.assertEqual(actual, ["UC"])
+
+        self.assertEqual(coverage.getUnrenderableGroupIndices(self.preset, self.cmap),
+                         [2])
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False, verbosity=1)
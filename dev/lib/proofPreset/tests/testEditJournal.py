@@ -0,0 +1,135 @@
+"""
+Test undo / redo journal
+"""
+
+from proofPreset import ProofPreset, ProofPresetError
+from proofPreset.editJournal import EditJournal
+import unittest
+
+class TestEditJournal(unittest.TestCase):
+    def setUp(self):
+        self.preset = ProofPreset("testPreset")
+        self.preset.addGroup({"name": "group1", "contents": ["abcde"]})
+        self.preset.addGroup({"name": "group2", "contents": ["fghij"]})
+        self.preset.addGroup({"name": "group3", "contents": ["klmno"]})
+
+        self.journal = EditJournal(self.preset)
+
+    def test_undoRedoAddGroup(self):
+        before = self.preset.shortGroups
+        self.preset.addGroup({"name": "group4"})
+        after = self.preset.shortGroups
+
+        self.journal.undo()
+        self.assertEqual(self.preset.shortGroups, before)
+
+        self.journal.redo()
+        self.assertEqual(self.preset.shortGroups, after)
+
+    def test_undoRemoveGroup(self):
+        before = self.preset.shortGroups
+        self.preset.removeGroup(1)
+        self.preset.removeGroup("group3")
+
+        self.journal.undo()
+        self.journal.undo()
+        self.assertEqual(self.preset.shortGroups, before)
+
+    def test_negativeIndices(self):
+        before = self.preset.shortGroups
+        self.preset.removeGroup(-1)
+        self.assertEqual(self.preset.groupNames, ["group1", "group2"])
+        self.journal.undo()
+        self.assertEqual(self.preset.shortGroups, before)
+
+        # Out of range: nothing wraps around
+        with self.assertRaises(IndexError):
+            self.preset.removeGroup(-4)
+        with self.assertRaises(IndexError):
+            self.preset.editGroup(-100, {"typeSize": 12})
+        self.assertEqual(self.preset.shortGroups, before)
+        self.assertFalse(self.journal.canUndo)
+
+    def test_undoMoveGroup(self):
+        before = self.preset.groupNames
+        self.preset.moveGroup(-1, 0)
+        self.assertEqual(self.preset.groupNames, ["group3", "group1", "group2"])
+
+        self.journal.undo()
+        self.assertEqual(self.preset.groupNames, before)
+
+        self.journal.redo()
+        self.assertEqual(self.preset.groupNames, ["group3", "group1", "group2"])
+
+    def test_undoEditGroup(self):
+        self.preset.editGroup(0, {"name": "UC", "typeSize": 12,
+                                  "contents": ["ABC"]})
+        self.journal.undo()
+
+        expected = {
+            "name": "group1",
+            "typeSize": "",
+            "leading": "",
+            "print": False,
+            "contents": ["abcde"]
+        }
+        self.assertEqual(self.preset.groups[0], expected)
+
+        self.journal.redo()
+        self.assertEqual(self.preset.groups[0].contents, ["ABC"])
+        self.assertEqual(self.preset.groups[0].typeSize, 12)
+
+    def test_undoBatches(self):
+        before = self.preset.preset
+        self.preset.addGroups([{"name": "group1"}, {"name": "group5"}])
+        self.preset.moveGroups([0, 3, 4], 1)
+        self.preset.editGroups([0, 1, 2], {"typeSize": 10, "print": True})
+        self.preset.removeGroups([1, 4])
+        after = self.preset.duplicatePreset().preset
+
+        for _ in range(4):
+            self.journal.undo()
+        self.assertEqual(self.preset.preset, before)
+        self.assertEqual(self.preset.groupNames, ["group1", "group2", "group3"])
+
+        for _ in range(4):
+            self.journal.redo()
+        self.assertEqual(self.preset.groups, after["groups"])
+
+    def test_newEditClearsRedo(self):
+        self.preset.removeGroup(0)
+        self.journal.undo()
+        self.preset.moveGroup(0, 1)
+
+        self.assertFalse(self.journal.canRedo)
+        with self.assertRaises(ProofPresetError):
+            self.journal.redo()
+
+    def test_importClearsJournal(self):
+        self.preset.removeGroup(0)
+        self.preset.importPyDict({"name": "new", "groups": [{"name": "a"}]},
+                                 overwrite=True)
+        self.assertFalse(self.journal.canUndo)
+
+    def test_evictOldest(self):
+        journal = EditJournal(self.preset, maxSize=2000)
+        for count in range(50):
+            self.preset.editGroup(0, {"contents": ["x" * 100, str(count)]})
+
+        self.assertLessEqual(journal.size, 2000)
+        self.assertTrue(journal.canUndo)
+
+        # Undo everything left: oldest changes are gone,
+        # so we can't get back to the original contents
+        while journal.canUndo:
+            journal.undo()
+        self.assertNotEqual(self.preset.groups[0].contents, ["abcde"])
+
+    def test_detach(self):
+        self.journal.detach()
+        self.preset.removeGroup(0)
+        self.assertFalse(self.journal.canUndo)
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False, verbosity=1)
@@ -0,0 +1,139 @@
+"""
+Test write-ahead edit log and crash recovery
+"""
+
+from proofPreset import ProofPreset
+from proofPreset.editJournal import EditJournal
+from proofPreset.editLog import EditLog, recoverPreset
+import json
+import os.path
+import random
+import tempfile
+import unittest
+
+class SnapshotCrashEditLog(EditLog):
+    # Crash while compacting, before the snapshot is written
+    def _compact(self, snapshot, sequence):
+        pass
+
+class CleanupCrashEditLog(EditLog):
+    # Crash while compacting, after the snapshot is written
+    def _compact(self, snapshot, sequence):
+        self._writeSnapshot(snapshot, sequence)
+
+class TestEditLog(unittest.TestCase):
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.snapshotPath = os.path.join(self.tempDir.name, "preset.autosave")
+
+        self.preset = ProofPreset("testPreset")
+        self.preset.addGroups([{"name": "group %d" % index, "typeSize": 12,
+                                "print": index % 2 == 0, "contents": ["HOHO"]}
+                               for index in range(20)])
+        self.randomGen = random.Random(7)
+
+    def tearDown(self):
+        self.tempDir.cleanup()
+
+    def _edit(self, count):
+        preset = self.preset
+        journal = EditJournal(preset)
+        for editIndex in range(count):
+            groupCount = len(preset.groups)
+            index = self.randomGen.randrange(groupCount)
+            operation = self.randomGen.randrange(7)
+            if operation == 0:
+                preset.editGroup(index, {"typeSize": self.randomGen.choice([9, 24]),
+                                         "contents": ["HOHO %d" % editIndex]})
+            elif operation == 1:
+                preset.editGroups(self.randomGen.sample(range(groupCount), 3), {"print": True})
+            elif operation == 2:
+                preset.moveGroups(self.randomGen.sample(range(groupCount), 2), 0)
+            elif operation == 3 and groupCount > 10:
+                preset.removeGroups(self.randomGen.sample(range(groupCount), 2))
+            elif operation == 4:
+                preset.addGroups([{"name": "group %d" % index}, {"name": "new %d" % editIndex}])
+            elif operation == 5 and journal.canUndo:
+                journal.undo()
+            else:
+                preset.moveGroup(index, self.randomGen.randrange(groupCount))
+        journal.detach()
+
+    def assertRecovered(self):
+        recoveredPreset = recoverPreset(self.snapshotPath)
+        self.assertEqual(json.loads(recoveredPreset.jsonPreset), json.loads(self.preset.jsonPreset))
+        self.assertEqual(sorted(recoveredPreset.uniqueGroupNames),
+                         sorted(self.preset.uniqueGroupNames))
+
+    def test_recoverAfterCrash(self):
+        EditLog(self.preset, self.snapshotPath, syncInterval=None)
+        self._edit(200)
+        # No close(): whatever was logged must be enough
+        self.assertRecovered()
+
+    def test_compaction(self):
+        editLog = EditLog(self.preset, self.snapshotPath, compactSize=2000, syncInterval=None)
+        self._edit(300)
+        self.assertRecovered()
+
+        # Compacted along the way (in the background)
+        editLog._compactThread.join()
+        with open(self.snapshotPath) as snapshotFile:
+            self.assertGreater(json.load(snapshotFile)["sequence"], 0)
+
+        editLog.compact(wait=True)
+        self.assertFalse(os.path.exists(editLog.oldLogPath))
+        self.assertEqual(editLog.logSize, 0)
+        self.assertRecovered()
+
+    def test_crashWhileCompacting(self):
+        for editLogClass in (SnapshotCrashEditLog, CleanupCrashEditLog):
+            editLog = editLogClass(self.preset, self.snapshotPath, syncInterval=None)
+            self._edit(50)
+            editLog.compact(wait=True)
+            self.assertTrue(os.path.exists(editLog.oldLogPath))
+            self._edit(50)
+            self.assertRecovered()
+
+            # The next compaction keeps the old log's changes
+            editLog.compact(wait=True)
+            self._edit(10)
+            self.assertRecovered()
+            editLog.close(removeFiles=True)
+
+    def test_cutOffLine(self):
+        editLog = EditLog(self.preset, self.snapshotPath, syncInterval=None)
+        self._edit(20)
+        jsonPreset = self.preset.jsonPreset
+
+        self.preset.editGroup(0, {"typeSize": 72})
+        # Crash in the middle of the last line
+        with open(editLog.logPath, "r+") as logFile:
+            logFile.truncate(os.path.getsize(editLog.logPath) - 10)
+
+        recoveredPreset = recoverPreset(self.snapshotPath)
+        self.assertEqual(json.loads(recoveredPreset.jsonPreset), json.loads(jsonPreset))
+
+    def test_importAndClose(self):
+        editLog = EditLog(self.preset, self.snapshotPath)
+        self._edit(10)
+        self.preset.importPyDict({"name": "other", "groups": [{"name": "X"}]}, overwrite=True)
+        self.preset.addGroup({"name": "Y"})
+        self.assertRecovered()
+        self.assertEqual(editLog.changeCount, 12)
+
+        editLog.close()
+        self.assertEqual(os.path.getsize(editLog.logPath), 0)
+        self.assertRecovered()
+
+        # Closed: changes aren't logged anymore
+        self.preset.addGroup({"name": "Z"})
+        self.assertEqual(recoverPreset(self.snapshotPath).groupNames, ["X", "Y"])
+
+        EditLog(self.preset, self.snapshotPath).close(removeFiles=True)
+        self.assertEqual(os.listdir(self.tempDir.name), [])
+        self.assertIsNone(recoverPreset(self.snapshotPath))
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False, verbosity=1)
@@ -0,0 +1,156 @@
+"""
+Test order-statistic group sequence
+"""
+
+from proofPreset import ProofGroup, ProofPreset
+from proofPreset.groupSequence import GroupSequence
+import copy
+import json
+import pickle
+import random
+import unittest
+
+class SmallBlocksSequence(GroupSequence):
+    # Tiny blocks, so a few items already span many of them
+    _loadFactor = 4
+
+class MarkedSequence(SmallBlocksSequence):
+    @staticmethod
+    def _getWeight(item):
+        return 1 if item < 0 else 0
+
+class TestGroupSequence(unittest.TestCase):
+    def test_listBehaviour(self):
+        items = list("abcdefghij")
+        sequence = SmallBlocksSequence(items)
+
+        self.assertEqual(sequence, items)
+        self.assertEqual(len(sequence), 10)
+        self.assertEqual(sequence[7], "h")
+        self.assertEqual(sequence[-1], "j")
+        self.assertEqual(sequence[2:5], ["c", "d", "e"])
+        self.assertEqual(list(reversed(sequence)), items[::-1])
+        self.assertIn("e", sequence)
+        self.assertEqual(sequence.index("f"), 5)
+        with self.assertRaises(IndexError):
+            sequence[10]
+        with self.assertRaises(ValueError):
+            sequence.index("z")
+
+        sequence.move(0, 9)
+        sequence.remove("e")
+        sequence[:2] = ["X"]
+        self.assertEqual(sequence, ["X", "d", "f", "g", "h", "i", "j", "a"])
+        self.assertEqual(sequence.pop(), "a")
+        self.assertEqual(sequence.pop(0), "X")
+
+    def test_matchesList(self):
+        randomGen = random.Random(1)
+        items = list(range(30))
+        sequence = SmallBlocksSequence(items)
+
+        for _ in range(2000):
+            operation = randomGen.randrange(5)
+            count = len(items)
+            if operation == 0:
+                index = randomGen.randint(-count - 2, count + 2)
+                items.insert(index, -1)
+                sequence.insert(index, -1)
+            elif operation == 1 and count:
+                index = randomGen.randrange(-count, count)
+                self.assertEqual(sequence.pop(index), items.pop(index))
+            elif operation == 2 and count:
+                currentIndex = randomGen.randrange(count)
+                newIndex = randomGen.randrange(count)
+                items.insert(newIndex, items.pop(currentIndex))
+                sequence.move(currentIndex, newIndex)
+            elif operation == 3:
+                newItems = list(range(randomGen.randrange(10)))
+                items.extend(newItems)
+                sequence.extend(newItems)
+            elif operation == 4 and count:
+                index = randomGen.randrange(count)
+                self.assertEqual(sequence[index], items[index])
+
+        self.assertEqual(list(sequence), items)
+
+    def test_weightBefore(self):
+        randomGen = random.Random(2)
+        items = [randomGen.choice([-1, 1]) for _ in range(40)]
+        sequence = MarkedSequence(items)
+
+        for _ in range(500):
+            count = len(items)
+            operation = randomGen.randrange(3)
+            if operation == 0:
+                index = randomGen.randint(0, count)
+                value = randomGen.choice([-1, 1])
+                items.insert(index, value)
+                sequence.insert(index, value)
+            elif operation == 1 and count:
+                index = randomGen.randrange(count)
+                self.assertEqual(sequence.pop(index), items.pop(index))
+            elif count:
+                index = randomGen.randrange(count)
+                items[index] = sequence[index] = -items[index]
+
+            index = randomGen.randint(0, len(items))
+            self.assertEqual(sequence.weightBefore(index),
+                             sum(1 for item in items[:index] if item < 0))
+        self.assertEqual(sequence.totalWeight, items.count(-1))
+
+    def test_copySubclass(self):
+        sequence = MarkedSequence([-1, 1, -1, 1, 1, -1, -1, 1, 1])
+        for copiedSequence in (sequence.copy(), copy.copy(sequence), copy.deepcopy(sequence),
+                               pickle.loads(pickle.dumps(sequence))):
+            self.assertIs(type(copiedSequence), MarkedSequence)
+            self.assertEqual(copiedSequence, sequence)
+            copiedSequence.insert(1, -1)
+            self.assertEqual(copiedSequence.weightBefore(5), 3)
+
+    def test_presetGroups(self):
+        preset = ProofPreset("testPreset")
+        preset.addGroups([{"name": name} for name in "ABCD"])
+        self.assertIsInstance(preset.groups, GroupSequence)
+
+        preset.moveGroup(0, 3)
+        self.assertEqual(preset.groupNames, ["B", "C", "D", "A"])
+        self.assertEqual(json.loads(preset.jsonPreset)["groups"][3]["name"], "A")
+
+        duplicate = preset.duplicatePreset()
+        duplicate.removeGroup("C")
+        self.assertEqual(duplicate.groupNames, ["B", "D", "A"])
+        self.assertEqual(copy.deepcopy(preset.groups), preset.groups)
+
+    def test_smallBatchesEditInPlace(self):
+        preset = ProofPreset("testPreset")
+        preset.addGroups([{"name": "group %d" % index} for index in range(100)])
+        names = preset.groupNames
+        groups = preset.groups
+        rebuilds = []
+        setItems = groups._setItems
+        groups._setItems = lambda items: (rebuilds.append(len(items)), setItems(items))
+
+        preset.removeGroups([3, 50, 99])
+        for index in (99, 50, 3):
+            del names[index]
+        preset.moveGroups([1, 2, 60], 40)
+        movedNames = [names[index] for index in (1, 2, 60)]
+        names = [name for name in names if name not in movedNames]
+        names[40:40] = movedNames
+        preset.applyChange({"action": "addGroups", "indices": [0, 5],
+                            "groups": [ProofGroup({"name": "X"}), ProofGroup({"name": "Y"})]})
+        names.insert(0, "X")
+        names.insert(5, "Y")
+        self.assertEqual(preset.groupNames, names)
+        self.assertEqual(rebuilds, [])
+
+        # Large batches are rebuilt in one pass
+        preset.removeGroups(list(range(0, 90, 2)))
+        self.assertEqual(rebuilds, [len(names) - 45])
+        self.assertEqual(preset.groupNames, [name for index, name in enumerate(names)
+                                             if index % 2 or index >= 90])
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False, verbosity=1)
@@ -0,0 +1,80 @@
+"""
+Test frequency-ordered kerning proofs
+"""
+
+from proofPreset import ProofPreset
+from proofPreset import kerningProof as kp
+import unittest
+import os.path
+import tempfile
+
+class TestKerningProof(unittest.TestCase):
+    def setUp(self):
+        self.cmap = {ord(char): char for char in "AVTOQoa"}
+        self.cmap[ord(".")] = "period"
+        self.groups = {
+            "public.kern1.O": ["O", "Q"],
+            "public.kern2.o": ["o", "a"]
+        }
+        self.kerning = {
+            ("A", "V"): -80,
+            ("T", "public.kern2.o"): -60,
+            ("T", "a"): -40,
+            ("public.kern1.O", "A"): -20,
+            ("period", "V"): -100,
+            ("A", "notInFont"): -10
+        }
+        self.corpus = "Today Tom ate a tomato. Tall trees. OAT."
+        self.tempDir = tempfile.TemporaryDirectory()
+        kp._frequencyTables.clear()
+
+    def tearDown(self):
+        self.tempDir.cleanup()
+
+    def test_characterPairs(self):
+        actual = sorted(kp.iterCharacterPairs(self.kerning, self.cmap, self.groups))
+        expected = [
+            (".", "V", -100),
+            ("A", "V", -80),
+            ("O", "A", -20),
+            ("Q", "A", -20),
+            ("T", "a", -40), # exception wins over group value
+            ("T", "o", -60)
+        ]
+        self.assertEqual(actual, expected)
+
+    def test_pairFrequenciesCached(self):
+        frequencies = kp.getPairFrequencies(self.corpus, self.tempDir.name)
+        self.assertEqual(frequencies["To"], 2)
+        self.assertNotIn("  ", frequencies)
+        self.assertEqual(len(os.listdir(self.tempDir.name)), 1)
+
+        # Same table again, straight from cache
+        kp._frequencyTables.clear()
+        self.assertEqual(kp.getPairFrequencies(self.corpus, self.tempDir.name),
+                         frequencies)
+
+    def test_rankPairs(self):
+        frequencies = {"To": 2, "OA": 1}
+        ranked = kp.rankPairs(self.kerning, self.cmap, self.groups, frequencies)
+        self.assertEqual([left + right for left, right, _ in ranked],
+                         ["To", "OA", ".V", "AV", "Ta", "QA"])
+
+        top = kp.rankPairs(self.kerning, self.cmap, self.groups, frequencies, limit=2)
+        self.assertEqual(top, ranked[:2])
+
+    def test_buildKerningProof(self):
+        preset = ProofPreset("kerning")
+        groups = kp.buildKerningProof(preset, self.kerning, self.cmap, self.groups,
+                                      corpus=self.corpus, maxPages=2,
+                                      linesPerPage=1, pairsPerLine=2,
+                                      cacheDir=self.tempDir.name)
+
+        self.assertEqual(preset.groupNames, ["Kerning", "Kerning-1"])
+        self.assertIs(groups[0], preset.groups[0])
+        self.assertEqual(preset.groups[0].contents, ["HTon HTan"])
+        self.assertTrue(preset.groups[0].print)
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False, verbosity=1)
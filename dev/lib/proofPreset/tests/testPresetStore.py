@@ -0,0 +1,122 @@
+"""
+Test SQLite preset store
+"""
+
+from proofPreset import ProofPreset
+from proofPreset.presetStore import PresetStore
+import unittest
+import os.path
+import tempfile
+
+fileDir = os.path.dirname(__file__)
+
+class TestPresetStore(unittest.TestCase):
+    def setUp(self):
+        self.store = PresetStore(":memory:")
+        self.jsonPath = os.path.join(fileDir, "resources", "proofPresetTest.json")
+
+        self.preset = ProofPreset()
+        self.preset.importFromJSON(self.jsonPath)
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_saveAndLoad(self):
+        self.store.savePreset(self.preset)
+        loadedPreset = self.store.loadPreset(self.preset.name)
+
+        self.assertEqual(loadedPreset.preset, self.preset.preset)
+        self.assertEqual(self.store.presetNames, [self.preset.name])
+
+    def test_saveOnlyChangedGroups(self):
+        self.store.savePreset(self.preset)
+
+        self.assertEqual(self.store.savePreset(self.preset), 0)
+
+        self.preset.editGroup(1, {"typeSize": 24, "contents": ["|Q| HQHQ"]})
+        self.assertEqual(self.store.savePreset(self.preset), 1)
+
+        self.preset.moveGroup(0, 1)
+        self.assertEqual(self.store.savePreset(self.preset), 2)
+
+        self.preset.removeGroup(0)
+        self.preset.addGroup({"name": "new group", "contents": ["abc"]})
+        self.store.savePreset(self.preset)
+
+        loadedPreset = self.store.loadPreset(self.preset.name)
+        self.assertEqual(loadedPreset.preset, self.preset.preset)
+
+    def test_saveAfterBatches(self):
+        self.store.savePreset(self.preset)
+
+        self.preset.editGroups([0, 2], {"typeSize": 24})
+        self.assertEqual(self.store.savePreset(self.preset), 2)
+
+        self.preset.addGroups([{"name": "new group", "contents": ["abc"]},
+                               {"name": "new group"}])
+        self.preset.moveGroups([0, 1], 2)
+        self.preset.removeGroups([1, -1])
+        self.store.savePreset(self.preset)
+
+        loadedPreset = self.store.loadPreset(self.preset.name)
+        self.assertEqual(loadedPreset.preset, self.preset.preset)
+
+    def test_saveRenamedPreset(self):
+        self.store.savePreset(self.preset)
+        self.preset.name = "renamed"
+        self.store.savePreset(self.preset)
+
+        self.assertEqual(self.store.presetNames, ["renamed"])
+
+    def test_findGroups(self):
+        self.store.savePreset(self.preset)
+        actual = self.store.findGroups("lc control")
+        expected = [(self.preset.name, 2)]
+
+        self.assertEqual(actual, expected)
+        self.assertEqual(self.store.findGroups("lc control", "nope"), [])
+
+    def test_searchContents(self):
+        self.store.savePreset(self.preset)
+
+        actual = self.store.searchContents("|B|")
+        expected = [(self.preset.name, "UC control", 1, "|B| HBHBHBOBOBOB")]
+        self.assertEqual(actual, expected)
+
+        # Short queries and case-sensitivity
+        actual = [row[3] for row in self.store.searchContents("nb")]
+        self.assertEqual(actual, ["|b| nbnbnbobobob"])
+
+    def test_searchAfterEdit(self):
+        self.store.savePreset(self.preset)
+        self.preset.editGroup(0, {"contents": ["|Q| HQHQHQ"]})
+        self.store.savePreset(self.preset)
+
+        self.assertEqual(len(self.store.searchContents("|Q|")), 1)
+        self.assertEqual(self.store.searchContents("0123456789"), [])
+
+    def test_deletePreset(self):
+        self.store.savePreset(self.preset)
+        self.store.deletePreset(self.preset.name)
+
+        self.assertEqual(self.store.presetNames, [])
+        self.assertEqual(self.store.searchContents("HOHO"), [])
+        with self.assertRaises(KeyError):
+            self.store.loadPreset(self.preset.name)
+
+    def test_bulkImportExport(self):
+        presetsDir = os.path.join(fileDir, "resources")
+        imported = self.store.importJSONPresets(presetsDir)
+        self.assertEqual(sorted(imported), self.store.presetNames)
+
+        with tempfile.TemporaryDirectory() as tempDir:
+            filePaths = self.store.exportJSONPresets(tempDir)
+            self.assertEqual(len(filePaths), len(imported))
+
+            exportedPreset = ProofPreset()
+            exportedPreset.importFromJSON(filePaths[0])
+            self.assertIn(exportedPreset.name, imported)
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False, verbosity=1)
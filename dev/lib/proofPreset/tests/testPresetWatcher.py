@@ -0,0 +1,108 @@
+"""
+Test polling presets directory watcher
+"""
+
+from proofPreset.presetWatcher import PresetWatcher, getWatchedDirs
+import unittest
+import os
+import os.path
+import tempfile
+import threading
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestPresetWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.dirPath = self.tempDir.name
+        self._write("a.json", "{}")
+        self._write("notes.txt", "ignored")
+
+        self.batches = []
+        self.clock = FakeClock()
+        self.watcher = PresetWatcher(self.dirPath, self._callback,
+                                     interval=1.0, clock=self.clock)
+
+    def tearDown(self):
+        self.watcher.stop()
+        self.tempDir.cleanup()
+
+    def _callback(self, changedPaths, removedPaths):
+        self.batches.append((changedPaths, removedPaths))
+
+    def _write(self, fileName, text):
+        filePath = os.path.join(self.dirPath, fileName)
+        with open(filePath, "w") as testFile:
+            testFile.write(text)
+        return filePath
+
+    def _pollAt(self, now):
+        self.clock.now = now
+        return self.watcher.poll()
+
+    def test_noChanges(self):
+        self.assertIsNone(self._pollAt(5))
+        self.assertEqual(self.batches, [])
+
+    def test_batchBurstOfChanges(self):
+        aPath = self._write("a.json", '{"name": "a"}')
+        self.assertIsNone(self._pollAt(1))
+
+        bPath = self._write("b.json", "{}")
+        self._write("notes.txt", "still ignored")
+        self.assertIsNone(self._pollAt(1.5))
+
+        # Not quiet for long enough yet
+        self.assertIsNone(self._pollAt(2))
+
+        self.assertEqual(self._pollAt(3), ([aPath, bPath], []))
+        self.assertEqual(len(self.batches), 1)
+        self.assertIsNone(self._pollAt(10))
+
+    def test_removedFiles(self):
+        aPath = os.path.join(self.dirPath, "a.json")
+        os.remove(aPath)
+        self._pollAt(1)
+        self.assertEqual(self._pollAt(2), ([], [aPath]))
+
+    def test_removedAndRecreated(self):
+        aPath = os.path.join(self.dirPath, "a.json")
+        os.remove(aPath)
+        self._pollAt(1)
+        self._write("a.json", '{"name": "new a"}')
+        self._pollAt(1.5)
+        self.assertEqual(self._pollAt(3), ([aPath], []))
+
+    def test_relativePaths(self):
+        cwd = os.getcwd()
+        os.chdir(self.dirPath)
+        try:
+            watchedDirs = getWatchedDirs(["a.json", "./b.json", os.path.abspath("c.json")])
+            aPath = os.path.abspath("a.json")
+        finally:
+            os.chdir(cwd)
+        self.assertEqual(watchedDirs, [os.path.dirname(aPath)])
+
+        watcher = PresetWatcher(watchedDirs[0], self._callback, clock=self.clock)
+        self._write("a.json", '{"name": "a"}')
+        watcher.poll()
+        self.clock.now = 2
+        self.assertEqual(watcher.poll(), ([aPath], []))
+
+    def test_thread(self):
+        called = threading.Event()
+        watcher = PresetWatcher(self.dirPath, lambda *batch: called.set(),
+                                interval=0.01)
+        watcher.start()
+        self._write("c.json", "{}")
+        self.assertTrue(called.wait(5))
+        watcher.stop()
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False, verbosity=1)
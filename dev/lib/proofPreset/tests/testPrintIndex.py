@@ -0,0 +1,116 @@
+"""
+Test index of printable groups
+"""
+
+from proofPreset import ProofPreset
+from proofPreset.printIndex import PrintIndex
+import random
+import unittest
+
+class TestPrintIndex(unittest.TestCase):
+    def setUp(self):
+        randomGen = random.Random(4)
+        self.preset = ProofPreset("testPreset")
+        self.preset.addGroups([{"name": "group %d" % index,
+                                "typeSize": randomGen.choice(["", 10, 24]),
+                                "print": randomGen.random() < 0.5,
+                                "contents": ["HOHO"] * randomGen.randrange(6)}
+                               for index in range(60)])
+        self.printIndex = self.preset.printIndex
+
+    def assertIndexMatchesScan(self):
+        expected = PrintIndex(self.preset.groups)
+        printable = [group for group in self.preset.groups if group.print]
+        self.assertEqual(self.printIndex.count, len(printable))
+        self.assertTrue(all(group is printableGroup for group, printableGroup
+                            in zip(self.preset.printableGroups, printable)))
+        self.assertEqual(self.printIndex.lineCount, expected.lineCount)
+        self.assertAlmostEqual(self.printIndex.height, expected.height)
+        self.assertEqual(self.printIndex.estimatePageCount(), expected.estimatePageCount())
+
+    def test_followsChanges(self):
+        self.preset.editGroup(0, {"print": True})
+        self.preset.editGroups([1, 2, 3], {"print": False})
+        self.preset.editGroup(4, {"leading": 40})
+        self.assertIndexMatchesScan()
+
+        self.preset.moveGroup(5, 50)
+        self.preset.moveGroups([0, 10, 20], 30)
+        self.preset.removeGroup(7)
+        self.preset.removeGroups([1, 2])
+        self.preset.addGroup({"name": "new", "print": True, "contents": ["H"]})
+        self.preset.addGroups([{"name": "new A", "print": True}, {"name": "new B"}])
+        self.assertIndexMatchesScan()
+
+        self.preset.importPyDict({"name": "other",
+                                  "groups": [{"name": "X", "print": True}]}, overwrite=True)
+        self.assertIndexMatchesScan()
+        self.assertEqual(self.printIndex.count, 1)
+
+    def test_directEdits(self):
+        hidden = next(group for group in self.preset.groups if not group.print)
+        shown = next(group for group in self.preset.groups if group.print)
+        countBefore = self.printIndex.count
+
+        hidden.print = True
+        shown["print"] = False
+        self.assertEqual(self.printIndex.count, countBefore)
+        self.assertIn(hidden, self.preset.printableGroups)
+        self.assertNotIn(shown, self.preset.printableGroups)
+
+        hidden.contents = ["HOHO"] * 10
+        hidden.typeSize = 72
+        self.assertIndexMatchesScan()
+
+        # Only groups still in the preset are indexed
+        self.preset.removeGroup(hidden.name)
+        hidden.print = False
+        shown.print = True
+        self.assertIndexMatchesScan()
+
+    def test_undoRandomEdits(self):
+        randomGen = random.Random(5)
+        for _ in range(100):
+            index = randomGen.randrange(len(self.preset.groups))
+            operation = randomGen.randrange(3)
+            if operation == 0:
+                self.preset.editGroup(index, {"print": not self.preset.groups[index].print})
+            elif operation == 1:
+                self.preset.moveGroup(index, randomGen.randrange(len(self.preset.groups)))
+            else:
+                self.preset.editGroup(index, {"typeSize": randomGen.choice([8, 30])})
+        self.assertIndexMatchesScan()
+
+    def test_duplicatePreset(self):
+        self.preset.columns
+        duplicate = self.preset.duplicatePreset()
+        # Caches aren't copied, they're rebuilt when needed
+        self.assertIsNone(duplicate._printIndex)
+        self.assertIsNone(duplicate._columns)
+        self.assertEqual(duplicate.printIndex.count, self.printIndex.count)
+
+        duplicate.editGroup(1, {"print": True})
+        duplicate.moveGroup(0, 3)
+        duplicate.removeGroup(5)
+
+        self.printIndex = duplicate.printIndex
+        self.preset = duplicate
+        self.assertIndexMatchesScan()
+
+    def test_printableIndexAndEstimate(self):
+        preset = ProofPreset("testPreset")
+        preset.addGroups([{"name": name, "print": name in "AC", "contents": ["H"] * 50}
+                          for name in "ABCD"])
+        self.assertEqual(preset.printIndex.getPrintableIndex(2), 1)
+        self.assertEqual(preset.printIndex.getPrintableIndex(4), 2)
+
+        # 2 labels (12 pt) + 100 lines at 14.4 pt on 769.89 pt pages
+        self.assertEqual(preset.printIndex.estimatePageCount(), 2)
+        preset.editGroup("C", {"print": False})
+        self.assertEqual(preset.printIndex.estimatePageCount(), 1)
+        preset.editGroup("A", {"print": False})
+        self.assertEqual(preset.printIndex.estimatePageCount(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False, verbosity=1)
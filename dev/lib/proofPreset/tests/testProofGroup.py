@@ -47,5 +47,28 @@ class ProofPresetTest(unittest.TestCase):
         }
         self.assertEqual(actual, expected)
 
+    def test_normalizedFastPath(self):
+        groupDict = {"name": "UC", "typeSize": 12.0, "leading": 14.0,
+                     "print": True, "contents": ["ABC"]}
+        group = ProofGroup(groupDict)
+        self.assertEqual(group, groupDict)
+        self.assertIsNot(group, groupDict)
+        self.assertEqual(group.characterSet, frozenset("ABC"))
+
+        # Same keys, other order: normalized the slow way, same result
+        reordered = ProofGroup(dict(reversed(list(groupDict.items()))))
+        self.assertEqual(list(reordered), list(ProofGroup._keysInGroup))
+
+    def test_fromColumns(self):
+        groups = ProofGroup.fromColumns(["UC", "lc"], typeSizes=[12.0, 10.0],
+                                        prints=[True, False])
+        self.assertEqual(groups[1], {"name": "lc", "typeSize": 10.0, "leading": "",
+                                     "print": False, "contents": []})
+        self.assertIsInstance(groups[0], ProofGroup)
+        self.assertIsNot(groups[0].contents, groups[1].contents)
+
+        with self.assertRaises(ProofPresetError):
+            ProofGroup.fromColumns(["UC", "lc"], leadings=[12.0])
+
 if __name__ == "__main__":
     unittest.main(exit=False, verbosity=1)
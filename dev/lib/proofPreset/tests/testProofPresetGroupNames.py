@@ -1,4 +1,5 @@
 from proofPreset import ProofPreset, ProofPresetError
+from proofPreset.editJournal import EditJournal
 from collections import Counter
 import unittest
 import os.path
@@ -94,6 +95,51 @@ class TestGroupNames(unittest.TestCase):
 
         self.assertEqual(actual, expected)
 
+    def test_importColumnsWithSameNames(self):
+        names = ["UC", "lc", "UC", "controls", "UC", "lc"]
+        self.proofPreset.importColumns(names, typeSizes=[12.0] * len(names))
+
+        expected = ["UC", "lc", "UC-1", "controls", "UC-2", "lc-1"]
+        self.assertEqual(self.proofPreset.groupNames, expected)
+        self.assertEqual(self.proofPreset.groups[2].typeSize, 12.0)
+
+        with self.assertRaises(ProofPresetError):
+            self.proofPreset.importColumns(["UC"])
+
+    def test_uniqueGroupNamesFollowChanges(self):
+        """
+        Unique names are updated by every add,
+        remove, rename and import (and by undo)
+        """
+        journal = EditJournal(self.proofPreset)
+        self.proofPreset.addGroups([{"name": "UC"}, {"name": "lc"}, {"name": "UC"}])
+        self.assertEqual(self.proofPreset.uniqueGroupNames, ["UC", "lc"])
+        self.assertEqual(self.proofPreset.groups[2].baseName, "UC")
+
+        self.proofPreset.removeGroup("lc")
+        self.assertEqual(self.proofPreset.uniqueGroupNames, ["UC"])
+
+        self.proofPreset.editGroup("UC-1", {"name": "numerals"})
+        self.assertEqual(self.proofPreset.uniqueGroupNames, ["UC", "numerals"])
+        self.proofPreset.removeGroup(0)
+        self.assertEqual(self.proofPreset.uniqueGroupNames, ["numerals"])
+
+        journal.undo()
+        journal.undo()
+        self.assertEqual(self.proofPreset.groupNames, ["UC", "UC-1"])
+        self.assertEqual(self.proofPreset.uniqueGroupNames, ["UC"])
+
+        # A removed name can be added again without a count
+        self.proofPreset.addGroup({"name": "lc"})
+        self.assertEqual(self.proofPreset.groupNames, ["UC", "UC-1", "lc"])
+
+        self.proofPreset.importFromXML(self.xmlProof)
+        self.assertEqual(Counter(self.proofPreset.uniqueGroupNames),
+                         Counter(["controls", "lc", "numerals", "UC", "UC & lc"]))
+        self.proofPreset.removeGroups(["UC & lc", "numerals"])
+        self.assertEqual(Counter(self.proofPreset.uniqueGroupNames),
+                         Counter(["controls", "lc", "UC"]))
+
 if __name__ == "__main__":
     unittest.main(exit=False, verbosity=1)
         
\ No newline at end of file
@@ -332,6 +332,97 @@ class TestGroupStuff(unittest.TestCase):
 
         self.assertEqual(actual, expected)
 
+    def test_addGroups(self):
+        """
+        Batch gives the same names as adding one by one,
+        with a single notification
+        """
+        groupsToAdd = [{"name": "UC"}, {"name": "lc"}, {"name": "UC"},
+                       {"name": "lc"}, {"name": "UC"}]
+        onePreset = ProofPreset("onePreset")
+        for groupToAdd in groupsToAdd:
+            onePreset.addGroup(groupToAdd)
+
+        infos = []
+        self.testPreset.addObserver(infos.append)
+        self.testPreset.addGroups(groupsToAdd)
+        self.assertEqual(self.testPreset.groupNames, onePreset.groupNames)
+        self.assertEqual(self.testPreset.uniqueGroupNames, onePreset.uniqueGroupNames)
+
+        self.assertEqual(len(infos), 1)
+        self.assertEqual(infos[0]["action"], "addGroups")
+        self.assertEqual(infos[0]["indices"], [0, 1, 2, 3, 4])
+
+        self.testPreset.addGroups([{"name": "lc", "typeSize": 9}], overwrite=True)
+        self.assertEqual(len(self.testPreset.groups), 5)
+        self.assertEqual(self.testPreset.groups[1].typeSize, 9)
+        self.assertEqual(infos[1]["action"], "editGroups")
+
+        with self.assertRaises(ProofPresetError):
+            self.testPreset.addGroups([{"name": "ok"}, {"contents": ["abc"]}])
+        self.assertEqual(len(self.testPreset.groups), 5)
+
+    def test_removeGroups(self):
+        self.testPreset.addGroups([{"name": name} for name in "ABCDE"])
+        infos = []
+        self.testPreset.addObserver(infos.append)
+
+        self.testPreset.removeGroups(["B", 3, -1, "D"])
+        self.assertEqual(self.testPreset.groupNames, ["A", "C"])
+        self.assertEqual(len(infos), 1)
+        self.assertEqual(infos[0]["indices"], [1, 3, 4])
+        self.assertEqual([group.name for group in infos[0]["groups"]], ["B", "D", "E"])
+
+        # Nothing is removed if anything is invalid
+        with self.assertRaises(KeyError):
+            self.testPreset.removeGroups(["A", "Z"])
+        with self.assertRaises(IndexError):
+            self.testPreset.removeGroups([0, 2])
+        self.assertEqual(self.testPreset.groupNames, ["A", "C"])
+
+    def test_moveGroups(self):
+        self.testPreset.addGroups([{"name": name} for name in "ABCDEF"])
+        infos = []
+        self.testPreset.addObserver(infos.append)
+
+        self.testPreset.moveGroups([1, 3, 4], 3)
+        self.assertEqual(self.testPreset.groupNames, list("ACFBDE"))
+        self.assertEqual(infos[0], {"action": "moveGroups",
+                                    "currentIndices": [1, 3, 4],
+                                    "newIndices": [3, 4, 5],
+                                    "groupCount": 6})
+
+        self.testPreset.moveGroups([0, -1], 0)
+        self.assertEqual(self.testPreset.groupNames, list("AECFBD"))
+
+        with self.assertRaises(IndexError):
+            self.testPreset.moveGroups([0, 1], 5)
+        with self.assertRaises(TypeError):
+            self.testPreset.moveGroups(["A"], 0)
+
+    def test_editGroups(self):
+        self.testPreset.addGroups([{"name": name} for name in "ABC"])
+        infos = []
+        self.testPreset.addObserver(infos.append)
+
+        self.testPreset.editGroups(["A", 2], {"typeSize": 12, "nonsense": 1})
+        self.assertEqual([group.typeSize for group in self.testPreset.groups],
+                         [12.0, "", 12.0])
+        self.assertEqual(infos, [{"action": "editGroups",
+                                  "indices": [0, 2],
+                                  "oldValues": [{"typeSize": ""}, {"typeSize": ""}],
+                                  "newValues": [{"typeSize": 12.0}, {"typeSize": 12.0}],
+                                  "groupCount": 3,
+                                  "groups": [self.testPreset.groups[0], self.testPreset.groups[2]]}])
+        self.assertIs(infos[0]["groups"][1], self.testPreset.groups[2])
+
+        with self.assertRaises(ValueError):
+            self.testPreset.editGroups([0, 1], {"name": "D"})
+        with self.assertRaises(ValueError):
+            self.testPreset.editGroups([0], {"name": "B"})
+        self.testPreset.editGroups([0], {"name": "D"})
+        self.assertEqual(self.testPreset.groupNames, ["D", "B", "C"])
+
 
 if __name__ == "__main__":
     unittest.main(exit=False, verbosity=1)
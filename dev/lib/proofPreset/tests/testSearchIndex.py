@@ -0,0 +1,96 @@
+"""
+Test preset library search index
+"""
+
+from proofPreset import ProofPreset
+from proofPreset.searchIndex import GroupSearchIndex
+import unittest
+import os.path
+
+fileDir = os.path.dirname(__file__)
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.preset1 = ProofPreset()
+        self.preset1.importFromJSON(os.path.join(fileDir, "resources",
+                                                 "proofPresetTest.json"))
+        self.preset2 = ProofPreset("preset2")
+        self.preset2.addGroup({"name": "Q control", "contents": ["|Q| HQHQHQ"]})
+        self.preset2.addGroup({"name": "lc", "contents": ["abcdefghijklmnopqrstuvwxyz"]})
+
+        self.index = GroupSearchIndex([self.preset1, self.preset2])
+
+    def _names(self, results):
+        return [(preset.name, group.name) for preset, group in results]
+
+    def test_searchContents(self):
+        actual = self._names(self.index.searchContents("|B|"))
+        self.assertEqual(actual, [("proofPreset1", "UC control")])
+
+        actual = self._names(self.index.searchContents("hij"))
+        expected = [("proofPreset1", "UC, lc, numerals"), ("preset2", "lc")]
+        self.assertEqual(actual, expected)
+
+    def test_shortAndCaseInsensitiveQueries(self):
+        self.assertEqual(self._names(self.index.searchContents("HQ")),
+                         [("preset2", "Q control")])
+        self.assertEqual(self.index.searchContents("HOHOX"), [])
+
+        actual = self._names(self.index.searchContents("|q|", caseSensitive=False))
+        self.assertEqual(actual, [("preset2", "Q control")])
+
+    def test_searchNames(self):
+        self.assertEqual(self.index.searchNames("CONTROL"),
+                         {"UC control", "lc control", "Q control"})
+        self.assertEqual(self.index.filterNames(["lc control", "UC", "Extra"], "c"),
+                         ["lc control", "UC"])
+
+    def test_updateOnEdit(self):
+        self.preset2.editGroup(0, {"name": "R control", "contents": ["|R| HRHR"]})
+
+        self.assertEqual(self.index.searchContents("|Q|"), [])
+        self.assertEqual(self._names(self.index.searchContents("|R|")),
+                         [("preset2", "R control")])
+        self.assertNotIn("Q control", self.index.searchNames("control"))
+
+    def test_updateOnAddRemoveMove(self):
+        self.preset2.addGroup({"name": "more Q", "contents": ["QQQ |Q|"]})
+        self.preset2.moveGroup(2, 0)
+        self.assertEqual(self._names(self.index.searchContents("|Q|")),
+                         [("preset2", "more Q"), ("preset2", "Q control")])
+
+        self.preset2.removeGroup("Q control")
+        self.assertEqual(self._names(self.index.searchContents("|Q|")),
+                         [("preset2", "more Q")])
+
+    def test_updateOnBatches(self):
+        self.preset2.addGroups([{"name": "more Q", "contents": ["QQQ |Q|"]},
+                                {"name": "R", "contents": ["|R|"]}])
+        self.assertEqual(self._names(self.index.searchContents("|R|")), [("preset2", "R")])
+
+        self.preset2.editGroups([0, 2], {"contents": ["|S|"]})
+        self.assertEqual(self.index.searchContents("|Q|"), [])
+        self.assertEqual(len(self.index.searchContents("|S|")), 2)
+
+        self.preset2.removeGroups(["Q control", "R"])
+        self.assertEqual(self._names(self.index.searchContents("|S|")),
+                         [("preset2", "more Q")])
+        self.assertEqual(self.index.searchContents("|R|"), [])
+
+    def test_updateOnImport(self):
+        self.preset2.importPyDict({"name": "preset2",
+                                   "groups": [{"name": "fig", "contents": ["0123"]}]},
+                                  overwrite=True)
+        self.assertEqual(self.index.searchContents("|Q|"), [])
+        self.assertEqual(len(self.index.searchContents("0123")), 2)
+
+    def test_removePreset(self):
+        self.index.removePreset(self.preset1)
+        self.assertEqual(self.index.searchContents("|B|"), [])
+
+        self.preset1.addGroup({"name": "new", "contents": ["|B|"]})
+        self.assertEqual(self.index.searchContents("|B|"), [])
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False, verbosity=1)
@@ -0,0 +1,68 @@
+"""
+Test spacing string generator
+"""
+
+from proofPreset import spacingStrings as ss
+import unittest
+
+class TestSpacingStrings(unittest.TestCase):
+    def test_controlLine(self):
+        self.assertEqual(ss.getControlLine(("H", "O")), "|H| |O| HOHOHOHO")
+
+    def test_spacingLines(self):
+        actual = list(ss.iterSpacingLines("ABC"))
+        expected = [
+            "|H| |O| HOHOHOHO",
+            "|A| HAHAHAOAOAOA",
+            "|B| HBHBHBOBOBOB",
+            "|C| HCHCHCOCOCOC"
+        ]
+        self.assertEqual(actual, expected)
+
+    def test_customPattern(self):
+        actual = list(ss.iterSpacingLines("ab", controls="no", pattern="{0}{c}{1}",
+                                          label="", controlLine=False))
+        self.assertEqual(actual, ["nao", "nbo"])
+
+    def test_pairLines(self):
+        actual = list(ss.iterPairLines("AV"))
+        expected = ["HHAAHH", "HHAVHH", "HHVAHH", "HHVVHH"]
+        self.assertEqual(actual, expected)
+
+        actual = list(ss.iterPairLines(iter([("T", "o")]), "pairs",
+                                       controls="n", pattern="{0}{c}{c2}{0}"))
+        self.assertEqual(actual, ["nTon"])
+
+    def test_controlsWithBraces(self):
+        actual = list(ss.iterSpacingLines("a", controls="{}", pattern="{0}{c}{1}",
+                                          label="", controlLine=False))
+        self.assertEqual(actual, ["{a}"])
+
+    def test_linesAreLazy(self):
+        consumed = []
+        def iterPairs():
+            for left in "ABCDEFGHIJ":
+                for right in "ABCDEFGHIJ":
+                    consumed.append((left, right))
+                    yield left, right
+
+        lines = ss.iterPairLines(iterPairs(), "pairs")
+        self.assertEqual(consumed, [])
+        self.assertEqual(next(lines), "HHAAHH")
+        self.assertEqual(len(consumed), 1)
+
+        groups = ss.iterSpacingGroups(lines, "Pairs", 10)
+        self.assertEqual(len(next(groups).contents), 10)
+        self.assertEqual(len(consumed), 11)
+
+    def test_spacingGroups(self):
+        groups = list(ss.iterSpacingGroups(ss.iterPairLines("ABCDE"), "Pairs", 10))
+
+        self.assertEqual([group.name for group in groups],
+                         ["Pairs", "Pairs-1", "Pairs-2"])
+        self.assertEqual([len(group.contents) for group in groups], [10, 10, 5])
+        self.assertEqual(groups[0]["typeSize"], "")
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False, verbosity=1)
@@ -0,0 +1,113 @@
+"""
+Test batch validation of imported presets
+"""
+
+from proofPreset import ProofPreset
+from proofPreset import validation as va
+from proofPreset.errors import PresetValidationError, ProofPresetError
+import json
+import os.path
+import tempfile
+import unittest
+
+class TestValidation(unittest.TestCase):
+    def setUp(self):
+        self.presetDict = {
+            "name": "testPreset",
+            "groups": [
+                {"name": "UC", "typeSize": "12", "leading": 14,
+                 "print": "yes", "contents": "ABC\nDEF"},
+                {"name": "lc", "typeSize": "", "leading": None, "print": 0,
+                 "contents": ["abc"]}
+            ]
+        }
+
+    def test_normalize(self):
+        normalized, issues = va.validatePreset(self.presetDict)
+        self.assertEqual(issues, [])
+        self.assertEqual(normalized["groups"][0],
+                         {"name": "UC", "typeSize": 12.0, "leading": 14.0,
+                          "print": True, "contents": ["ABC", "DEF"]})
+        self.assertEqual(normalized["groups"][1]["leading"], "")
+        self.assertIs(normalized["groups"][1]["print"], False)
+        # Input isn't changed
+        self.assertEqual(self.presetDict["groups"][0]["typeSize"], "12")
+
+    def test_allIssuesCollected(self):
+        self.presetDict["groups"][0]["typeSize"] = "big"
+        self.presetDict["groups"][0]["print"] = "maybe"
+        self.presetDict["groups"][1]["leading"] = -2
+        self.presetDict["groups"][1]["contents"] = ["abc", 3]
+        self.presetDict["groups"].append({"typeSize": 10})
+
+        with self.assertRaises(PresetValidationError) as context:
+            va.checkPreset(self.presetDict)
+
+        issues = context.exception.issues
+        self.assertEqual([(issue.groupIndex, issue.field) for issue in issues],
+                         [(0, "typeSize"), (0, "print"), (1, "leading"),
+                          (1, "contents"), (2, "name")])
+        self.assertIn("group 1 leading: must be a positive number", str(context.exception))
+        self.assertIsInstance(context.exception, ProofPresetError)
+
+    def test_importPyDict(self):
+        preset = ProofPreset()
+        preset.importPyDict(self.presetDict)
+        self.assertEqual(preset.groups[0].typeSize, 12.0)
+        self.assertEqual(preset.groups[0].contents, ["ABC", "DEF"])
+
+        self.presetDict["groups"][1]["typeSize"] = "x"
+        with self.assertRaises(PresetValidationError):
+            preset.importPyDict(self.presetDict, overwrite=True)
+
+        # Skipping validation imports as is
+        preset.importPyDict(self.presetDict, overwrite=True, validate=False)
+        self.assertEqual(preset.groups[1].typeSize, "x")
+
+    def test_trustedChecksums(self):
+        with tempfile.TemporaryDirectory() as tempDir:
+            checksumsPath = os.path.join(tempDir, "trusted.json")
+            trusted = va.TrustedChecksums(checksumsPath)
+            cleanDict = va.checkPreset(self.presetDict)
+            jsonInput = json.dumps(cleanDict)
+
+            preset = ProofPreset()
+            preset.importFromJSON(jsonInput, trustedChecksums=trusted)
+            self.assertIn(va.getChecksum(jsonInput), trusted)
+
+            # Remembered across sessions
+            trusted = va.TrustedChecksums(checksumsPath)
+            self.assertEqual(len(trusted), 1)
+            preset = ProofPreset()
+            preset.importFromJSON(jsonInput, trustedChecksums=trusted)
+            self.assertEqual(preset.groups[0].typeSize, 12.0)
+
+            # Valid, but normalized on import: not trusted
+            messyInput = json.dumps(self.presetDict)
+            preset = ProofPreset()
+            preset.importFromJSON(messyInput, trustedChecksums=trusted)
+            self.assertEqual(preset.groups[0].typeSize, 12.0)
+            self.assertNotIn(va.getChecksum(messyInput), trusted)
+
+            # Whole-number sizes (how JSON writes 12.0) are trusted
+            self.presetDict["groups"][0].update(typeSize=12, contents=["ABC"], print=True)
+            self.presetDict["groups"][1].update(leading="", print=False)
+            wholeInput = json.dumps(self.presetDict)
+            self.assertIn('"typeSize": 12,', wholeInput)
+            ProofPreset().importFromJSON(wholeInput, trustedChecksums=trusted)
+            self.assertIn(va.getChecksum(wholeInput), trusted)
+            for _ in range(2):
+                preset = ProofPreset()
+                preset.importFromJSON(wholeInput, trustedChecksums=trusted)
+                self.assertIs(type(preset.groups[0].typeSize), float)
+                self.assertIs(type(preset.groups[0].leading), float)
+
+            # Invalid input isn't trusted
+            self.presetDict["groups"][0]["typeSize"] = "big"
+            badInput = json.dumps(self.presetDict)
+            with self.assertRaises(PresetValidationError):
+                ProofPreset().importFromJSON(badInput, trustedChecksums=trusted)
+            self.assertNotIn(va.getChecksum(badInput), trusted)
+
+if __name__ == "__main__":
+    unittest.main(exit=False, verbosity=1)
@@ -0,0 +1,93 @@
+"""
+Test read-only views and snapshots
+"""
+
+from proofPreset import ProofPreset
+from proofPreset.errors import ReadOnlyError
+from proofPreset.searchIndex import GroupSearchIndex
+from proofPreset.views import GroupView, PresetView
+import json
+import threading
+import unittest
+
+class TestViews(unittest.TestCase):
+    def setUp(self):
+        self.preset = ProofPreset("testPreset")
+        self.preset.addGroups([{"name": "UC", "typeSize": 24, "print": True,
+                                "contents": ["ABC", "DEF"]},
+                               {"name": "lc", "contents": ["abc"]}])
+
+    def test_viewReadsThrough(self):
+        view = self.preset.view
+        self.assertIsInstance(view, PresetView)
+        self.assertTrue(view.groups[0].isViewOf(self.preset.groups[0]))
+        self.assertEqual(view.groups[0], self.preset.groups[0])
+        self.assertEqual(view.groups[0]["contents"], ["ABC", "DEF"])
+        self.assertEqual(view.groups[0].characterSet, set("ABCDEF"))
+        self.assertEqual([group.name for group in view.printableGroups], ["UC"])
+
+        # Live: follows changes
+        self.preset.editGroup("UC", {"typeSize": 36})
+        self.preset.addGroup({"name": "figures"})
+        self.assertEqual(view.groups[0].typeSize, 36)
+        self.assertEqual(view.groupNames, ("UC", "lc", "figures"))
+        self.assertEqual(len(view), 3)
+
+    def test_viewsRaiseOnChanges(self):
+        view = self.preset.view
+        group = view.groups[0]
+        changes = [lambda: setattr(view, "name", "other"),
+                   lambda: setattr(group, "name", "other"),
+                   lambda: group.__setitem__("typeSize", 9),
+                   lambda: group.__delitem__("print"),
+                   lambda: group.contents.__setitem__(0, "XYZ"),
+                   lambda: view.groups.__delitem__(0)]
+        for change in changes:
+            with self.assertRaises(ReadOnlyError):
+                change()
+        with self.assertRaises(TypeError):
+            group["typeSize"] = 9
+        self.assertEqual(self.preset.groups[0]["typeSize"], 24)
+        self.assertEqual(self.preset.groups[0].name, "UC")
+
+    def test_snapshot(self):
+        snapshot = self.preset.snapshot()
+        jsonBefore = self.preset.jsonPreset
+
+        self.preset.editGroup("UC", {"typeSize": 36, "contents": ["XYZ"], "print": False})
+        self.preset.moveGroup(1, 0)
+        self.preset.removeGroup("UC")
+
+        self.assertEqual(snapshot.groupNames, ("UC", "lc"))
+        self.assertEqual(snapshot.groups[0].typeSize, 24)
+        self.assertEqual(snapshot.groups[0].contents, ["ABC", "DEF"])
+        self.assertEqual(len(snapshot.printableGroups), 1)
+        self.assertEqual(json.loads(snapshot.jsonPreset), json.loads(jsonBefore))
+        self.assertEqual(snapshot.snapshot().groupNames, ("UC", "lc"))
+
+    def test_snapshotInThread(self):
+        self.preset.addGroups([{"name": "group %d" % index, "contents": ["HOHO"]}
+                               for index in range(500)])
+        snapshot = self.preset.view.snapshot()
+        results = []
+
+        def readSnapshot():
+            results.append(sum(len(group.contents) for group in snapshot.groups))
+
+        thread = threading.Thread(target=readSnapshot)
+        thread.start()
+        self.preset.editGroups(range(2, 502), {"contents": ["HOHO"] * 3})
+        self.preset.removeGroups(range(100))
+        thread.join()
+        self.assertEqual(results, [503])
+
+    def test_searchResultsAreViews(self):
+        index = GroupSearchIndex([self.preset])
+        (preset, group), = index.searchContents("DEF")
+        self.assertIs(preset, self.preset)
+        self.assertIsInstance(group, GroupView)
+        self.assertTrue(group.isViewOf(self.preset.groups[0]))
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False, verbosity=1)
@@ -34,6 +34,16 @@ def cleanList(listToClean, discardBefore=None, discardAfter=None):
 
     return cleanedList
 
+def getCharacterSet(lines):
+    """
+    Return frozenset of all characters in lines,
+    without whitespace
+    """
+    characters = set()
+    for line in lines:
+        characters.update(line)
+    return frozenset(char for char in characters if not char.isspace())
+
 def checkForTags(listOfItems, tagName):
     """
     Make sure object has opening & closing tags at all
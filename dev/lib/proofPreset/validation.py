@@ -0,0 +1,228 @@
+"""
+Batch validation & normalization of imported presets
+
+Every group of an incoming preset dict is checked in one
+pass, and every problem is collected (with group index and
+field) instead of stopping at the first one. Values that
+can be made valid are normalized:
+- typeSize / leading: numbers and numeric strings become
+  floats; "" and None mean "not set" and become ""
+- print: "true" / "false" / "yes" / "no" / 0 / 1 become bools
+- contents: a single string is split into lines
+
+Checksums of files that passed validation can be kept in a
+TrustedChecksums() object, so unchanged files skip
+validation next time they're imported.
+"""
+
+import hashlib
+import json
+import os.path
+from collections import namedtuple
+
+from proofPreset.errors import PresetValidationError
+from proofPreset.groupSequence import GroupSequence
+
+# groupIndex is None for preset-level problems
+ValidationIssue = namedtuple("ValidationIssue", "groupIndex field message")
+
+_INFINITY = float("inf")
+_TRUE_STRINGS = ("true", "yes", "1")
+_FALSE_STRINGS = ("false", "no", "0")
+
+def _normalizeSize(value, groupIndex, field, issues):
+    if type(value) is float and 0 < value < _INFINITY:
+        return value
+    if value is None or value == "":
+        return ""
+    if isinstance(value, bool):
+        issues.append(ValidationIssue(groupIndex, field, "must be a number, not %r" % value))
+        return value
+
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        issues.append(ValidationIssue(groupIndex, field, "must be a number, not %r" % value))
+        return value
+
+    if not 0 < number < _INFINITY:
+        issues.append(ValidationIssue(groupIndex, field, "must be a positive number, not %r" % value))
+    return number
+
+def _normalizePrint(value, groupIndex, issues):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str):
+        if value.strip().lower() in _TRUE_STRINGS:
+            return True
+        if value.strip().lower() in _FALSE_STRINGS:
+            return False
+    issues.append(ValidationIssue(groupIndex, "print", "must be a boolean, not %r" % value))
+    return value
+
+def _normalizeContents(value, groupIndex, issues):
+    if isinstance(value, str):
+        return value.splitlines()
+    if not isinstance(value, list):
+        issues.append(ValidationIssue(groupIndex, "contents", "must be a list of strings"))
+        return value
+
+    for lineIndex, line in enumerate(value):
+        if not isinstance(line, str):
+            issues.append(ValidationIssue(groupIndex, "contents",
+                                          "line %d must be a string, not %r" % (lineIndex, line)))
+    return value
+
+def validatePreset(pyDictInput):
+    """
+    Return (normalizedPreset, issues). normalizedPreset is a
+    new dict (pyDictInput isn't changed, groups that needed
+    no normalizing are shared); issues is a list of
+    ValidationIssue(), empty if pyDictInput is valid.
+    """
+    issues = []
+    if not isinstance(pyDictInput, dict):
+        return pyDictInput, [ValidationIssue(None, None, "preset must be a dictionary")]
+
+    presetName = pyDictInput.get("name")
+    if not isinstance(presetName, str) or not presetName.strip():
+        issues.append(ValidationIssue(None, "name", "preset must have a name"))
+
+    groups = pyDictInput.get("groups")
+    if not isinstance(groups, (list, GroupSequence)):
+        issues.append(ValidationIssue(None, "groups", "must be a list of groups"))
+        return dict(pyDictInput), issues
+
+    normalizedGroups = []
+    for groupIndex, group in enumerate(groups):
+        if not isinstance(group, dict):
+            issues.append(ValidationIssue(groupIndex, None, "group must be a dictionary"))
+            normalizedGroups.append(group)
+            continue
+
+        # Fast path for already normalized groups
+        # (eg. read back from our own exports)
+        typeSize = group.get("typeSize", "")
+        leading = group.get("leading", "")
+        contents = group.get("contents", [])
+        name = group.get("name")
+        if (type(name) is str and name.strip()
+                and (typeSize == "" or type(typeSize) is float and 0 < typeSize < _INFINITY)
+                and (leading == "" or type(leading) is float and 0 < leading < _INFINITY)
+                and type(group.get("print", False)) is bool
+                and type(contents) is list
+                and all(type(line) is str for line in contents)):
+            normalizedGroups.append(group)
+            continue
+
+        if not isinstance(name, str) or not name.strip():
+            issues.append(ValidationIssue(groupIndex, "name", "group must have a name"))
+
+        newValues = {}
+        for field in ("typeSize", "leading"):
+            if field in group:
+                newValues[field] = _normalizeSize(group[field], groupIndex, field, issues)
+        if "print" in group:
+            newValues["print"] = _normalizePrint(group["print"], groupIndex, issues)
+        if "contents" in group:
+            newValues["contents"] = _normalizeContents(group["contents"], groupIndex, issues)
+
+        # Only copy groups that changed: normalized
+        # input goes through untouched
+        if any(value is not group[field] for field, value in newValues.items()):
+            group = dict(group)
+            group.update(newValues)
+        normalizedGroups.append(group)
+
+    normalizedPreset = dict(pyDictInput)
+    normalizedPreset["groups"] = normalizedGroups
+    return normalizedPreset, issues
+
+def normalizeSizes(pyDictInput):
+    """
+    Return pyDictInput with whole-number typeSize and
+    leading values (eg. 12 in JSON) as floats. Only groups
+    that changed are copied; nothing else is checked.
+    """
+    groups = pyDictInput.get("groups") if isinstance(pyDictInput, dict) else None
+    if not isinstance(groups, list):
+        return pyDictInput
+
+    normalizedGroups = []
+    changed = False
+    for group in groups:
+        if isinstance(group, dict):
+            newValues = {field: float(group[field]) for field in ("typeSize", "leading")
+                         if type(group.get(field)) is int and group[field] > 0}
+            if newValues:
+                group = dict(group)
+                group.update(newValues)
+                changed = True
+        normalizedGroups.append(group)
+
+    if not changed:
+        return pyDictInput
+    normalizedPreset = dict(pyDictInput)
+    normalizedPreset["groups"] = normalizedGroups
+    return normalizedPreset
+
+def checkPreset(pyDictInput):
+    """
+    Return normalized copy of pyDictInput, or raise a
+    PresetValidationError listing every issue found
+    """
+    normalizedPreset, issues = validatePreset(pyDictInput)
+    if issues:
+        raise PresetValidationError(issues)
+    return normalizedPreset
+
+def getChecksum(data):
+    """
+    Return checksum of data (str or bytes)
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+class TrustedChecksums:
+    """
+    Checksums of preset files that passed validation.
+
+    If filePath is given, checksums are read from and
+    saved to that JSON file, so they're remembered
+    across sessions.
+    """
+    def __init__(self, filePath=None):
+        self.filePath = filePath
+        self._checksums = set()
+
+        if filePath is not None and os.path.isfile(filePath):
+            with open(filePath, "r") as checksumsFile:
+                self._checksums = set(json.load(checksumsFile))
+
+    def add(self, checksum):
+        if checksum not in self._checksums:
+            self._checksums.add(checksum)
+            self._save()
+
+    def discard(self, checksum):
+        if checksum in self._checksums:
+            self._checksums.discard(checksum)
+            self._save()
+
+    def _save(self):
+        if self.filePath is None:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.filePath)), exist_ok=True)
+        tempPath = self.filePath + ".tmp"
+        with open(tempPath, "w") as checksumsFile:
+            json.dump(sorted(self._checksums), checksumsFile)
+        os.replace(tempPath, self.filePath)
+
+    def __contains__(self, checksum):
+        return checksum in self._checksums
+
+    def __len__(self):
+        return len(self._checksums)
@@ -0,0 +1,331 @@
+"""
+Read-only views of presets and groups
+
+Handing a group to code that only reads it (an inspector
+window, a renderer, search results) used to mean passing
+the live dict, or deep-copying it to be safe. Views wrap
+the live objects without copying anything, and raise
+ReadOnlyError on any attempt to change them:
+
+view = preset.view
+view.groups[3]["typeSize"]   # read through to the preset
+view.groups[3].name = "UC"   # ReadOnlyError
+
+A live view follows the preset as it changes (only read it
+on the thread that edits the preset). For a state that
+doesn't change (eg. to hand to a background thread), take
+a snapshot: preset.snapshot() or view.snapshot() only copy
+group references. The preset copies a group for its live
+snapshots before changing it (shallowly: content lists are
+shared, presets replace them and never change them in
+place), so snapshots stay consistent without locking.
+"""
+
+import json
+from collections.abc import Mapping, Sequence
+
+from proofPreset import utils
+from proofPreset.errors import ReadOnlyError
+
+class _ReadOnly:
+    """
+    Raise ReadOnlyError on attribute and item changes
+    """
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise ReadOnlyError("%s is read-only" % type(self).__name__)
+
+    def __delattr__(self, name):
+        raise ReadOnlyError("%s is read-only" % type(self).__name__)
+
+    def __setitem__(self, key, value):
+        raise ReadOnlyError("%s is read-only" % type(self).__name__)
+
+    def __delitem__(self, key):
+        raise ReadOnlyError("%s is read-only" % type(self).__name__)
+
+class ListView(_ReadOnly, Sequence):
+    """
+    Read-only view of a list (eg. a group's contents)
+    """
+    __slots__ = ("_items",)
+
+    def __init__(self, items):
+        object.__setattr__(self, "_items", items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(self._items[index])
+        return self._items[index]
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __eq__(self, other):
+        if isinstance(other, (list, tuple, ListView)):
+            return len(self) == len(other) and list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "ListView(%r)" % list(self._items)
+
+class GroupView(_ReadOnly, Mapping):
+    """
+    Read-only view of a ProofGroup (or any group dict).
+
+    Reads like a ProofGroup: group["typeSize"] or
+    group.typeSize; contents is a ListView.
+    """
+    __slots__ = ("_group",)
+
+    def __init__(self, group):
+        object.__setattr__(self, "_group", group)
+
+    def __getitem__(self, key):
+        value = self._group[key]
+        if key == "contents":
+            return ListView(value)
+        return value
+
+    def __iter__(self):
+        return iter(self._group)
+
+    def __len__(self):
+        return len(self._group)
+
+    def __contains__(self, key):
+        return key in self._group
+
+    @property
+    def name(self):
+        return self._group["name"]
+
+    @property
+    def baseName(self):
+        return getattr(self._group, "baseName", self._group["name"])
+
+    @property
+    def typeSize(self):
+        return self._group["typeSize"]
+
+    @property
+    def leading(self):
+        return self._group["leading"]
+
+    @property
+    def print(self):
+        return self._group["print"]
+
+    @property
+    def contents(self):
+        return ListView(self._group["contents"])
+
+    @property
+    def characterSet(self):
+        characterSet = getattr(self._group, "characterSet", None)
+        if characterSet is None:
+            characterSet = utils.getCharacterSet(self._group["contents"])
+        return characterSet
+
+    def isViewOf(self, group):
+        """
+        Return True if this views group
+        """
+        return self._group is group
+
+    def __repr__(self):
+        return "GroupView(%r)" % dict(self._group)
+
+class GroupsView(_ReadOnly, Sequence):
+    """
+    Read-only view of a list of groups:
+    items are GroupView()s
+    """
+    __slots__ = ("_groups",)
+
+    def __init__(self, groups):
+        object.__setattr__(self, "_groups", groups)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [GroupView(group) for group in self._groups[index]]
+        return GroupView(self._groups[index])
+
+    def __len__(self):
+        return len(self._groups)
+
+    def __iter__(self):
+        return map(GroupView, self._groups)
+
+    def __repr__(self):
+        return "GroupsView(%d groups)" % len(self)
+
+class PresetView(_ReadOnly):
+    """
+    Read-only view of a ProofPreset (or of a snapshot).
+
+    Properties:
+    - name
+    - version
+    - groups
+    - printableGroups
+    - groupNames
+    - uniqueGroupNames
+    - jsonPreset
+
+    Methods:
+    - snapshot()
+    """
+    __slots__ = ("_preset",)
+
+    def __init__(self, preset):
+        object.__setattr__(self, "_preset", preset)
+
+    @property
+    def name(self):
+        return self._preset.name
+
+    @property
+    def version(self):
+        return self._preset.version
+
+    @property
+    def groups(self):
+        return GroupsView(self._preset.groups)
+
+    @property
+    def printableGroups(self):
+        return GroupsView(self._preset.printableGroups)
+
+    @property
+    def groupNames(self):
+        return tuple(self._preset.groupNames)
+
+    @property
+    def uniqueGroupNames(self):
+        return tuple(self._preset.uniqueGroupNames)
+
+    @property
+    def jsonPreset(self):
+        return self._preset.jsonPreset
+
+    def snapshot(self):
+        """
+        Return a PresetView() of the preset as it is now,
+        that later changes don't affect
+        """
+        return self._preset.snapshot()
+
+    def isViewOf(self, preset):
+        """
+        Return True if this views preset (live)
+        """
+        return self._preset is preset
+
+    def __len__(self):
+        return len(self._preset.groups)
+
+    def __repr__(self):
+        return "PresetView(%r, %d groups)" % (self.name, len(self))
+
+class PresetSnapshot:
+    """
+    State of a preset at one version, see
+    ProofPreset.snapshot(). Wrapped in a PresetView(),
+    never handed out directly.
+
+    Only group references are kept: before the preset
+    changes a group in place, it calls _preserve(group)
+    on its live snapshots, which keep a copy of the group
+    as it was (copy-on-write).
+    """
+    def __init__(self, name, version, groups, uniqueGroupNames, printableGroups=None):
+        self.name = name
+        self.version = version
+        self._groups = tuple(groups)
+        self.uniqueGroupNames = tuple(uniqueGroupNames)
+        self._printableGroups = None if printableGroups is None else tuple(printableGroups)
+        # id(group): copy of group from before it changed
+        self._preserved = {}
+
+    @property
+    def groups(self):
+        return _SnapshotGroups(self, self._groups)
+
+    @property
+    def printableGroups(self):
+        if self._printableGroups is None:
+            self._printableGroups = tuple(group for group in self._groups
+                                          if self._resolve(group)["print"])
+        return _SnapshotGroups(self, self._printableGroups)
+
+    @property
+    def groupNames(self):
+        return [self._getValue(group, "name") for group in self._groups]
+
+    @property
+    def jsonPreset(self):
+        return json.dumps({"name": self.name, "groups": list(self.groups)}, indent=2)
+
+    def snapshot(self):
+        return PresetView(self)
+
+    def _preserve(self, group):
+        """
+        Keep a copy of group before it's changed
+        (called by the preset, holding its lock)
+        """
+        if id(group) not in self._preserved:
+            self._preserved[id(group)] = group._shallowCopy()
+
+    def _getValue(self, group, key):
+        """
+        Return group[key] as it was at this version,
+        without copying the group (see _resolve())
+        """
+        preserved = self._preserved.get(id(group))
+        if preserved is None:
+            value = group[key]
+            preserved = self._preserved.get(id(group))
+            if preserved is None:
+                return value
+        return preserved[key]
+
+    def _resolve(self, group):
+        """
+        Return group as it was at this version
+        """
+        preserved = self._preserved.get(id(group))
+        if preserved is not None:
+            return preserved
+        # Copy, then check again: the preset preserves a group
+        # before changing it, so if it started changing while
+        # we copied, it's preserved by now
+        copiedGroup = group._shallowCopy()
+        preserved = self._preserved.get(id(group))
+        return copiedGroup if preserved is None else preserved
+
+class _SnapshotGroups(Sequence):
+    """
+    Groups of a PresetSnapshot, as they were
+    """
+    def __init__(self, snapshot, groups):
+        self._snapshot = snapshot
+        self._groups = groups
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._snapshot._resolve(group) for group in self._groups[index]]
+        return self._snapshot._resolve(self._groups[index])
+
+    def __len__(self):
+        return len(self._groups)
+
+    def __iter__(self):
+        return map(self._snapshot._resolve, self._groups)
@@ -0,0 +1,7 @@
+"""
+Proof output (PDF, ...) for proof presets
+
+Runs without RoboFont: glyph outlines come from a glyph
+source (see proofRender.glyphSource), and pages are laid
+out by proofRender.layout.
+"""
@@ -0,0 +1,6 @@
+"""
+Custom errors
+"""
+
+class ProofRenderError(Exception):
+    pass
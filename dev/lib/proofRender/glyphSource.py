@@ -0,0 +1,97 @@
+"""
+Glyph sources: where proof output gets its outlines
+
+A glyph source maps characters to glyph names, and draws
+glyph outlines into a pen (the fontTools / fontParts pen
+protocol: moveTo, lineTo, curveTo, qCurveTo, closePath,
+endPath, addComponent).
+
+- GlyphSource: outlines recorded as (method, args) lists,
+  eg. from fontTools' RecordingPen. No dependencies.
+- FontGlyphSource: a fontParts / defcon font
+  (eg. CurrentFont() in RoboFont).
+- TTFontGlyphSource: a .ttf / .otf file, read with
+  fontTools (optional dependency).
+"""
+
+from proofRender.errors import ProofRenderError
+
+try:
+    from fontTools.ttLib import TTFont
+except ImportError:
+    TTFont = None
+
+class GlyphSource:
+    """
+    Glyph source from recorded outlines.
+
+    glyphs is {glyphName: {"width": advanceWidth,
+    "outline": [(penMethod, args), ...]}}, cmap is
+    {unicode value: glyph name}.
+    """
+    def __init__(self, glyphs=None, cmap=None, unitsPerEm=1000, fontName=None):
+        self.glyphs = glyphs or {}
+        self.cmap = cmap or {}
+        self.unitsPerEm = unitsPerEm
+        self.fontName = fontName
+
+    def getGlyphName(self, character):
+        """
+        Return glyph name for character, or None
+        """
+        return self.cmap.get(ord(character))
+
+    def getAdvance(self, glyphName):
+        return self.glyphs[glyphName]["width"]
+
+    def drawGlyph(self, glyphName, pen):
+        for method, args in self.glyphs[glyphName]["outline"]:
+            getattr(pen, method)(*args)
+
+    def __contains__(self, glyphName):
+        return glyphName in self.glyphs
+
+class FontGlyphSource(GlyphSource):
+    """
+    Glyph source for a fontParts / defcon font object
+    """
+    def __init__(self, font):
+        cmap = {}
+        for glyph in font:
+            for unicodeValue in glyph.unicodes:
+                cmap.setdefault(unicodeValue, glyph.name)
+
+        super().__init__(cmap=cmap, unitsPerEm=font.info.unitsPerEm,
+                         fontName=font.info.postscriptFontName)
+        self.font = font
+
+    def getAdvance(self, glyphName):
+        return self.font[glyphName].width
+
+    def drawGlyph(self, glyphName, pen):
+        self.font[glyphName].draw(pen)
+
+    def __contains__(self, glyphName):
+        return glyphName in self.font
+
+class TTFontGlyphSource(GlyphSource):
+    """
+    Glyph source for a binary font file (needs fontTools)
+    """
+    def __init__(self, fontPath):
+        if TTFont is None:
+            raise ProofRenderError("fontTools is needed to read %s" % fontPath)
+
+        self.ttFont = TTFont(fontPath, lazy=True)
+        super().__init__(cmap=self.ttFont.getBestCmap(),
+                         unitsPerEm=self.ttFont["head"].unitsPerEm)
+        self.glyphSet = self.ttFont.getGlyphSet()
+
+    def getAdvance(self, glyphName):
+        return self.glyphSet[glyphName].width
+
+    def drawGlyph(self, glyphName, pen):
+        self.glyphSet[glyphName].draw(pen)
+
+    def __contains__(self, glyphName):
+        return glyphName in self.glyphSet
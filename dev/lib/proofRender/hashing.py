@@ -0,0 +1,75 @@
+"""
+Content hashes for presets, groups and fonts
+
+Hashes only depend on content, so the same preset or font
+hashes the same in any session (dict key order and file
+modification times don't matter).
+"""
+
+import hashlib
+import json
+import os
+
+# {path: ((mtime, size) of every file, hash)}
+_fileHashes = {}
+
+def _hashJSON(data):
+    text = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+def hashGroup(group):
+    """
+    Return content hash of a ProofGroup()
+    """
+    return _hashJSON(dict(group))
+
+def hashPreset(preset):
+    """
+    Return content hash of a ProofPreset()
+    """
+    return _hashJSON({"name": preset.name,
+                      "groups": [dict(group) for group in preset.groups]})
+
+def _listFiles(path):
+    """
+    Return sorted list of files in path (path itself if
+    it's a file, every file inside if it's a directory,
+    eg. a UFO)
+    """
+    if os.path.isfile(path):
+        return [path]
+
+    filePaths = []
+    for dirPath, dirNames, fileNames in os.walk(path):
+        dirNames.sort()
+        filePaths.extend(os.path.join(dirPath, fileName) for fileName in sorted(fileNames))
+    return filePaths
+
+def hashFont(fontPath):
+    """
+    Return content hash of a font file or UFO directory.
+
+    Remembered until a file's modification time or size
+    changes, so asking again is cheap.
+    """
+    filePaths = _listFiles(fontPath)
+    fileStates = []
+    for filePath in filePaths:
+        stat = os.stat(filePath)
+        fileStates.append((stat.st_mtime_ns, stat.st_size))
+    fileStates = tuple(fileStates)
+
+    cached = _fileHashes.get(fontPath)
+    if cached is not None and cached[0] == fileStates:
+        return cached[1]
+
+    fontHash = hashlib.sha1()
+    for filePath in filePaths:
+        fontHash.update(os.path.relpath(filePath, fontPath).encode("utf-8"))
+        with open(filePath, "rb") as fontFile:
+            for block in iter(lambda: fontFile.read(1 << 20), b""):
+                fontHash.update(block)
+
+    fontHash = fontHash.hexdigest()
+    _fileHashes[fontPath] = (fileStates, fontHash)
+    return fontHash
@@ -0,0 +1,392 @@
+"""
+Local queue of proof jobs (preset x font), kept in SQLite
+
+- Jobs run highest priority first (then oldest first).
+- Identical jobs (same preset content, font content, layout
+  options and output path) are only queued once: submitting
+  one again returns the existing job. A finished job whose
+  output was deleted since is run again.
+- Several workers can run jobs from the same file: each
+  job is claimed by exactly one of them, with a lease its
+  worker renews while the job runs.
+- Every finished page is checkpointed (its content stream
+  is saved in the queue's database), so a job whose worker
+  crashed (its lease expired) resumes from the last
+  finished page. The PDF is assembled once all pages are
+  done, and is the same as an uninterrupted run.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from proofPreset import ProofPreset
+from proofRender.glyphSource import TTFontGlyphSource
+from proofRender.hashing import hashFont, hashPreset
+from proofRender.layout import iterPages
+from proofRender.pdfWriter import PDFWriter, buildPageContent
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    jobHash TEXT NOT NULL UNIQUE,
+    priority INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    presetName TEXT NOT NULL,
+    presetJSON TEXT NOT NULL,
+    fontPath TEXT NOT NULL,
+    outputPath TEXT NOT NULL,
+    layoutOptions TEXT NOT NULL,
+    pageCount INTEGER,
+    pagesDone INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    owner TEXT,
+    leaseExpiresAt REAL,
+    createdAt REAL NOT NULL,
+    updatedAt REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobsByState ON jobs (state, priority, id);
+CREATE TABLE IF NOT EXISTS jobPages (
+    jobId INTEGER NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+    pageIndex INTEGER NOT NULL,
+    content BLOB NOT NULL,
+    PRIMARY KEY (jobId, pageIndex)
+);
+"""
+
+_STATUS_KEYS = ("id", "state", "priority", "presetName", "fontPath", "outputPath",
+                "pageCount", "pagesDone", "error", "createdAt", "updatedAt")
+
+# Columns added since the first version of the schema
+_ADDED_COLUMNS = (("owner", "TEXT"), ("leaseExpiresAt", "REAL"))
+
+class _LeaseLost(Exception):
+    """
+    Raised when another worker took over a running job
+    """
+
+class ProofJobQueue:
+    """
+    A queue of proof jobs in one SQLite file.
+
+    glyphSourceFactory(fontPath) returns the glyph source
+    used to render a job (reads binary fonts by default).
+
+    A running job is leased to its worker for leaseTime
+    seconds, renewed while it runs. Jobs whose lease
+    expired (their worker died) are queued again.
+
+    Queue methods:
+    - submit(preset, fontPath, outputPath, priority=0, **layoutOptions)
+    - cancel(jobId)
+    - runNext(progress=None)
+    - runAll(progress=None)
+
+    Status methods:
+    - status(jobId)
+    - jobs(state=None)
+    """
+    def __init__(self, dbPath, glyphSourceFactory=TTFontGlyphSource, clock=time.time,
+                 leaseTime=30.0):
+        self.glyphSourceFactory = glyphSourceFactory
+        self.leaseTime = leaseTime
+        self._dbPath = dbPath
+        self._clock = clock
+        # One owner per queue: workers can share a process
+        self._owner = "%d-%s" % (os.getpid(), uuid.uuid4().hex)
+
+        # Can be opened on one thread and run on a worker
+        # thread; one queue is only used by one thread at a time
+        self._connection = sqlite3.connect(dbPath, check_same_thread=False)
+        self._connection.execute("PRAGMA foreign_keys = ON")
+        self._connection.executescript(_SCHEMA)
+        self._addMissingColumns()
+        self._requeueExpired()
+
+    def close(self):
+        self._connection.close()
+
+    def submit(self, preset, fontPath, outputPath, priority=0, **layoutOptions):
+        """
+        Queue a job rendering preset with font at fontPath to
+        a PDF at outputPath, and return its id.
+
+        If an identical job is already queued, running or
+        done, its id is returned instead (its priority is
+        raised if needed). Failed or cancelled identical
+        jobs, and done ones whose PDF is gone, are queued
+        again.
+        """
+        presetJSON = json.dumps({"name": preset.name,
+                                 "groups": [dict(group) for group in preset.groups]})
+        optionsJSON = json.dumps(layoutOptions, sort_keys=True)
+        jobHash = hashlib.sha1("\n".join([hashPreset(preset), hashFont(fontPath), optionsJSON,
+                                          os.path.abspath(outputPath)]).encode("utf-8")).hexdigest()
+        now = self._clock()
+
+        with self._connection:
+            row = self._connection.execute("SELECT id, state, priority FROM jobs WHERE jobHash = ?",
+                                           (jobHash,)).fetchone()
+            if row is None:
+                cursor = self._connection.execute(
+                    "INSERT INTO jobs (jobHash, priority, state, presetName, presetJSON, "
+                    "fontPath, outputPath, layoutOptions, createdAt, updatedAt) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (jobHash, priority, QUEUED, preset.name, presetJSON, fontPath,
+                     outputPath, optionsJSON, now, now))
+                return cursor.lastrowid
+
+            jobId, state, oldPriority = row
+            if state in (FAILED, CANCELLED) or (state == DONE and not os.path.exists(outputPath)):
+                self._connection.execute(
+                    "UPDATE jobs SET state = ?, priority = ?, outputPath = ?, error = NULL, "
+                    "pageCount = NULL, pagesDone = 0, updatedAt = ? WHERE id = ?",
+                    (QUEUED, priority, outputPath, now, jobId))
+            elif priority > oldPriority:
+                self._connection.execute("UPDATE jobs SET priority = ?, updatedAt = ? WHERE id = ?",
+                                         (priority, now, jobId))
+            return jobId
+
+    def cancel(self, jobId):
+        """
+        Cancel a queued job. Running or finished jobs
+        can't be cancelled. Return True if cancelled.
+        """
+        self._getRow(jobId)
+        with self._connection:
+            cursor = self._connection.execute(
+                "UPDATE jobs SET state = ?, updatedAt = ? WHERE id = ? AND state = ?",
+                (CANCELLED, self._clock(), jobId, QUEUED))
+            self._connection.execute("DELETE FROM jobPages WHERE jobId = ?", (jobId,))
+        return cursor.rowcount == 1
+
+    def status(self, jobId):
+        """
+        Return dict with job's id, state, priority,
+        presetName, fontPath, outputPath, pageCount,
+        pagesDone, error, createdAt, updatedAt
+        """
+        return dict(zip(_STATUS_KEYS, self._getRow(jobId)))
+
+    def jobs(self, state=None):
+        """
+        Return status dicts of all jobs (or jobs in state),
+        in the order they'd run
+        """
+        query = "SELECT %s FROM jobs" % ", ".join(_STATUS_KEYS)
+        parameters = []
+        if state is not None:
+            query += " WHERE state = ?"
+            parameters.append(state)
+        query += " ORDER BY priority DESC, id"
+        return [dict(zip(_STATUS_KEYS, row))
+                for row in self._connection.execute(query, parameters)]
+
+    def runNext(self, progress=None):
+        """
+        Run the next queued job and return its id,
+        or None if the queue is empty.
+
+        progress(jobId, pagesDone, pageCount) is called
+        after each finished page.
+        """
+        jobId = self._claimNext()
+        if jobId is None:
+            return None
+
+        stopRenewing = threading.Event()
+        renewer = threading.Thread(target=self._renewLeaseUntil,
+                                   args=(jobId, stopRenewing), daemon=True)
+        renewer.start()
+        try:
+            self._runJob(jobId, progress)
+        except _LeaseLost:
+            # Another worker runs it now
+            pass
+        except Exception as error:
+            self._setState(jobId, FAILED, error="%s: %s" % (type(error).__name__, error))
+        else:
+            if self._setState(jobId, DONE):
+                with self._connection:
+                    self._connection.execute("DELETE FROM jobPages WHERE jobId = ?", (jobId,))
+        finally:
+            stopRenewing.set()
+            renewer.join()
+        return jobId
+
+    def runAll(self, progress=None):
+        """
+        Run queued jobs until none are left.
+        Return list of job ids run.
+        """
+        jobIds = []
+        jobId = self.runNext(progress)
+        while jobId is not None:
+            jobIds.append(jobId)
+            jobId = self.runNext(progress)
+        return jobIds
+
+    def _runJob(self, jobId, progress):
+        presetJSON, fontPath, outputPath, optionsJSON = self._connection.execute(
+            "SELECT presetJSON, fontPath, outputPath, layoutOptions FROM jobs WHERE id = ?",
+            (jobId,)).fetchone()
+
+        presetDict = json.loads(presetJSON)
+        preset = ProofPreset(presetDict["name"])
+        if presetDict["groups"]:
+            preset.importPyDict(presetDict, validate=False)
+        layoutOptions = json.loads(optionsJSON)
+        if "pageSize" in layoutOptions:
+            layoutOptions["pageSize"] = tuple(layoutOptions["pageSize"])
+
+        glyphSource = self.glyphSourceFactory(fontPath)
+        pages = list(iterPages(preset, glyphSource, **layoutOptions))
+        with self._connection:
+            self._renewLease(jobId)
+            self._connection.execute("UPDATE jobs SET pageCount = ? WHERE id = ?",
+                                     (len(pages), jobId))
+
+        # Names are assigned in page order: pages built before
+        # a crash match the ones built after it. The temporary
+        # file is ours alone: a worker that lost the job may
+        # still be writing its own.
+        tempPath = "%s.%s.tmp" % (outputPath, self._owner)
+        try:
+            with PDFWriter(tempPath, glyphSource) as writer:
+                xObjectNames = {}
+                for page in pages:
+                    xObjectNames = writer.assignGlyphs(page)
+
+                contents = dict(self._connection.execute(
+                    "SELECT pageIndex, content FROM jobPages WHERE jobId = ?", (jobId,)))
+                for page in pages:
+                    if page.index in contents:
+                        continue
+                    content = buildPageContent(page, xObjectNames, glyphSource.unitsPerEm)
+                    with self._connection:
+                        # Checked first: a worker that lost the job
+                        # mustn't checkpoint its pages
+                        self._renewLease(jobId)
+                        self._connection.execute(
+                            "INSERT INTO jobPages (jobId, pageIndex, content) VALUES (?, ?, ?)",
+                            (jobId, page.index, content))
+                        self._connection.execute(
+                            "UPDATE jobs SET pagesDone = pagesDone + 1, updatedAt = ? WHERE id = ?",
+                            (self._clock(), jobId))
+                    contents[page.index] = content
+                    if progress is not None:
+                        progress(jobId, len(contents), len(pages))
+
+                for page in pages:
+                    writer.writePageContent(page, contents[page.index])
+
+            with self._connection:
+                self._renewLease(jobId)
+        except _LeaseLost:
+            os.remove(tempPath)
+            raise
+
+        os.replace(tempPath, outputPath)
+
+    def _addMissingColumns(self):
+        """
+        Upgrade a database made by an older version
+        """
+        columnNames = {row[1] for row in self._connection.execute("PRAGMA table_info(jobs)")}
+        with self._connection:
+            for columnName, columnType in _ADDED_COLUMNS:
+                if columnName not in columnNames:
+                    self._connection.execute("ALTER TABLE jobs ADD COLUMN %s %s"
+                                             % (columnName, columnType))
+
+    def _requeueExpired(self):
+        """
+        Queue running jobs whose lease expired again:
+        their worker crashed, they resume where they were
+        """
+        with self._connection:
+            self._connection.execute(
+                "UPDATE jobs SET state = ?, owner = NULL, leaseExpiresAt = NULL "
+                "WHERE state = ? AND (leaseExpiresAt IS NULL OR leaseExpiresAt < ?)",
+                (QUEUED, RUNNING, self._clock()))
+
+    def _renewLease(self, jobId, connection=None):
+        """
+        Extend our lease on jobId, or raise _LeaseLost
+        if another worker took the job over
+        """
+        connection = self._connection if connection is None else connection
+        cursor = connection.execute(
+            "UPDATE jobs SET leaseExpiresAt = ? WHERE id = ? AND state = ? AND owner = ?",
+            (self._clock() + self.leaseTime, jobId, RUNNING, self._owner))
+        if cursor.rowcount != 1:
+            raise _LeaseLost(jobId)
+
+    def _renewLeaseUntil(self, jobId, stopEvent):
+        """
+        Renew lease (on its own connection) every third
+        of leaseTime, so slow pages don't lose it
+        """
+        connection = sqlite3.connect(self._dbPath)
+        try:
+            while not stopEvent.wait(self.leaseTime / 3):
+                with connection:
+                    self._renewLease(jobId, connection)
+        except _LeaseLost:
+            pass
+        finally:
+            connection.close()
+
+    def _claimNext(self):
+        """
+        Mark the next queued job as running, leased to this
+        queue, and return its id, or None. Another worker may
+        claim it between the SELECT and the UPDATE: the UPDATE
+        only succeeds if it's still queued, else try the next one.
+        """
+        self._requeueExpired()
+        while True:
+            row = self._connection.execute(
+                "SELECT id FROM jobs WHERE state = ? ORDER BY priority DESC, id LIMIT 1",
+                (QUEUED,)).fetchone()
+            if row is None:
+                return None
+
+            jobId = row[0]
+            with self._connection:
+                now = self._clock()
+                cursor = self._connection.execute(
+                    "UPDATE jobs SET state = ?, error = NULL, owner = ?, leaseExpiresAt = ?, "
+                    "updatedAt = ? WHERE id = ? AND state = ?",
+                    (RUNNING, self._owner, now + self.leaseTime, now, jobId, QUEUED))
+            if cursor.rowcount == 1:
+                return jobId
+
+    def _setState(self, jobId, state, error=None):
+        """
+        Finish our running job. Return False if
+        another worker took it over.
+        """
+        with self._connection:
+            cursor = self._connection.execute(
+                "UPDATE jobs SET state = ?, error = ?, owner = NULL, leaseExpiresAt = NULL, "
+                "updatedAt = ? WHERE id = ? AND state = ? AND owner = ?",
+                (state, error, self._clock(), jobId, RUNNING, self._owner))
+        return cursor.rowcount == 1
+
+    def _getRow(self, jobId):
+        row = self._connection.execute("SELECT %s FROM jobs WHERE id = ?"
+                                       % ", ".join(_STATUS_KEYS), (jobId,)).fetchone()
+        if row is None:
+            raise KeyError("Job doesn't exist")
+        return row
@@ -0,0 +1,193 @@
+"""
+Lay out proof groups on pages
+
+Pages are plain data (namedtuples of glyph names and
+positions), so any writer (PDF, ...) can draw them, and
+they can be handed between threads or processes.
+iterPages() is a generator: pages are laid out one at a
+time, as the writer asks for them.
+
+Groups using characters the font doesn't have are found
+with proofPreset.coverage, before they're laid out: they
+can be flagged (a label listing the missing characters)
+or skipped.
+"""
+
+from collections import namedtuple
+
+from proofPreset import coverage
+
+# A4, in points
+DEFAULT_PAGE_SIZE = (595.276, 841.89)
+DEFAULT_TYPE_SIZE = 12
+NOTDEF = ".notdef"
+
+Page = namedtuple("Page", "index width height runs")
+# Group name, drawn with the writer's own label font
+LabelRun = namedtuple("LabelRun", "text x y size")
+# glyphs is a tuple of (glyphName, x)
+GlyphRun = namedtuple("GlyphRun", "glyphs y size")
+
+def getGlyphNames(text, glyphSource):
+    """
+    Return list of (character, glyphName) for text.
+    Unmapped characters get .notdef (if the source has
+    one) or are dropped.
+    """
+    hasNotdef = NOTDEF in glyphSource
+    glyphNames = []
+    for character in text:
+        glyphName = glyphSource.getGlyphName(character)
+        if glyphName is None or glyphName not in glyphSource:
+            if not hasNotdef:
+                continue
+            glyphName = NOTDEF
+        glyphNames.append((character, glyphName))
+    return glyphNames
+
+def getSupportedCharacters(glyphSource):
+    """
+    Return frozenset of characters glyphSource can draw
+    """
+    return frozenset(chr(unicodeValue) for unicodeValue, glyphName in glyphSource.cmap.items()
+                     if glyphName in glyphSource)
+
+def getUnrenderableGroupIndices(preset, glyphSource):
+    """
+    Return indices of groups in preset using characters
+    that glyphSource can't draw
+    """
+    return coverage.getUnrenderableGroupIndices(preset, getSupportedCharacters(glyphSource))
+
+def wrapLine(glyphs, maxWidth):
+    """
+    Break glyphs, a list of (character, glyphName, advance),
+    into lines no wider than maxWidth. Lines break at spaces
+    when possible, else between any two glyphs.
+    """
+    lines = []
+    current = []
+    width = 0
+    lastSpace = None
+
+    for glyph in glyphs:
+        character, _, advance = glyph
+        if current and width + advance > maxWidth:
+            if lastSpace is not None:
+                lines.append(current[:lastSpace])
+                current = current[lastSpace + 1:]
+            else:
+                lines.append(current)
+                current = []
+            width = sum(item[2] for item in current)
+            lastSpace = None
+            for index, item in enumerate(current):
+                if item[0] == " ":
+                    lastSpace = index
+
+        current.append(glyph)
+        width += advance
+        if character == " ":
+            lastSpace = len(current) - 1
+
+    if current or not lines:
+        lines.append(current)
+    return lines
+
+def _toPoints(value, default):
+    """
+    typeSize / leading can be "" (not set)
+    """
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+def iterPages(preset, glyphSource, pageSize=DEFAULT_PAGE_SIZE, margin=36,
+              labelSize=8, onlyPrinted=True, missingGlyphs="flag"):
+    """
+    Yield Page() objects for the groups in preset.
+
+    Each group starts with its name as a label, followed by
+    its contents at the group's typeSize / leading (12 pt
+    and 1.2 * typeSize when not set). Groups whose "print"
+    is False are skipped unless onlyPrinted is False.
+
+    missingGlyphs is what happens to groups using characters
+    glyphSource can't draw:
+    - "flag": a second label lists the missing characters
+    - "skip": the group isn't laid out
+    - None: nothing (unmapped characters are .notdef or dropped)
+    """
+    if missingGlyphs not in ("flag", "skip", None):
+        raise ValueError("missingGlyphs must be 'flag', 'skip' or None")
+
+    pageWidth, pageHeight = pageSize
+    maxWidth = pageWidth - 2 * margin
+    top = pageHeight - margin
+    unitsPerEm = glyphSource.unitsPerEm
+
+    supported = getSupportedCharacters(glyphSource) if missingGlyphs else None
+
+    advances = {}
+    def getAdvance(glyphName):
+        if glyphName not in advances:
+            advances[glyphName] = glyphSource.getAdvance(glyphName)
+        return advances[glyphName]
+
+    pageIndex = 0
+    runs = []
+    y = top
+
+    # The preset keeps its printable groups indexed
+    groups = preset.printableGroups if onlyPrinted else preset.groups
+    for group in groups:
+        missing = None
+        if supported is not None:
+            missing = coverage.getMissingCharacters(group, supported)
+            if missing and missingGlyphs == "skip":
+                continue
+
+        typeSize = _toPoints(group["typeSize"], DEFAULT_TYPE_SIZE)
+        leading = _toPoints(group["leading"], typeSize * 1.2)
+        scale = typeSize / unitsPerEm
+
+        labelHeight = labelSize * (2.75 if missing else 1.5)
+
+        # Start a new page if the labels and first line don't fit
+        if runs and y - labelHeight - leading < margin:
+            yield Page(pageIndex, pageWidth, pageHeight, tuple(runs))
+            pageIndex += 1
+            runs = []
+            y = top
+
+        y -= labelSize
+        runs.append(LabelRun(group["name"], margin, y, labelSize))
+        if missing:
+            y -= labelSize * 1.25
+            runs.append(LabelRun("Missing: %s" % " ".join(sorted(missing)),
+                                 margin, y, labelSize))
+        y -= labelSize * 0.5
+
+        for line in group["contents"]:
+            glyphs = [(character, glyphName, getAdvance(glyphName) * scale)
+                      for character, glyphName in getGlyphNames(line, glyphSource)]
+
+            for wrappedLine in wrapLine(glyphs, maxWidth):
+                if y - leading < margin and runs:
+                    yield Page(pageIndex, pageWidth, pageHeight, tuple(runs))
+                    pageIndex += 1
+                    runs = []
+                    y = top
+
+                y -= leading
+                x = margin
+                placedGlyphs = []
+                for _, glyphName, advance in wrappedLine:
+                    placedGlyphs.append((glyphName, round(x, 3)))
+                    x += advance
+                if placedGlyphs:
+                    runs.append(GlyphRun(tuple(placedGlyphs), round(y, 3), typeSize))
+
+    if runs:
+        yield Page(pageIndex, pageWidth, pageHeight, tuple(runs))
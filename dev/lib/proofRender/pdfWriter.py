@@ -0,0 +1,274 @@
+"""
+Pure-Python PDF writer for proofs
+
+Each glyph outline is written once, as a form XObject, the
+first time it's used. Every later occurrence only places
+it by reference ("q s 0 0 s x y cm /G1 Do Q"), so a
+400-page proof holds each outline once, not thousands of
+times.
+
+Pages are written to disk as soon as they're drawn; only
+the cross-reference offsets and XObject names stay in
+memory. Content streams are zlib (FlateDecode) compressed.
+"""
+
+import zlib
+
+from proofRender.errors import ProofRenderError
+from proofRender.layout import DEFAULT_PAGE_SIZE, GlyphRun, iterPages
+from proofRender.pens import OutlinePen
+
+# Bump when output changes, so cached results are dropped
+RENDERER_VERSION = 3
+
+# Fixed object numbers; the rest are handed out in order
+CATALOG = 1
+PAGES = 2
+RESOURCES = 3
+LABEL_FONT = 4
+
+def formatNumber(value):
+    """
+    Shortest PDF number for value (3 decimals max)
+    """
+    if value == int(value):
+        return str(int(value))
+    return ("%.3f" % value).rstrip("0").rstrip(".")
+
+def escapeString(text):
+    """
+    Return text as a PDF literal string: (text)
+    """
+    data = text.encode("cp1252", "replace")
+    data = data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+    return b"(" + data + b")"
+
+# PDF path operators for OutlinePen segments
+PATH_OPERATORS = {"moveTo": "m", "lineTo": "l", "curveTo": "c", "closePath": "h"}
+
+class PDFPathPen(OutlinePen):
+    """
+    Pen that turns outlines into PDF path operators
+    """
+    @property
+    def operators(self):
+        operators = []
+        for operator, points in self.segments:
+            values = [formatNumber(value) for point in points for value in point]
+            values.append(PATH_OPERATORS[operator])
+            operators.append(" ".join(values))
+        return operators
+
+    def getPathData(self):
+        return "\n".join(self.operators).encode("ascii")
+
+class PDFWriter:
+    """
+    Write pages from proofRender.layout to filePath.
+
+    Use as a context manager, or call close() when done:
+    the file is only a valid PDF once closed.
+    """
+    def __init__(self, filePath, glyphSource, compress=True, labelFont="Helvetica"):
+        self.filePath = filePath
+        self.glyphSource = glyphSource
+        self.compress = compress
+        self.labelFont = labelFont
+
+        # {glyphName: XObject name, or None for empty glyphs}
+        self._glyphXObjects = {}
+        # {XObject name: PDFPathPen} assigned, not written yet
+        self._unwrittenOutlines = {}
+        self._xObjectNumbers = {}
+        self._pageNumbers = []
+        self._offsets = {}
+        self._nextObjectNumber = LABEL_FONT + 1
+        self._position = 0
+        self._closed = False
+
+        self._file = open(filePath, "wb")
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._writeObject(CATALOG, b"<< /Type /Catalog /Pages %d 0 R >>" % PAGES)
+        self._writeObject(LABEL_FONT, b"<< /Type /Font /Subtype /Type1 /BaseFont /%s "
+                                      b"/Encoding /WinAnsiEncoding >>"
+                                      % labelFont.encode("ascii"))
+
+    @property
+    def pageCount(self):
+        return len(self._pageNumbers)
+
+    @property
+    def glyphCount(self):
+        """
+        Number of glyph outlines written (once each)
+        """
+        return len(self._xObjectNumbers)
+
+    def writePage(self, page):
+        """
+        Draw a layout Page() and write it to disk
+        """
+        xObjectNames = self.assignGlyphs(page)
+        content = buildPageContent(page, xObjectNames, self.glyphSource.unitsPerEm,
+                                   self.compress)
+        self.writePageContent(page, content)
+
+    def assignGlyphs(self, page):
+        """
+        Read outlines of glyphs first used on page and give
+        them XObject names (written with the page they're
+        first used on). Return {glyphName: XObject name}
+        for all glyphs assigned so far.
+
+        Assigning pages in order, before their contents
+        are built, keeps output the same no matter how
+        (or where) contents are built.
+        """
+        for run in page.runs:
+            if isinstance(run, GlyphRun):
+                for glyphName, _ in run.glyphs:
+                    if glyphName not in self._glyphXObjects:
+                        self._assignGlyph(glyphName)
+        return self._glyphXObjects
+
+    def writePageContent(self, page, content):
+        """
+        Write page, with content from buildPageContent().
+        Outlines first used on page are written first.
+        """
+        if self._closed:
+            raise ProofRenderError("PDFWriter is closed")
+
+        for run in page.runs:
+            if isinstance(run, GlyphRun):
+                for glyphName, _ in run.glyphs:
+                    xObjectName = self._glyphXObjects.get(glyphName)
+                    if xObjectName in self._unwrittenOutlines:
+                        self._writeGlyphXObject(xObjectName)
+
+        contentNumber = self._newObjectNumber()
+        self._writeStream(contentNumber, b"", content, isCompressed=self.compress)
+
+        pageNumber = self._newObjectNumber()
+        mediaBox = "0 0 %s %s" % (formatNumber(page.width), formatNumber(page.height))
+        self._writeObject(pageNumber, ("<< /Type /Page /Parent %d 0 R /MediaBox [%s] "
+                                       "/Resources %d 0 R /Contents %d 0 R >>"
+                                       % (PAGES, mediaBox, RESOURCES, contentNumber)).encode("ascii"))
+        self._pageNumbers.append(pageNumber)
+
+    def close(self):
+        """
+        Write page tree, shared resources and
+        cross-reference table, then close file
+        """
+        if self._closed:
+            return
+
+        kids = " ".join("%d 0 R" % number for number in self._pageNumbers)
+        self._writeObject(PAGES, ("<< /Type /Pages /Kids [%s] /Count %d >>"
+                                  % (kids, len(self._pageNumbers))).encode("ascii"))
+
+        xObjects = " ".join("/%s %d 0 R" % (name, number)
+                            for name, number in self._xObjectNumbers.items())
+        self._writeObject(RESOURCES, ("<< /Font << /F1 %d 0 R >> /XObject << %s >> >>"
+                                      % (LABEL_FONT, xObjects)).encode("ascii"))
+
+        objectCount = self._nextObjectNumber
+        xrefPosition = self._position
+        xref = [b"xref\n0 %d\n" % objectCount, b"0000000000 65535 f \n"]
+        for number in range(1, objectCount):
+            xref.append(b"%010d 00000 n \n" % self._offsets[number])
+        self._write(b"".join(xref))
+        self._write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                    % (objectCount, CATALOG, xrefPosition))
+
+        self._file.close()
+        self._closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+
+    def _assignGlyph(self, glyphName):
+        pen = PDFPathPen(self.glyphSource)
+        self.glyphSource.drawGlyph(glyphName, pen)
+        if pen.bounds[0] is None:
+            # Nothing to draw (eg. space)
+            self._glyphXObjects[glyphName] = None
+            return
+
+        xObjectName = "G%d" % (len(self._unwrittenOutlines) + len(self._xObjectNumbers) + 1)
+        self._unwrittenOutlines[xObjectName] = pen
+        self._glyphXObjects[glyphName] = xObjectName
+
+    def _writeGlyphXObject(self, xObjectName):
+        pen = self._unwrittenOutlines.pop(xObjectName)
+        bbox = " ".join(formatNumber(value) for value in pen.bounds)
+        number = self._newObjectNumber()
+        self._writeStream(number, ("/Type /XObject /Subtype /Form /BBox [%s] " % bbox).encode("ascii"),
+                          pen.getPathData() + b"\nf")
+        self._xObjectNumbers[xObjectName] = number
+
+    def _newObjectNumber(self):
+        number = self._nextObjectNumber
+        self._nextObjectNumber += 1
+        return number
+
+    def _write(self, data):
+        self._file.write(data)
+        self._position += len(data)
+
+    def _writeObject(self, number, body):
+        self._offsets[number] = self._position
+        self._write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+
+    def _writeStream(self, number, dictEntries, data, isCompressed=False):
+        if self.compress:
+            if not isCompressed:
+                data = zlib.compress(data)
+            dictEntries += b"/Filter /FlateDecode "
+        self._offsets[number] = self._position
+        self._write(b"%d 0 obj\n<< %s/Length %d >>\nstream\n" % (number, dictEntries, len(data)))
+        self._write(data)
+        self._write(b"\nendstream\nendobj\n")
+
+def buildPageContent(page, xObjectNames, unitsPerEm, compress=True):
+    """
+    Return content stream data for page.
+
+    xObjectNames is {glyphName: XObject name} (see
+    PDFWriter.assignGlyphs()). Needs no glyph source or
+    writer, so pages can be built in other processes.
+    """
+    content = []
+    for run in page.runs:
+        if isinstance(run, GlyphRun):
+            scale = formatNumber(run.size / unitsPerEm)
+            y = formatNumber(run.y)
+            for glyphName, x in run.glyphs:
+                xObjectName = xObjectNames[glyphName]
+                if xObjectName is not None:
+                    content.append("q %s 0 0 %s %s %s cm /%s Do Q"
+                                   % (scale, scale, formatNumber(x), y, xObjectName))
+        else:
+            content.append("BT /F1 %s Tf %s %s Td %s Tj ET"
+                           % (formatNumber(run.size), formatNumber(run.x),
+                              formatNumber(run.y), escapeString(run.text).decode("latin-1")))
+
+    data = "\n".join(content).encode("latin-1")
+    if compress:
+        data = zlib.compress(data)
+    return data
+
+def writePresetPDF(preset, filePath, glyphSource, pageSize=DEFAULT_PAGE_SIZE,
+                   compress=True, **layoutOptions):
+    """
+    Lay out preset and write it to filePath as PDF,
+    page by page. Return number of pages written.
+    """
+    with PDFWriter(filePath, glyphSource, compress) as writer:
+        for page in iterPages(preset, glyphSource, pageSize, **layoutOptions):
+            writer.writePage(page)
+    return writer.pageCount
@@ -0,0 +1,140 @@
+"""
+Pens shared by proof writers
+
+OutlinePen records outlines as plain segments (moveTo,
+lineTo, curveTo, closePath) with absolute, transformed
+points: quadratic curves are converted to cubic ones and
+components are drawn in place. Writers then turn segments
+into PDF operators, SVG path data or pixels.
+"""
+
+from proofRender.errors import ProofRenderError
+
+class OutlinePen:
+    """
+    Pen recording outlines into segments, a list of
+    (operator, points) with operator one of "moveTo",
+    "lineTo", "curveTo", "closePath".
+
+    Components are drawn from glyphSource, transformed.
+    bounds is [xMin, yMin, xMax, yMax] of all points
+    (control points included), or Nones if empty.
+
+    Open contours (ended with endPath()) are dropped:
+    proofs fill outlines, and filling would close them.
+    """
+    def __init__(self, glyphSource=None, transformation=(1, 0, 0, 1, 0, 0),
+                 segments=None, bounds=None):
+        self.glyphSource = glyphSource
+        self.transformation = transformation
+        # Shared with component pens
+        self.segments = [] if segments is None else segments
+        self.bounds = [None] * 4 if bounds is None else bounds
+        self._currentPoint = None
+        self._startPoint = None
+        # Where the current contour starts, and bounds before it
+        self._contourStart = None
+        self._contourBounds = None
+
+    def _transform(self, point):
+        xx, xy, yx, yy, dx, dy = self.transformation
+        x, y = point
+        return (xx * x + yx * y + dx, xy * x + yy * y + dy)
+
+    def _addSegment(self, operator, *points):
+        transformedPoints = tuple(self._transform(point) for point in points)
+        bounds = self.bounds
+        for x, y in transformedPoints:
+            if bounds[0] is None:
+                bounds[:] = [x, y, x, y]
+            else:
+                bounds[0] = min(bounds[0], x)
+                bounds[1] = min(bounds[1], y)
+                bounds[2] = max(bounds[2], x)
+                bounds[3] = max(bounds[3], y)
+        self.segments.append((operator, transformedPoints))
+
+    def moveTo(self, point):
+        self._contourStart = len(self.segments)
+        self._contourBounds = list(self.bounds)
+        self._addSegment("moveTo", point)
+        self._currentPoint = self._startPoint = point
+
+    def lineTo(self, point):
+        self._addSegment("lineTo", point)
+        self._currentPoint = point
+
+    def curveTo(self, *points):
+        if len(points) != 3:
+            raise ProofRenderError("Only cubic curves (2 off-curve points) are supported")
+        self._addSegment("curveTo", *points)
+        self._currentPoint = points[-1]
+
+    def qCurveTo(self, *points):
+        points = list(points)
+        if points[-1] is None:
+            # Closed contour of off-curve points only:
+            # start on the implied point between last and first
+            points.pop()
+            start = self._midPoint(points[-1], points[0])
+            self.moveTo(start)
+            points.append(start)
+
+        offCurvePoints = points[:-1]
+        for index, offCurve in enumerate(offCurvePoints):
+            if index == len(offCurvePoints) - 1:
+                onCurve = points[-1]
+            else:
+                onCurve = self._midPoint(offCurve, offCurvePoints[index + 1])
+            self._quadraticToCubic(offCurve, onCurve)
+
+        if not offCurvePoints:
+            self.lineTo(points[-1])
+
+    def _quadraticToCubic(self, offCurve, onCurve):
+        x0, y0 = self._currentPoint
+        x1, y1 = offCurve
+        x2, y2 = onCurve
+        self.curveTo((x0 + 2 * (x1 - x0) / 3, y0 + 2 * (y1 - y0) / 3),
+                     (x2 + 2 * (x1 - x2) / 3, y2 + 2 * (y1 - y2) / 3),
+                     onCurve)
+
+    @staticmethod
+    def _midPoint(point1, point2):
+        return ((point1[0] + point2[0]) / 2, (point1[1] + point2[1]) / 2)
+
+    def closePath(self):
+        self.segments.append(("closePath", ()))
+        self._contourStart = None
+        self._currentPoint = self._startPoint
+
+    def endPath(self):
+        # Open contours aren't filled: drop their segments
+        if self._contourStart is not None:
+            del self.segments[self._contourStart:]
+            self.bounds[:] = self._contourBounds
+        self._contourStart = None
+        self._currentPoint = None
+
+    def addComponent(self, glyphName, transformation):
+        if self.glyphSource is None:
+            raise ProofRenderError("Can't draw component %s without a glyph source" % glyphName)
+
+        # Combine component transformation with ours
+        a1, b1, c1, d1, e1, f1 = transformation
+        a2, b2, c2, d2, e2, f2 = self.transformation
+        combined = (a1 * a2 + b1 * c2, a1 * b2 + b1 * d2,
+                    c1 * a2 + d1 * c2, c1 * b2 + d1 * d2,
+                    e1 * a2 + f1 * c2 + e2, e1 * b2 + f1 * d2 + f2)
+
+        componentPen = self.__class__(self.glyphSource, combined,
+                                      self.segments, self.bounds)
+        self.glyphSource.drawGlyph(glyphName, componentPen)
+
+def getOutline(glyphSource, glyphName):
+    """
+    Return (segments, bounds) for glyphName
+    """
+    pen = OutlinePen(glyphSource)
+    glyphSource.drawGlyph(glyphName, pen)
+    return pen.segments, pen.bounds
@@ -0,0 +1,102 @@
+"""
+Render PDF proofs on several processes
+
+Pagination is done once, up front. Glyph outlines are then
+read (each once) and given XObject names in page order, in
+this process. Only building and compressing page content
+streams, the bulk of the work, is spread over a process
+pool: it needs nothing but the pages and the XObject names,
+so no glyph source (or font) has to be sent to the workers.
+
+Pages come back in order and are written exactly as
+PDFWriter.writePage() would write them, so the file is
+byte-identical whatever the number of workers.
+
+Run `python -m proofRender.pipeline` for a benchmark of
+page throughput against worker count.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from proofRender.layout import DEFAULT_PAGE_SIZE, iterPages
+from proofRender.pdfWriter import PDFWriter, buildPageContent
+
+# Set in each worker process by _initWorker()
+_workerArgs = None
+
+def _initWorker(xObjectNames, unitsPerEm, compress):
+    global _workerArgs
+    _workerArgs = (xObjectNames, unitsPerEm, compress)
+
+def _buildPageContent(page):
+    return buildPageContent(page, *_workerArgs)
+
+def renderPDF(preset, filePath, glyphSource, workers=None, pageSize=DEFAULT_PAGE_SIZE,
+              compress=True, chunkSize=4, **layoutOptions):
+    """
+    Lay out preset and write it to filePath as PDF,
+    building pages on workers processes (defaults to
+    the number of CPUs). Return number of pages written.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    pages = list(iterPages(preset, glyphSource, pageSize, **layoutOptions))
+
+    with PDFWriter(filePath, glyphSource, compress) as writer:
+        xObjectNames = {}
+        for page in pages:
+            xObjectNames = writer.assignGlyphs(page)
+        unitsPerEm = glyphSource.unitsPerEm
+
+        if workers <= 1 or len(pages) <= 1:
+            contents = (buildPageContent(page, xObjectNames, unitsPerEm, compress)
+                        for page in pages)
+            for page, content in zip(pages, contents):
+                writer.writePageContent(page, content)
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_initWorker,
+                                     initargs=(xObjectNames, unitsPerEm, compress)) as executor:
+                # map() hands results back in page order
+                contents = executor.map(_buildPageContent, pages, chunksize=chunkSize)
+                for page, content in zip(pages, contents):
+                    writer.writePageContent(page, content)
+
+    return len(pages)
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+    from proofPreset import ProofPreset
+    from proofRender.glyphSource import GlyphSource
+
+    # Boxes with a few curves, for every ASCII letter
+    glyphs = {}
+    cmap = {}
+    for character in "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz":
+        outline = [("moveTo", ((50, 0),)), ("lineTo", ((450, 0),))]
+        outline += [("curveTo", ((500, 100 * step), (500, 100 * step + 50), (450, 100 * step + 100)))
+                    for step in range(7)]
+        outline += [("lineTo", ((50, 700),)), ("closePath", ())]
+        glyphs[character] = {"width": 500, "outline": outline}
+        cmap[ord(character)] = character
+    glyphSource = GlyphSource(glyphs, cmap)
+
+    preset = ProofPreset("Benchmark")
+    for groupIndex in range(20):
+        preset.addGroup({"name": "Group %d" % groupIndex, "typeSize": 9, "print": True,
+                         "contents": ["HAHBHCHDHE OAOBOCODOE nanbncndne " * 3] * 600})
+
+    with tempfile.TemporaryDirectory() as tempDir:
+        filePath = os.path.join(tempDir, "benchmark.pdf")
+        outputs = set()
+        for workers in (1, 2, 4, 8):
+            start = time.perf_counter()
+            pageCount = renderPDF(preset, filePath, glyphSource, workers=workers)
+            elapsed = time.perf_counter() - start
+            with open(filePath, "rb") as pdfFile:
+                outputs.add(pdfFile.read())
+            print("%d worker(s): %d pages in %.2fs (%.0f pages/s)"
+                  % (workers, pageCount, elapsed, pageCount / elapsed))
+        print("Identical output: %s" % (len(outputs) == 1))
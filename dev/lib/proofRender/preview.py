@@ -0,0 +1,315 @@
+"""
+Page previews (SVG or PNG) with a tile cache
+
+Each page is rendered as one tile, cached by a hash of the
+page's content plus zoom level (LRU eviction). Pages that
+didn't change since the last layout, or that look the same
+as another page, are never rendered twice. Asking for a
+page also renders its neighbours on background threads, so
+flipping through a proof shows pages right away.
+
+Headless use (eg. visual regression checks on CI):
+
+    python -m proofRender.preview preset.json font.otf outputDir --format png
+"""
+
+import hashlib
+import math
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from xml.sax.saxutils import escape
+
+from proofRender import raster
+from proofRender.errors import ProofRenderError
+from proofRender.layout import DEFAULT_PAGE_SIZE, GlyphRun, getGlyphNames, iterPages
+from proofRender.pdfWriter import formatNumber
+from proofRender.pens import getOutline
+
+FORMATS = ("svg", "png")
+# SVG path commands for OutlinePen segments
+PATH_COMMANDS = {"moveTo": "M", "lineTo": "L", "curveTo": "C", "closePath": "Z"}
+
+class TileCache:
+    """
+    Thread-safe LRU cache of rendered tiles
+    """
+    def __init__(self, maxSize=64):
+        self.maxSize = maxSize
+        self._tiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Return cached tile, or None
+        """
+        with self._lock:
+            if key not in self._tiles:
+                return None
+            self._tiles.move_to_end(key)
+            return self._tiles[key]
+
+    def put(self, key, tile):
+        with self._lock:
+            self._tiles[key] = tile
+            self._tiles.move_to_end(key)
+            while len(self._tiles) > self.maxSize:
+                self._tiles.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._tiles.clear()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._tiles
+
+    def __len__(self):
+        return len(self._tiles)
+
+def getPageHash(page):
+    """
+    Return hash of what's drawn on page (not its index)
+    """
+    content = repr((page.width, page.height, page.runs))
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+class GlyphOutlines:
+    """
+    Outlines read from glyphSource, each glyph once
+    """
+    def __init__(self, glyphSource):
+        self.glyphSource = glyphSource
+        self._outlines = {}
+        self._lock = threading.Lock()
+
+    def get(self, glyphName):
+        """
+        Return (segments, bounds) for glyphName
+        """
+        outline = self._outlines.get(glyphName)
+        if outline is None:
+            with self._lock:
+                outline = self._outlines.get(glyphName)
+                if outline is None:
+                    outline = getOutline(self.glyphSource, glyphName)
+                    self._outlines[glyphName] = outline
+        return outline
+
+def renderPageSVG(page, outlines, zoom=1.0):
+    """
+    Return SVG data for page. Each glyph used is defined
+    once and placed with <use>.
+    """
+    unitsPerEm = outlines.glyphSource.unitsPerEm
+    width = formatNumber(page.width * zoom)
+    height = formatNumber(page.height * zoom)
+
+    pathIds = {}
+    definitions = []
+    body = []
+    for run in page.runs:
+        if isinstance(run, GlyphRun):
+            scale = formatNumber(run.size / unitsPerEm * zoom)
+            y = formatNumber((page.height - run.y) * zoom)
+            for glyphName, x in run.glyphs:
+                if glyphName not in pathIds:
+                    segments, bounds = outlines.get(glyphName)
+                    if bounds[0] is None:
+                        pathIds[glyphName] = None
+                        continue
+                    pathIds[glyphName] = "g%d" % (len(definitions) + 1)
+                    pathData = " ".join(
+                        " ".join([PATH_COMMANDS[operator]]
+                                 + [formatNumber(value) for point in points for value in point])
+                        for operator, points in segments)
+                    definitions.append('<path id="%s" d="%s"/>' % (pathIds[glyphName], pathData))
+
+                pathId = pathIds[glyphName]
+                if pathId is not None:
+                    body.append('<use xlink:href="#%s" transform="matrix(%s 0 0 -%s %s %s)"/>'
+                                % (pathId, scale, scale, formatNumber(x * zoom), y))
+        else:
+            body.append('<text x="%s" y="%s" font-family="Helvetica" font-size="%s">%s</text>'
+                        % (formatNumber(run.x * zoom), formatNumber((page.height - run.y) * zoom),
+                           formatNumber(run.size * zoom), escape(run.text)))
+
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+             '<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+             'width="%s" height="%s" viewBox="0 0 %s %s">' % (width, height, width, height),
+             '<rect width="100%" height="100%" fill="white"/>',
+             "<defs>"] + definitions + ["</defs>"] + body + ["</svg>", ""]
+    return "\n".join(lines).encode("utf-8")
+
+def renderPagePNG(page, outlines, zoom=1.0):
+    """
+    Return grayscale PNG data for page. Labels are
+    drawn with the glyph source too.
+    """
+    glyphSource = outlines.glyphSource
+    unitsPerEm = glyphSource.unitsPerEm
+    width = math.ceil(page.width * zoom)
+    height = math.ceil(page.height * zoom)
+    coverageRows = [[0.0] * width for _ in range(height)]
+
+    for run in page.runs:
+        if isinstance(run, GlyphRun):
+            placedGlyphs = run.glyphs
+        else:
+            placedGlyphs = []
+            x = run.x
+            for _, glyphName in getGlyphNames(run.text, glyphSource):
+                placedGlyphs.append((glyphName, x))
+                x += glyphSource.getAdvance(glyphName) * run.size / unitsPerEm
+
+        scale = run.size / unitsPerEm * zoom
+        originY = (page.height - run.y) * zoom
+        for glyphName, x in placedGlyphs:
+            segments, bounds = outlines.get(glyphName)
+            if bounds[0] is None:
+                continue
+            originX = x * zoom
+            # Skip glyphs entirely off the page
+            if (originY - bounds[3] * scale > height or originY - bounds[1] * scale < 0
+                    or originX + bounds[0] * scale > width or originX + bounds[2] * scale < 0):
+                continue
+
+            def transform(point):
+                return (originX + point[0] * scale, originY - point[1] * scale)
+            raster.fillPolygons(raster.flattenSegments(segments, transform),
+                                coverageRows, width)
+
+    return raster.encodePNG(coverageRows, width)
+
+RENDERERS = {"svg": renderPageSVG, "png": renderPagePNG}
+
+class PreviewRenderer:
+    """
+    Render preview pages of preset, one tile per page.
+
+    getPage(index, zoom) returns a cached tile if there is
+    one, else renders it; either way, the prefetch pages on
+    each side are then rendered on background threads.
+
+    Call relayout() after preset changed: pages whose
+    content didn't change keep their cached tiles.
+    """
+    def __init__(self, preset, glyphSource, fileFormat="png", cacheSize=64,
+                 prefetch=2, workers=2, pageSize=DEFAULT_PAGE_SIZE, **layoutOptions):
+        if fileFormat not in FORMATS:
+            raise ProofRenderError("Preview format must be one of %s" % ", ".join(FORMATS))
+
+        self.preset = preset
+        self.glyphSource = glyphSource
+        self.fileFormat = fileFormat
+        self.prefetch = prefetch
+        self.pageSize = pageSize
+        self.layoutOptions = layoutOptions
+
+        self.tileCache = TileCache(cacheSize)
+        self.outlines = GlyphOutlines(glyphSource)
+        self.pages = []
+        self._pageHashes = []
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+
+        self.relayout()
+
+    @property
+    def pageCount(self):
+        return len(self.pages)
+
+    def relayout(self):
+        """
+        Paginate preset again
+        """
+        self.pages = list(iterPages(self.preset, self.glyphSource, self.pageSize,
+                                    **self.layoutOptions))
+        self._pageHashes = [getPageHash(page) for page in self.pages]
+
+    def getPage(self, index, zoom=1.0):
+        """
+        Return tile (SVG or PNG data) for page at index
+        """
+        tile = self._getTile(index, zoom)
+        for offset in range(1, self.prefetch + 1):
+            for neighbour in (index + offset, index - offset):
+                if 0 <= neighbour < len(self.pages):
+                    self.prefetchPage(neighbour, zoom)
+        return tile
+
+    def prefetchPage(self, index, zoom=1.0):
+        """
+        Render page on a background thread, unless it's
+        cached or already being rendered. Return the
+        future, or None.
+        """
+        key = self._getKey(index, zoom)
+        if key in self.tileCache:
+            return None
+        with self._lock:
+            if key in self._pending:
+                return self._pending[key]
+            future = self._executor.submit(self._getTile, index, zoom)
+            self._pending[key] = future
+        return future
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _getKey(self, index, zoom):
+        return (self._pageHashes[index], zoom, self.fileFormat)
+
+    def _getTile(self, index, zoom):
+        page = self.pages[index]
+        key = self._getKey(index, zoom)
+        try:
+            tile = self.tileCache.get(key)
+            if tile is None:
+                tile = RENDERERS[self.fileFormat](page, self.outlines, zoom)
+                self.tileCache.put(key, tile)
+            return tile
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+def dumpPreviews(preset, glyphSource, outputDir, fileFormat="png", zoom=1.0,
+                 **layoutOptions):
+    """
+    Write a preview file per page (page-001.png, ...)
+    to outputDir and return list of file paths
+    """
+    os.makedirs(outputDir, exist_ok=True)
+    renderer = PreviewRenderer(preset, glyphSource, fileFormat, prefetch=0,
+                               **layoutOptions)
+    filePaths = []
+    try:
+        for index in range(renderer.pageCount):
+            filePath = os.path.join(outputDir, "page-%03d.%s" % (index + 1, fileFormat))
+            with open(filePath, "wb") as previewFile:
+                previewFile.write(renderer.getPage(index, zoom))
+            filePaths.append(filePath)
+    finally:
+        renderer.close()
+    return filePaths
+
+
+if __name__ == "__main__":
+    import argparse
+    from proofRender.glyphSource import TTFontGlyphSource
+    from proofPreset.asyncLoading import loadPresetFile
+
+    parser = argparse.ArgumentParser(description="Dump proof preview pages")
+    parser.add_argument("presetPath")
+    parser.add_argument("fontPath")
+    parser.add_argument("outputDir")
+    parser.add_argument("--format", choices=FORMATS, default="png")
+    parser.add_argument("--zoom", type=float, default=1.0)
+    args = parser.parse_args()
+
+    for filePath in dumpPreviews(loadPresetFile(args.presetPath),
+                                 TTFontGlyphSource(args.fontPath),
+                                 args.outputDir, args.format, args.zoom):
+        print(filePath)
@@ -0,0 +1,136 @@
+"""
+Minimal rasterizer: filled outlines to grayscale PNG
+
+Pure Python (zlib only), so previews work anywhere. Curves
+are flattened to polygons and filled with the nonzero
+winding rule; each pixel row is sampled SUBSAMPLES times
+and horizontal coverage is exact, which is enough
+antialiasing for a proof preview.
+"""
+
+import math
+import struct
+import zlib
+
+SUBSAMPLES = 4
+CURVE_STEPS = 8
+
+def flattenSegments(segments, transform, curveSteps=CURVE_STEPS):
+    """
+    Return list of polygons (lists of points) for
+    OutlinePen segments, with transform(point) applied
+    """
+    polygons = []
+    polygon = None
+    currentPoint = None
+
+    for operator, points in segments:
+        if operator == "moveTo":
+            polygon = [transform(points[0])]
+            polygons.append(polygon)
+            currentPoint = points[0]
+        elif operator == "lineTo":
+            polygon.append(transform(points[0]))
+            currentPoint = points[0]
+        elif operator == "curveTo":
+            (x0, y0), (x1, y1), (x2, y2), (x3, y3) = (currentPoint,) + points
+            for step in range(1, curveSteps + 1):
+                t = step / curveSteps
+                mt = 1 - t
+                a, b, c, d = mt * mt * mt, 3 * mt * mt * t, 3 * mt * t * t, t * t * t
+                polygon.append(transform((a * x0 + b * x1 + c * x2 + d * x3,
+                                          a * y0 + b * y1 + c * y2 + d * y3)))
+            currentPoint = points[-1]
+
+    # Polygons are implicitly closed
+    return polygons
+
+def fillPolygons(polygons, coverageRows, width):
+    """
+    Add nonzero-winding coverage of polygons (pixel
+    coordinates, y down) to coverageRows, a list of
+    lists of floats (one per pixel row)
+    """
+    height = len(coverageRows)
+    subRowCount = height * SUBSAMPLES
+    weight = 1 / SUBSAMPLES
+
+    edges = []
+    for polygon in polygons:
+        for index, (x0, y0) in enumerate(polygon):
+            x1, y1 = polygon[index - 1]
+            if y0 == y1:
+                continue
+            direction = 1
+            if y0 > y1:
+                x0, y0, x1, y1 = x1, y1, x0, y0
+                direction = -1
+            # Sub-row i samples y = (i + 0.5) / SUBSAMPLES
+            start = max(0, math.ceil(y0 * SUBSAMPLES - 0.5))
+            end = min(subRowCount, math.ceil(y1 * SUBSAMPLES - 0.5))
+            if start < end:
+                edges.append((start, end, x0, y0, (x1 - x0) / (y1 - y0), direction))
+
+    if not edges:
+        return
+
+    edges.sort()
+    active = []
+    edgeIndex = 0
+    for subRow in range(edges[0][0], max(edge[1] for edge in edges)):
+        while edgeIndex < len(edges) and edges[edgeIndex][0] <= subRow:
+            active.append(edges[edgeIndex])
+            edgeIndex += 1
+        active = [edge for edge in active if edge[1] > subRow]
+        if not active:
+            continue
+
+        sampleY = (subRow + 0.5) / SUBSAMPLES
+        crossings = sorted((x0 + (sampleY - y0) * slope, direction)
+                           for _, _, x0, y0, slope, direction in active)
+
+        row = coverageRows[subRow // SUBSAMPLES]
+        winding = 0
+        previousX = None
+        for x, direction in crossings:
+            if winding != 0:
+                _addSpan(row, previousX, x, width, weight)
+            winding += direction
+            previousX = x
+
+def _addSpan(row, startX, endX, width, weight):
+    startX = min(max(startX, 0), width)
+    endX = min(max(endX, 0), width)
+    if endX <= startX:
+        return
+
+    startPixel = int(startX)
+    endPixel = int(endX)
+    if startPixel == endPixel:
+        row[startPixel] += (endX - startX) * weight
+        return
+
+    row[startPixel] += (startPixel + 1 - startX) * weight
+    for pixel in range(startPixel + 1, endPixel):
+        row[pixel] += weight
+    if endPixel < width:
+        row[endPixel] += (endX - endPixel) * weight
+
+def encodePNG(coverageRows, width):
+    """
+    Return 8-bit grayscale PNG data: black ink
+    (coverage 1) on white (coverage 0)
+    """
+    rawData = bytearray()
+    for row in coverageRows:
+        rawData.append(0)  # No filter
+        rawData.extend(255 - min(255, int(value * 255 + 0.5)) for value in row)
+
+    def chunk(chunkType, data):
+        return (struct.pack(">I", len(data)) + chunkType + data
+                + struct.pack(">I", zlib.crc32(chunkType + data) & 0xffffffff))
+
+    header = struct.pack(">IIBBBBB", width, len(coverageRows), 8, 0, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(bytes(rawData)))
+            + chunk(b"IEND", b""))
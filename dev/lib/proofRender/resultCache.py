@@ -0,0 +1,213 @@
+"""
+On-disk cache of rendered proofs
+
+Whole PDFs are cached by (font hash, preset hash, renderer
+version, layout options): reprinting an unchanged preset
+with an unchanged font is a single lookup, done before any
+layout.
+
+Page content streams are cached too, so when a preset did
+change, only pages whose content changed are built again.
+(A page's key covers what's drawn on it, including glyph
+XObject names, so edits that reflow later pages or bring
+new glyphs in earlier pages invalidate those pages too.)
+
+Everything shares one size budget, with least recently
+used entries evicted first.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import time
+from collections import namedtuple
+
+from proofRender.hashing import hashPreset
+from proofRender.layout import DEFAULT_PAGE_SIZE, GlyphRun, iterPages
+from proofRender.pdfWriter import RENDERER_VERSION, PDFWriter, buildPageContent
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".proofDrawer", "cache", "results")
+
+RESULT = "result"
+PAGE = "page"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    lastUsed REAL NOT NULL,
+    data BLOB
+);
+CREATE INDEX IF NOT EXISTS entriesByUse ON entries (lastUsed);
+"""
+
+RenderResult = namedtuple("RenderResult", "pageCount pagesBuilt fromCache")
+
+def _makeKey(*parts):
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()
+
+class ResultCache:
+    """
+    Size-bounded LRU cache of rendered PDFs and page
+    content streams in cacheDir.
+
+    Results are stored as files, pages inside the
+    index database.
+    """
+    def __init__(self, cacheDir=DEFAULT_CACHE_DIR, maxSize=500 * 1024 * 1024,
+                 clock=time.time):
+        self.cacheDir = cacheDir
+        self.maxSize = maxSize
+        self._clock = clock
+
+        os.makedirs(cacheDir, exist_ok=True)
+        self._connection = sqlite3.connect(os.path.join(cacheDir, "index.sqlite"))
+        self._connection.executescript(_SCHEMA)
+
+    def close(self):
+        self._connection.close()
+
+    @property
+    def totalSize(self):
+        return self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def getResultKey(self, fontHash, presetHash, layoutOptions=None):
+        return _makeKey(RESULT, fontHash, presetHash, str(RENDERER_VERSION),
+                        json.dumps(layoutOptions or {}, sort_keys=True))
+
+    def lookupResult(self, resultKey):
+        """
+        Return path of cached PDF, or None
+        """
+        filePath = self._getResultPath(resultKey)
+        if not self._touch(resultKey) or not os.path.isfile(filePath):
+            return None
+        return filePath
+
+    def storeResult(self, resultKey, pdfPath):
+        """
+        Copy PDF at pdfPath into the cache
+        """
+        cachedPath = self._getResultPath(resultKey)
+        tempPath = cachedPath + ".tmp"
+        shutil.copyfile(pdfPath, tempPath)
+        os.replace(tempPath, cachedPath)
+        self._store(resultKey, RESULT, os.path.getsize(cachedPath), None)
+
+    def lookupPage(self, pageKey):
+        """
+        Return cached page content, or None
+        """
+        row = self._connection.execute("SELECT data FROM entries WHERE key = ?",
+                                       (pageKey,)).fetchone()
+        if row is None:
+            return None
+        self._touch(pageKey)
+        return row[0]
+
+    def storePage(self, pageKey, content):
+        self._store(pageKey, PAGE, len(content), content)
+
+    def clear(self):
+        for (key,) in self._connection.execute("SELECT key FROM entries WHERE kind = ?",
+                                               (RESULT,)).fetchall():
+            self._removeResultFile(key)
+        with self._connection:
+            self._connection.execute("DELETE FROM entries")
+
+    def _getResultPath(self, resultKey):
+        return os.path.join(self.cacheDir, resultKey + ".pdf")
+
+    def _touch(self, key):
+        with self._connection:
+            cursor = self._connection.execute("UPDATE entries SET lastUsed = ? WHERE key = ?",
+                                              (self._clock(), key))
+        return cursor.rowcount == 1
+
+    def _store(self, key, kind, size, data):
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO entries (key, kind, size, lastUsed, data) "
+                "VALUES (?, ?, ?, ?, ?)", (key, kind, size, self._clock(), data))
+        self._evict()
+
+    def _evict(self):
+        """
+        Drop least recently used entries until
+        the cache fits in maxSize
+        """
+        totalSize = self.totalSize
+        if totalSize <= self.maxSize:
+            return
+
+        evictedKeys = []
+        rows = self._connection.execute("SELECT key, kind, size FROM entries "
+                                        "ORDER BY lastUsed, rowid").fetchall()
+        for key, kind, size in rows:
+            if totalSize <= self.maxSize:
+                break
+            if kind == RESULT:
+                self._removeResultFile(key)
+            evictedKeys.append((key,))
+            totalSize -= size
+
+        with self._connection:
+            self._connection.executemany("DELETE FROM entries WHERE key = ?", evictedKeys)
+
+    def _removeResultFile(self, key):
+        try:
+            os.remove(self._getResultPath(key))
+        except FileNotFoundError:
+            pass
+
+def getPageKey(fontHash, page, xObjectNames, layoutOptions=None):
+    """
+    Return cache key for page's content stream
+    """
+    usedNames = sorted({(glyphName, xObjectNames[glyphName])
+                        for run in page.runs if isinstance(run, GlyphRun)
+                        for glyphName, _ in run.glyphs},
+                       key=lambda item: item[0])
+    return _makeKey(PAGE, fontHash, str(RENDERER_VERSION),
+                    json.dumps(layoutOptions or {}, sort_keys=True),
+                    repr((page.width, page.height, page.runs)), repr(usedNames))
+
+def renderPDFCached(preset, filePath, glyphSource, fontHash, cache,
+                    pageSize=DEFAULT_PAGE_SIZE, **layoutOptions):
+    """
+    Write preset as PDF to filePath, reusing cached output.
+
+    fontHash identifies the font's revision (eg.
+    proofRender.hashing.hashFont(fontPath)). Return a
+    RenderResult(pageCount, pagesBuilt, fromCache).
+    """
+    cacheOptions = dict(layoutOptions, pageSize=list(pageSize))
+    resultKey = cache.getResultKey(fontHash, hashPreset(preset), cacheOptions)
+
+    # Cheap path: nothing changed, no layout needed
+    cachedPath = cache.lookupResult(resultKey)
+    if cachedPath is not None:
+        shutil.copyfile(cachedPath, filePath)
+        return RenderResult(None, 0, True)
+
+    pages = list(iterPages(preset, glyphSource, pageSize, **layoutOptions))
+    pagesBuilt = 0
+    with PDFWriter(filePath, glyphSource) as writer:
+        xObjectNames = {}
+        for page in pages:
+            xObjectNames = writer.assignGlyphs(page)
+
+        for page in pages:
+            pageKey = getPageKey(fontHash, page, xObjectNames, cacheOptions)
+            content = cache.lookupPage(pageKey)
+            if content is None:
+                content = buildPageContent(page, xObjectNames, glyphSource.unitsPerEm)
+                cache.storePage(pageKey, content)
+                pagesBuilt += 1
+            writer.writePageContent(page, content)
+
+    cache.storeResult(resultKey, filePath)
+    return RenderResult(len(pages), pagesBuilt, False)
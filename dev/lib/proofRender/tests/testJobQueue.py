@@ -0,0 +1,206 @@
+"""
+Test proof job queue
+"""
+
+from proofPreset import ProofPreset
+from proofRender import jobQueue as jq
+from proofRender.pdfWriter import writePresetPDF
+from proofRender.tests.testPdfWriter import makeGlyphSource
+import os
+import os.path
+import tempfile
+import threading
+import unittest
+
+# Long enough that renewals never come from the lease thread
+LEASE_TIME = 600
+
+class Crash(BaseException):
+    """
+    Stands in for the process dying mid-job
+    """
+
+class TestJobQueue(unittest.TestCase):
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.dbPath = os.path.join(self.tempDir.name, "jobs.sqlite")
+        self.fontPath = os.path.join(self.tempDir.name, "font.otf")
+        with open(self.fontPath, "wb") as fontFile:
+            fontFile.write(b"not really a font")
+
+        self.glyphSource = makeGlyphSource()
+        self.now = 1000.0
+        self.queue = self._openQueue()
+
+        self.preset = ProofPreset("testPreset")
+        self.preset.addGroup({"name": "HO", "typeSize": 72, "print": True,
+                              "contents": ["HOH OHO"] * 30})
+
+    def tearDown(self):
+        self.queue.close()
+        self.tempDir.cleanup()
+
+    def _openQueue(self):
+        return jq.ProofJobQueue(self.dbPath, lambda fontPath: self.glyphSource,
+                                clock=lambda: self.now, leaseTime=LEASE_TIME)
+
+    def _outputPath(self, fileName):
+        return os.path.join(self.tempDir.name, fileName)
+
+    def test_priorityAndDeduplication(self):
+        lowId = self.queue.submit(self.preset, self.fontPath, self._outputPath("low.pdf"))
+        otherPreset = self.preset.duplicatePreset("otherPreset")
+        highId = self.queue.submit(otherPreset, self.fontPath, self._outputPath("high.pdf"),
+                                   priority=5)
+
+        # Same content and output: same job
+        self.assertEqual(self.queue.submit(self.preset, self.fontPath,
+                                           self._outputPath("low.pdf")), lowId)
+        # Different layout options: different job
+        smallId = self.queue.submit(self.preset, self.fontPath, self._outputPath("small.pdf"),
+                                    pageSize=(300, 300))
+        self.assertNotEqual(smallId, lowId)
+
+        self.assertEqual([job["id"] for job in self.queue.jobs(jq.QUEUED)],
+                         [highId, lowId, smallId])
+        self.assertTrue(self.queue.cancel(smallId))
+        self.assertEqual(self.queue.runAll(), [highId, lowId])
+        self.assertEqual(self.queue.status(lowId)["state"], jq.DONE)
+        self.assertEqual(self.queue.status(smallId)["state"], jq.CANCELLED)
+        self.assertTrue(os.path.isfile(self._outputPath("low.pdf")))
+
+    def test_outputPath(self):
+        jobId = self.queue.submit(self.preset, self.fontPath, self._outputPath("proof.pdf"))
+        self.queue.runAll()
+
+        # Same job, written somewhere else: a new job
+        otherId = self.queue.submit(self.preset, self.fontPath, self._outputPath("other.pdf"))
+        self.assertNotEqual(otherId, jobId)
+        self.assertEqual(self.queue.runAll(), [otherId])
+        self.assertTrue(os.path.isfile(self._outputPath("other.pdf")))
+
+        # Output deleted: rendered again
+        os.remove(self._outputPath("proof.pdf"))
+        self.assertEqual(self.queue.submit(self.preset, self.fontPath,
+                                           self._outputPath("proof.pdf")), jobId)
+        self.assertEqual(self.queue.status(jobId)["state"], jq.QUEUED)
+        self.assertEqual(self.queue.runAll(), [jobId])
+        self.assertTrue(os.path.isfile(self._outputPath("proof.pdf")))
+
+    def test_workersClaimJobsOnce(self):
+        jobIds = [self.queue.submit(self.preset, self.fontPath, self._outputPath("%d.pdf" % index))
+                  for index in range(8)]
+        workers = [self._openQueue() for _ in range(3)]
+
+        runJobIds = []
+        def work(queue):
+            runJobIds.extend(queue.runAll())
+            queue.close()
+
+        threads = [threading.Thread(target=work, args=(worker,)) for worker in workers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(runJobIds), jobIds)
+        self.assertTrue(all(self.queue.status(jobId)["state"] == jq.DONE for jobId in jobIds))
+
+    def test_runningJobsArentTakenOver(self):
+        jobId = self.queue.submit(self.preset, self.fontPath, self._outputPath("proof.pdf"))
+        otherIds = []
+
+        def openOtherWorker(jobId, pagesDone, pageCount):
+            # Every page renews the lease
+            self.now += LEASE_TIME * 0.9
+            otherQueue = self._openQueue()
+            otherIds.append(otherQueue.runNext())
+            self.assertEqual(otherQueue.status(jobId)["state"], jq.RUNNING)
+            otherQueue.close()
+
+        self.assertEqual(self.queue.runNext(openOtherWorker), jobId)
+        status = self.queue.status(jobId)
+        self.assertEqual(status["state"], jq.DONE)
+        self.assertGreater(len(otherIds), 3)
+        self.assertEqual(set(otherIds), {None})
+
+    def test_expiredLeaseIsTakenOver(self):
+        jobId = self.queue.submit(self.preset, self.fontPath, self._outputPath("proof.pdf"))
+        pagesDone = []
+
+        def stallOnSecondPage(jobId, pageDone, pageCount):
+            pagesDone.append(pageDone)
+            if pageDone == 2:
+                # This worker stalls, another one runs the job
+                self.now += LEASE_TIME + 1
+                otherQueue = self._openQueue()
+                self.assertEqual(otherQueue.runNext(), jobId)
+                self.assertEqual(otherQueue.status(jobId)["state"], jq.DONE)
+                otherQueue.close()
+
+        self.queue.runNext(stallOnSecondPage)
+        # The stalled worker stopped at its next page
+        self.assertEqual(pagesDone, [1, 2])
+        status = self.queue.status(jobId)
+        self.assertEqual((status["state"], status["error"]), (jq.DONE, None))
+        self.assertEqual(os.listdir(self.tempDir.name).count("proof.pdf"), 1)
+        self.assertFalse([fileName for fileName in os.listdir(self.tempDir.name)
+                          if fileName.endswith(".tmp")])
+
+    def test_resumeAfterCrash(self):
+        jobId = self.queue.submit(self.preset, self.fontPath, self._outputPath("proof.pdf"))
+
+        def crashOnThirdPage(jobId, pagesDone, pageCount):
+            if pagesDone == 3:
+                raise Crash()
+
+        with self.assertRaises(Crash):
+            self.queue.runNext(crashOnThirdPage)
+        self.queue.close()
+
+        # Still leased to the crashed worker
+        self.queue = self._openQueue()
+        self.assertEqual(self.queue.status(jobId)["state"], jq.RUNNING)
+        self.assertIsNone(self.queue.runNext())
+        self.queue.close()
+
+        self.now += LEASE_TIME + 1
+        self.queue = self._openQueue()
+        status = self.queue.status(jobId)
+        self.assertEqual((status["state"], status["pagesDone"]), (jq.QUEUED, 3))
+
+        finishedPages = []
+        self.queue.runNext(lambda jobId, pagesDone, pageCount: finishedPages.append(pagesDone))
+        status = self.queue.status(jobId)
+        self.assertEqual(finishedPages, list(range(4, status["pageCount"] + 1)))
+        self.assertEqual(status["state"], jq.DONE)
+
+        # Same file as an uninterrupted run
+        expectedPath = self._outputPath("expected.pdf")
+        writePresetPDF(self.preset, expectedPath, self.glyphSource)
+        with open(expectedPath, "rb") as expectedFile, \
+             open(self._outputPath("proof.pdf"), "rb") as pdfFile:
+            self.assertEqual(pdfFile.read(), expectedFile.read())
+
+    def test_failedJob(self):
+        def brokenGlyphSource(fontPath):
+            raise ValueError("Can't read font")
+
+        self.queue.glyphSourceFactory = brokenGlyphSource
+        jobId = self.queue.submit(self.preset, self.fontPath, self._outputPath("proof.pdf"))
+        self.queue.runNext()
+        status = self.queue.status(jobId)
+        self.assertEqual(status["state"], jq.FAILED)
+        self.assertEqual(status["error"], "ValueError: Can't read font")
+
+        # Submitting again queues it again
+        self.assertEqual(self.queue.submit(self.preset, self.fontPath,
+                                           self._outputPath("proof.pdf")), jobId)
+        self.assertEqual(self.queue.status(jobId)["state"], jq.QUEUED)
+
+        with self.assertRaises(KeyError):
+            self.queue.status(jobId + 1)
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False, verbosity=1)
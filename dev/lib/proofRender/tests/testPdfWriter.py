@@ -0,0 +1,180 @@
+"""
+Test PDF proof writer
+"""
+
+from proofPreset import ProofPreset
+from proofRender.glyphSource import GlyphSource
+from proofRender import layout
+from proofRender import pdfWriter as pw
+import os.path
+import re
+import tempfile
+import unittest
+import zlib
+
+def makeSquare(width):
+    return [("moveTo", ((0, 0),)), ("lineTo", ((width, 0),)),
+            ("lineTo", ((width, 700),)), ("lineTo", ((0, 700),)),
+            ("closePath", ())]
+
+def makeGlyphSource():
+    glyphs = {
+        ".notdef": {"width": 500, "outline": makeSquare(400)},
+        "H": {"width": 600, "outline": makeSquare(500)},
+        "O": {"width": 700, "outline": [("qCurveTo", ((0, 0), (600, 0), (600, 700), (0, 700), None))]},
+        "Hdot": {"width": 600, "outline": [("addComponent", ("H", (1, 0, 0, 1, 0, 0))),
+                                           ("addComponent", ("O", (0.1, 0, 0, 0.1, 250, 750)))]},
+        "space": {"width": 250, "outline": []}
+    }
+    cmap = {ord("H"): "H", ord("O"): "O", ord("Ḣ"): "Hdot", ord(" "): "space"}
+    return GlyphSource(glyphs, cmap)
+
+def readObjects(data):
+    """
+    Return {objectNumber: (dictBytes, streamBytes or None)}
+    """
+    objects = {}
+    pattern = re.compile(rb"(\d+) 0 obj\n(.*?)\nendobj\n", re.S)
+    for match in pattern.finditer(data):
+        body = match.group(2)
+        stream = None
+        if b"\nstream\n" in body:
+            body, stream = body.split(b"\nstream\n", 1)
+            stream = stream[:-len(b"\nendstream")]
+            if b"/FlateDecode" in body:
+                stream = zlib.decompress(stream)
+        objects[int(match.group(1))] = (body, stream)
+    return objects
+
+class TestPDFWriter(unittest.TestCase):
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.pdfPath = os.path.join(self.tempDir.name, "proof.pdf")
+        self.glyphSource = makeGlyphSource()
+
+        self.preset = ProofPreset("testPreset")
+        self.preset.addGroup({"name": "HO", "typeSize": 72, "print": True,
+                              "contents": ["HOH OHO " * 10] * 20})
+        self.preset.addGroup({"name": "Not printed", "print": False,
+                              "contents": ["XYZ"]})
+        self.preset.addGroup({"name": "Missing (glyphs)", "print": True,
+                              "contents": ["HḢxH"]})
+
+    def tearDown(self):
+        self.tempDir.cleanup()
+
+    def test_glyphsWrittenOnce(self):
+        pageCount = pw.writePresetPDF(self.preset, self.pdfPath, self.glyphSource)
+        self.assertGreater(pageCount, 1)
+
+        with open(self.pdfPath, "rb") as pdfFile:
+            data = pdfFile.read()
+        self.assertTrue(data.startswith(b"%PDF-1.4"))
+        self.assertTrue(data.endswith(b"%%EOF\n"))
+
+        objects = readObjects(data)
+        forms = [body for body, _ in objects.values() if b"/Subtype /Form" in body]
+        # H, O, Hdot and .notdef for "x"; space has no outline
+        self.assertEqual(len(forms), 4)
+
+        placements = sum(stream.count(b" Do Q") for body, stream in objects.values()
+                         if stream is not None and b"/Subtype /Form" not in body)
+        self.assertEqual(placements, 20 * 10 * 6 + 4)
+
+    def test_crossReferenceOffsets(self):
+        pw.writePresetPDF(self.preset, self.pdfPath, self.glyphSource)
+        with open(self.pdfPath, "rb") as pdfFile:
+            data = pdfFile.read()
+
+        xrefPosition = int(data.rsplit(b"startxref\n", 1)[1].split(b"\n")[0])
+        self.assertTrue(data[xrefPosition:].startswith(b"xref\n"))
+
+        entries = data[xrefPosition:].split(b"\n")[3:]
+        for number, entry in enumerate(entries, start=1):
+            if not entry.endswith(b" n "):
+                break
+            offset = int(entry[:10])
+            self.assertTrue(data[offset:].startswith(b"%d 0 obj" % number))
+
+    def test_uncompressed(self):
+        self.preset.removeGroup(0)
+        pw.writePresetPDF(self.preset, self.pdfPath, self.glyphSource, compress=False)
+        with open(self.pdfPath, "rb") as pdfFile:
+            data = pdfFile.read()
+
+        self.assertNotIn(b"/FlateDecode", data)
+        self.assertIn(b"(Missing \\(glyphs\\)) Tj", data)
+        self.assertIn(b"/G1 Do Q", data)
+
+    def test_pathPen(self):
+        pen = pw.PDFPathPen(self.glyphSource)
+        self.glyphSource.drawGlyph("Hdot", pen)
+        self.assertEqual(pen.operators[:2], ["0 0 m", "500 0 l"])
+        self.assertEqual(pen.bounds, [0, 0, 500, 820])
+        # Quadratic contour became 4 cubic curves
+        self.assertEqual(sum(op.endswith(" c") for op in pen.operators), 4)
+
+    def test_openContours(self):
+        glyphSource = GlyphSource({"I": {"width": 300, "outline": [
+            ("moveTo", ((0, 0),)), ("lineTo", ((1000, 0),)),
+            ("lineTo", ((1000, 1000),)), ("endPath", ())
+        ] + makeSquare(200)}})
+        pen = pw.PDFPathPen(glyphSource)
+        glyphSource.drawGlyph("I", pen)
+        self.assertEqual(pen.operators, ["0 0 m", "200 0 l", "200 700 l", "0 700 l", "h"])
+        self.assertEqual(pen.bounds, [0, 0, 200, 700])
+
+        # Only open contours: nothing is drawn
+        glyphSource.glyphs["I"]["outline"] = glyphSource.glyphs["I"]["outline"][:4]
+        pen = pw.PDFPathPen(glyphSource)
+        glyphSource.drawGlyph("I", pen)
+        self.assertEqual(pen.segments, [])
+        self.assertEqual(pen.bounds, [None] * 4)
+
+class TestLayout(unittest.TestCase):
+    def setUp(self):
+        self.glyphSource = makeGlyphSource()
+
+    def test_wrapLine(self):
+        glyphs = [(character, character, 1) for character in "HHH OO HHHHHH"]
+        lines = layout.wrapLine(glyphs, 5)
+        self.assertEqual(["".join(glyph[0] for glyph in line) for line in lines],
+                         ["HHH", "OO", "HHHHH", "H"])
+
+    def test_pages(self):
+        preset = ProofPreset("testPreset")
+        preset.addGroup({"name": "HO", "typeSize": 100, "leading": 100, "print": True,
+                         "contents": ["HO"] * 10})
+        pages = list(layout.iterPages(preset, self.glyphSource, pageSize=(500, 500),
+                                      margin=50))
+
+        self.assertEqual([page.index for page in pages], [0, 1, 2])
+        firstRuns = pages[0].runs
+        self.assertEqual(firstRuns[0], layout.LabelRun("HO", 50, 442, 8))
+        self.assertEqual(firstRuns[1].glyphs, (("H", 50), ("O", 110)))
+        self.assertEqual(sum(len(page.runs) for page in pages), 11)
+
+    def test_missingGlyphs(self):
+        preset = ProofPreset("testPreset")
+        preset.addGroup({"name": "HO", "print": True, "contents": ["HO"]})
+        preset.addGroup({"name": "Hxy", "print": True, "contents": ["Hyx"]})
+        self.assertEqual(layout.getUnrenderableGroupIndices(preset, self.glyphSource), [1])
+
+        def getLabels(missingGlyphs):
+            pages = layout.iterPages(preset, self.glyphSource, missingGlyphs=missingGlyphs)
+            return [run.text for page in pages for run in page.runs
+                    if isinstance(run, layout.LabelRun)]
+
+        self.assertEqual(getLabels("flag"), ["HO", "Hxy", "Missing: x y"])
+        self.assertEqual(getLabels("skip"), ["HO"])
+        self.assertEqual(getLabels(None), ["HO", "Hxy"])
+        with self.assertRaises(ValueError):
+            getLabels("ignore")
+
+    def test_glyphNames(self):
+        self.assertEqual(layout.getGlyphNames("Hx ", self.glyphSource),
+                         [("H", "H"), ("x", ".notdef"), (" ", "space")])
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False, verbosity=1)
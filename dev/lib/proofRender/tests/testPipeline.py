@@ -0,0 +1,53 @@
+"""
+Test parallel PDF rendering
+"""
+
+from proofPreset import ProofPreset
+from proofRender import pipeline
+from proofRender.pdfWriter import writePresetPDF
+from proofRender.tests.testPdfWriter import makeGlyphSource
+import os.path
+import tempfile
+import unittest
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.glyphSource = makeGlyphSource()
+
+        self.preset = ProofPreset("testPreset")
+        for name in ("one", "two", "three"):
+            self.preset.addGroup({"name": name, "typeSize": 48, "print": True,
+                                  "contents": ["HOH OHO", "ḢOḢ HxH"] * 20})
+
+    def tearDown(self):
+        self.tempDir.cleanup()
+
+    def _render(self, fileName, workers, compress=True):
+        filePath = os.path.join(self.tempDir.name, fileName)
+        pageCount = pipeline.renderPDF(self.preset, filePath, self.glyphSource,
+                                       workers=workers, compress=compress)
+        with open(filePath, "rb") as pdfFile:
+            return pageCount, pdfFile.read()
+
+    def test_sameOutputForAnyWorkerCount(self):
+        pageCount, singleWorker = self._render("one.pdf", 1)
+        self.assertGreater(pageCount, 3)
+
+        for workers in (2, 3):
+            self.assertEqual(self._render("many.pdf", workers), (pageCount, singleWorker))
+
+        # ...and the same as writing page by page
+        filePath = os.path.join(self.tempDir.name, "sequential.pdf")
+        writePresetPDF(self.preset, filePath, self.glyphSource)
+        with open(filePath, "rb") as pdfFile:
+            self.assertEqual(pdfFile.read(), singleWorker)
+
+    def test_uncompressed(self):
+        _, data = self._render("plain.pdf", 2, compress=False)
+        self.assertNotIn(b"/FlateDecode", data)
+        self.assertEqual(data.count(b"/Subtype /Form"), 4)
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False, verbosity=1)
@@ -0,0 +1,98 @@
+"""
+Test preview renderer and tile cache
+"""
+
+from proofPreset import ProofPreset
+from proofRender import preview as pv
+from proofRender.tests.testPdfWriter import makeGlyphSource
+import os.path
+import struct
+import tempfile
+import unittest
+import zlib
+
+def decodePNG(data):
+    """
+    Return (width, height, rows of gray values)
+    """
+    width, height = struct.unpack(">II", data[16:24])
+    idatLength = struct.unpack(">I", data[33:37])[0]
+    rawData = zlib.decompress(data[41:41 + idatLength])
+    rowLength = width + 1
+    rows = [rawData[row * rowLength + 1:(row + 1) * rowLength] for row in range(height)]
+    return width, height, rows
+
+class TestTileCache(unittest.TestCase):
+    def test_lruEviction(self):
+        cache = pv.TileCache(maxSize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+
+        # "b" is least recently used
+        cache.put("c", 3)
+        self.assertNotIn("b", cache)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("b"))
+
+class TestPreviewRenderer(unittest.TestCase):
+    def setUp(self):
+        self.glyphSource = makeGlyphSource()
+        self.preset = ProofPreset("testPreset")
+        for name in ("one", "two", "three"):
+            self.preset.addGroup({"name": name, "typeSize": 100, "leading": 100,
+                                  "print": True, "contents": ["HO", "OH", "HH"]})
+        self.layoutOptions = {"pageSize": (400, 450), "margin": 20}
+
+    def test_svg(self):
+        renderer = pv.PreviewRenderer(self.preset, self.glyphSource, "svg",
+                                      prefetch=0, **self.layoutOptions)
+        self.addCleanup(renderer.close)
+        svg = renderer.getPage(0).decode("utf-8")
+
+        self.assertEqual(svg.count("<path "), 2)
+        self.assertEqual(svg.count("<use "), 6)
+        self.assertIn('<text x="20" y="28" font-family="Helvetica" font-size="8">one</text>', svg)
+        self.assertIn('transform="matrix(0.1 0 0 -0.1 20 132)"', svg)
+
+    def test_png(self):
+        renderer = pv.PreviewRenderer(self.preset, self.glyphSource, "png",
+                                      prefetch=0, **self.layoutOptions)
+        self.addCleanup(renderer.close)
+        width, height, rows = decodePNG(renderer.getPage(0, zoom=0.5))
+
+        self.assertEqual((width, height), (200, 225))
+        # First "H": x 10-35, y from 66 (baseline) up to 31
+        self.assertEqual(rows[50][20], 0)
+        self.assertEqual(rows[50][5], 255)
+        self.assertEqual(rows[20][20], 255)
+
+    def test_cacheAndPrefetch(self):
+        renderer = pv.PreviewRenderer(self.preset, self.glyphSource, "svg",
+                                      prefetch=1, **self.layoutOptions)
+        self.addCleanup(renderer.close)
+        self.assertEqual(renderer.pageCount, 3)
+
+        firstTile = renderer.getPage(1)
+        renderer._executor.shutdown(wait=True)
+        # Page 1 plus both neighbours
+        self.assertEqual(len(renderer.tileCache), 3)
+        self.assertIs(renderer.getPage(1), firstTile)
+
+        # Same content, different page: same tile
+        self.preset.removeGroup(0)
+        renderer.relayout()
+        self.assertIs(renderer.getPage(0), firstTile)
+
+    def test_dumpPreviews(self):
+        with tempfile.TemporaryDirectory() as outputDir:
+            filePaths = pv.dumpPreviews(self.preset, self.glyphSource, outputDir,
+                                        "png", zoom=0.25, **self.layoutOptions)
+            self.assertEqual([os.path.basename(path) for path in filePaths],
+                             ["page-001.png", "page-002.png", "page-003.png"])
+            with open(filePaths[0], "rb") as previewFile:
+                self.assertTrue(previewFile.read().startswith(b"\x89PNG"))
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False, verbosity=1)
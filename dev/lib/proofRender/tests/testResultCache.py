@@ -0,0 +1,93 @@
+"""
+Test rendered proof cache
+"""
+
+from proofPreset import ProofPreset
+from proofRender import resultCache as rc
+from proofRender.pdfWriter import writePresetPDF
+from proofRender.tests.testPdfWriter import makeGlyphSource
+import os.path
+import tempfile
+import unittest
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.now = 0
+        self.cache = rc.ResultCache(os.path.join(self.tempDir.name, "cache"),
+                                    clock=self._clock)
+        self.glyphSource = makeGlyphSource()
+        self.pdfPath = os.path.join(self.tempDir.name, "proof.pdf")
+
+        self.preset = ProofPreset("testPreset")
+        for name in ("one", "two", "three"):
+            self.preset.addGroup({"name": name, "typeSize": 72, "print": True,
+                                  "contents": ["HOH OHO"] * 12})
+
+    def tearDown(self):
+        self.cache.close()
+        self.tempDir.cleanup()
+
+    def _clock(self):
+        self.now += 1
+        return self.now
+
+    def _render(self):
+        return rc.renderPDFCached(self.preset, self.pdfPath, self.glyphSource,
+                                  "fontHash", self.cache)
+
+    def _readPDF(self):
+        with open(self.pdfPath, "rb") as pdfFile:
+            return pdfFile.read()
+
+    def test_wholeResultReused(self):
+        result = self._render()
+        self.assertFalse(result.fromCache)
+        self.assertEqual(result.pagesBuilt, result.pageCount)
+        firstPDF = self._readPDF()
+
+        os.remove(self.pdfPath)
+        self.assertEqual(self._render(), rc.RenderResult(None, 0, True))
+        self.assertEqual(self._readPDF(), firstPDF)
+
+    def test_onlyChangedPagesBuilt(self):
+        pageCount = self._render().pageCount
+        self.assertGreater(pageCount, 3)
+
+        # Same number of lines, same glyphs: only the
+        # last 2 pages (group "three") change
+        self.preset.editGroup(2, {"contents": ["OHO HOH"] * 12})
+        result = self._render()
+        self.assertEqual((result.pageCount, result.pagesBuilt, result.fromCache),
+                         (pageCount, 2, False))
+
+        expectedPath = os.path.join(self.tempDir.name, "expected.pdf")
+        writePresetPDF(self.preset, expectedPath, self.glyphSource)
+        with open(expectedPath, "rb") as expectedFile:
+            self.assertEqual(self._readPDF(), expectedFile.read())
+
+    def test_lruEviction(self):
+        self.cache.storePage("a", b"x" * 40)
+        self.cache.storePage("b", b"x" * 40)
+        self.assertEqual(self.cache.lookupPage("a"), b"x" * 40)
+
+        self.cache.maxSize = 100
+        # "b" is least recently used
+        self.cache.storePage("c", b"x" * 40)
+        self.assertIsNone(self.cache.lookupPage("b"))
+        self.assertEqual(self.cache.totalSize, 80)
+
+        resultKey = self.cache.getResultKey("fontHash", "presetHash")
+        with open(self.pdfPath, "wb") as pdfFile:
+            pdfFile.write(b"x" * 60)
+        self.cache.storeResult(resultKey, self.pdfPath)
+        self.assertIsNotNone(self.cache.lookupResult(resultKey))
+        self.assertIsNone(self.cache.lookupPage("a"))
+
+        self.cache.storePage("d", b"x" * 60)
+        self.assertIsNone(self.cache.lookupResult(resultKey))
+        self.assertFalse(os.path.exists(self.cache._getResultPath(resultKey)))
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False, verbosity=1)